@@ -1,5 +1,25 @@
-from langchain_ibm.chat_models import ChatWatsonx
-from langchain_ibm.embeddings import WatsonxEmbeddings
-from langchain_ibm.llms import WatsonxLLM
+import importlib
+from typing import TYPE_CHECKING, Any
+
+if TYPE_CHECKING:
+    from langchain_ibm.chat_models import ChatWatsonx
+    from langchain_ibm.embeddings import WatsonxEmbeddings
+    from langchain_ibm.llms import WatsonxLLM
+
+# the classes are imported on first access, so that e.g. using only the
+# embeddings does not import the chat model and its dependencies
+_module_lookup = {
+    "ChatWatsonx": "langchain_ibm.chat_models",
+    "WatsonxEmbeddings": "langchain_ibm.embeddings",
+    "WatsonxLLM": "langchain_ibm.llms",
+}
+
+
+def __getattr__(name: str) -> Any:
+    if name in _module_lookup:
+        module = importlib.import_module(_module_lookup[name])
+        return getattr(module, name)
+    raise AttributeError(f"module {__name__} has no attribute {name}")
+
 
 __all__ = ["WatsonxLLM", "WatsonxEmbeddings", "ChatWatsonx"]
@@ -0,0 +1,611 @@
+"""Caches for IBM watsonx.ai integrations."""
+
+import hashlib
+import json
+import math
+import sqlite3
+import threading
+import time
+from array import array
+from collections import OrderedDict
+from typing import Any, Dict, Iterator, List, Optional, Sequence, Tuple
+
+from langchain_core.embeddings import Embeddings
+from langchain_core.stores import BaseStore
+
+from langchain_ibm.utils import _import_numpy
+
+
+def embedding_cache_namespace(model_id: str, params: Optional[Dict[str, Any]]) -> str:
+    """Return the cache namespace shared by all texts embedded with the same
+    model and parameters."""
+    identity = json.dumps(
+        {"model_id": model_id, "params": params or {}}, sort_keys=True, default=str
+    )
+    return hashlib.sha256(identity.encode("utf-8")).hexdigest()
+
+
+def embedding_cache_key(namespace: str, text: str) -> str:
+    """Return the cache key of a text within a namespace."""
+    return f"{namespace}:{hashlib.sha256(text.encode('utf-8')).hexdigest()}"
+
+
+class LRUEmbeddingCache(BaseStore[str, List[float]]):
+    """In-memory embedding cache with least-recently-used eviction.
+
+    Example:
+        .. code-block:: python
+
+            from langchain_ibm import WatsonxEmbeddings
+            from langchain_ibm.cache import LRUEmbeddingCache
+
+            watsonx_embedding = WatsonxEmbeddings(
+                model_id="ibm/slate-125m-english-rtrvr",
+                url="https://us-south.ml.cloud.ibm.com",
+                project_id="*****",
+                cache=LRUEmbeddingCache(maxsize=100_000),
+            )
+    """
+
+    def __init__(self, maxsize: Optional[int] = 10_000) -> None:
+        """Initialize the cache.
+
+        Args:
+            maxsize: Maximum number of vectors kept in memory. ``None`` disables
+                eviction.
+        """
+        self.maxsize = maxsize
+        self._store: "OrderedDict[str, List[float]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def mget(self, keys: Sequence[str]) -> List[Optional[List[float]]]:
+        values: List[Optional[List[float]]] = []
+        with self._lock:
+            for key in keys:
+                value = self._store.get(key)
+                if value is not None:
+                    self._store.move_to_end(key)
+                values.append(value)
+        return values
+
+    async def amget(self, keys: Sequence[str]) -> List[Optional[List[float]]]:
+        return self.mget(keys)
+
+    def mset(self, key_value_pairs: Sequence[Tuple[str, List[float]]]) -> None:
+        with self._lock:
+            for key, value in key_value_pairs:
+                self._store[key] = value
+                self._store.move_to_end(key)
+            if self.maxsize is not None:
+                while len(self._store) > self.maxsize:
+                    self._store.popitem(last=False)
+
+    async def amset(self, key_value_pairs: Sequence[Tuple[str, List[float]]]) -> None:
+        self.mset(key_value_pairs)
+
+    def mdelete(self, keys: Sequence[str]) -> None:
+        with self._lock:
+            for key in keys:
+                self._store.pop(key, None)
+
+    def yield_keys(self, *, prefix: Optional[str] = None) -> Iterator[str]:
+        with self._lock:
+            keys = list(self._store)
+        for key in keys:
+            if prefix is None or key.startswith(prefix):
+                yield key
+
+
+class SQLiteEmbeddingCache(BaseStore[str, List[float]]):
+    """Persistent embedding cache backed by a SQLite database.
+
+    Vectors are stored as packed float64 blobs, so cached embeddings are
+    returned bit-for-bit identical to the ones received from the service.
+    The database file is memory-mapped for reads.
+
+    Example:
+        .. code-block:: python
+
+            from langchain_ibm import WatsonxEmbeddings
+            from langchain_ibm.cache import SQLiteEmbeddingCache
+
+            watsonx_embedding = WatsonxEmbeddings(
+                model_id="ibm/slate-125m-english-rtrvr",
+                url="https://us-south.ml.cloud.ibm.com",
+                project_id="*****",
+                cache=SQLiteEmbeddingCache("embeddings.db"),
+            )
+    """
+
+    def __init__(self, database: str, mmap_size: int = 256 * 1024 * 1024) -> None:
+        """Initialize the cache.
+
+        Args:
+            database: Path to the SQLite database file, created if missing.
+            mmap_size: Maximum number of bytes of the database file to
+                memory-map.
+        """
+        self.database = database
+        self._lock = threading.Lock()
+        self._connection = sqlite3.connect(database, check_same_thread=False)
+        with self._lock, self._connection:
+            self._connection.execute(f"PRAGMA mmap_size = {int(mmap_size)}")
+            self._connection.execute("PRAGMA journal_mode = WAL")
+            self._connection.execute(
+                "CREATE TABLE IF NOT EXISTS embeddings "
+                "(key TEXT PRIMARY KEY, vector BLOB NOT NULL)"
+            )
+
+    def mget(self, keys: Sequence[str]) -> List[Optional[List[float]]]:
+        found: Dict[str, List[float]] = {}
+        with self._lock:
+            # stay well below SQLite's bound parameter limit
+            for i in range(0, len(keys), 500):
+                batch = keys[i : i + 500]
+                rows = self._connection.execute(
+                    "SELECT key, vector FROM embeddings WHERE key IN "
+                    f"({', '.join('?' * len(batch))})",
+                    batch,
+                )
+                for key, blob in rows:
+                    found[key] = array("d", blob).tolist()
+        return [found.get(key) for key in keys]
+
+    def mset(self, key_value_pairs: Sequence[Tuple[str, List[float]]]) -> None:
+        with self._lock, self._connection:
+            self._connection.executemany(
+                "INSERT OR REPLACE INTO embeddings (key, vector) VALUES (?, ?)",
+                [(key, array("d", value).tobytes()) for key, value in key_value_pairs],
+            )
+
+    def mdelete(self, keys: Sequence[str]) -> None:
+        with self._lock, self._connection:
+            self._connection.executemany(
+                "DELETE FROM embeddings WHERE key = ?", [(key,) for key in keys]
+            )
+
+    def yield_keys(self, *, prefix: Optional[str] = None) -> Iterator[str]:
+        with self._lock:
+            if prefix is None:
+                rows = self._connection.execute("SELECT key FROM embeddings")
+            else:
+                rows = self._connection.execute(
+                    "SELECT key FROM embeddings WHERE substr(key, 1, ?) = ?",
+                    (len(prefix), prefix),
+                )
+            keys = [key for (key,) in rows]
+        yield from keys
+
+    def close(self) -> None:
+        """Close the underlying database connection."""
+        with self._lock:
+            self._connection.close()
+
+
+def _normalize_params(value: Any) -> Any:
+    """Return ``value`` with enum members replaced by their values and unset
+    parameters dropped, so equivalent parameters serialize identically."""
+    if isinstance(value, dict):
+        return {
+            str(getattr(key, "value", key)).lower(): _normalize_params(item)
+            for key, item in value.items()
+            if item is not None
+        }
+    if isinstance(value, (list, tuple)):
+        return [_normalize_params(item) for item in value]
+    return getattr(value, "value", value)
+
+
+def generation_cache_namespace(
+    model_id: Optional[str],
+    deployment_id: Optional[str],
+    params: Optional[Dict[str, Any]],
+    **kwargs: Any,
+) -> Optional[str]:
+    """Return the cache namespace shared by all prompts generated with the same
+    model, parameters and request options.
+
+    Args:
+        model_id: ID of the model.
+        deployment_id: ID of the deployment.
+        params: Generation parameters of the request, including the model
+            defaults.
+        **kwargs: Other options of the request, e.g. guardrails.
+
+    Returns:
+        The namespace, or ``None`` if the request uses sampling, since its
+        result is not reproducible and must not be cached.
+    """
+    normalized = _normalize_params(params or {})
+    if normalized.get("decoding_method") == "sample":
+        return None
+    identity = json.dumps(
+        {
+            "model_id": model_id or "",
+            "deployment_id": deployment_id or "",
+            "params": normalized,
+            "options": _normalize_params(kwargs),
+        },
+        sort_keys=True,
+        default=str,
+    )
+    return hashlib.sha256(identity.encode("utf-8")).hexdigest()
+
+
+def generation_cache_key(namespace: str, prompt: str) -> str:
+    """Return the cache key of a fully rendered prompt within a namespace."""
+    return f"{namespace}:{hashlib.sha256(prompt.encode('utf-8')).hexdigest()}"
+
+
+class LRUGenerationCache(BaseStore[str, Dict[str, Any]]):
+    """In-memory cache of generation responses with least-recently-used
+    eviction and an optional time to live.
+
+    Only deterministic requests are cached; requests using sampling always
+    reach the service.
+
+    Example:
+        .. code-block:: python
+
+            from langchain_ibm import ChatWatsonx
+            from langchain_ibm.cache import LRUGenerationCache
+
+            chat = ChatWatsonx(
+                model_id="ibm/granite-13b-chat-v2",
+                url="https://us-south.ml.cloud.ibm.com",
+                project_id="*****",
+                generation_cache=LRUGenerationCache(maxsize=1_000, ttl=3600),
+            )
+    """
+
+    def __init__(
+        self, maxsize: Optional[int] = 1_000, ttl: Optional[float] = None
+    ) -> None:
+        """Initialize the cache.
+
+        Args:
+            maxsize: Maximum number of responses kept in memory. ``None``
+                disables eviction.
+            ttl: Seconds a response is served from the cache. ``None`` keeps
+                responses until they are evicted.
+        """
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._store: "OrderedDict[str, Tuple[float, Dict[str, Any]]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def mget(self, keys: Sequence[str]) -> List[Optional[Dict[str, Any]]]:
+        values: List[Optional[Dict[str, Any]]] = []
+        now = time.monotonic()
+        with self._lock:
+            for key in keys:
+                entry = self._store.get(key)
+                if entry is not None and entry[0] <= now:
+                    del self._store[key]
+                    entry = None
+                if entry is not None:
+                    self._store.move_to_end(key)
+                values.append(entry[1] if entry is not None else None)
+        return values
+
+    async def amget(self, keys: Sequence[str]) -> List[Optional[Dict[str, Any]]]:
+        return self.mget(keys)
+
+    def mset(self, key_value_pairs: Sequence[Tuple[str, Dict[str, Any]]]) -> None:
+        expires = time.monotonic() + self.ttl if self.ttl is not None else math.inf
+        with self._lock:
+            for key, value in key_value_pairs:
+                self._store[key] = (expires, value)
+                self._store.move_to_end(key)
+            if self.maxsize is not None:
+                while len(self._store) > self.maxsize:
+                    self._store.popitem(last=False)
+
+    async def amset(
+        self, key_value_pairs: Sequence[Tuple[str, Dict[str, Any]]]
+    ) -> None:
+        self.mset(key_value_pairs)
+
+    def mdelete(self, keys: Sequence[str]) -> None:
+        with self._lock:
+            for key in keys:
+                self._store.pop(key, None)
+
+    def yield_keys(self, *, prefix: Optional[str] = None) -> Iterator[str]:
+        with self._lock:
+            keys = list(self._store)
+        for key in keys:
+            if prefix is None or key.startswith(prefix):
+                yield key
+
+
+class SQLiteGenerationCache(BaseStore[str, Dict[str, Any]]):
+    """Persistent cache of generation responses backed by a SQLite database,
+    with an optional time to live.
+
+    Example:
+        .. code-block:: python
+
+            from langchain_ibm import WatsonxLLM
+            from langchain_ibm.cache import SQLiteGenerationCache
+
+            watsonx_llm = WatsonxLLM(
+                model_id="google/flan-ul2",
+                url="https://us-south.ml.cloud.ibm.com",
+                project_id="*****",
+                generation_cache=SQLiteGenerationCache("generations.db", ttl=86400),
+            )
+    """
+
+    def __init__(self, database: str, ttl: Optional[float] = None) -> None:
+        """Initialize the cache.
+
+        Args:
+            database: Path to the SQLite database file, created if missing.
+            ttl: Seconds a response is served from the cache. ``None`` keeps
+                responses until they are deleted.
+        """
+        self.database = database
+        self.ttl = ttl
+        self._lock = threading.Lock()
+        self._connection = sqlite3.connect(database, check_same_thread=False)
+        with self._lock, self._connection:
+            self._connection.execute("PRAGMA journal_mode = WAL")
+            self._connection.execute(
+                "CREATE TABLE IF NOT EXISTS generations "
+                "(key TEXT PRIMARY KEY, response TEXT NOT NULL, expires REAL)"
+            )
+
+    def mget(self, keys: Sequence[str]) -> List[Optional[Dict[str, Any]]]:
+        found: Dict[str, Dict[str, Any]] = {}
+        now = time.time()
+        with self._lock:
+            # stay well below SQLite's bound parameter limit
+            for i in range(0, len(keys), 500):
+                batch = keys[i : i + 500]
+                rows = self._connection.execute(
+                    "SELECT key, response FROM generations WHERE key IN "
+                    f"({', '.join('?' * len(batch))}) "
+                    "AND (expires IS NULL OR expires > ?)",
+                    [*batch, now],
+                )
+                for key, response in rows:
+                    found[key] = json.loads(response)
+        return [found.get(key) for key in keys]
+
+    def mset(self, key_value_pairs: Sequence[Tuple[str, Dict[str, Any]]]) -> None:
+        expires = time.time() + self.ttl if self.ttl is not None else None
+        with self._lock, self._connection:
+            self._connection.executemany(
+                "INSERT OR REPLACE INTO generations (key, response, expires) "
+                "VALUES (?, ?, ?)",
+                [
+                    (key, json.dumps(value, default=str), expires)
+                    for key, value in key_value_pairs
+                ],
+            )
+
+    def mdelete(self, keys: Sequence[str]) -> None:
+        with self._lock, self._connection:
+            self._connection.executemany(
+                "DELETE FROM generations WHERE key = ?", [(key,) for key in keys]
+            )
+
+    def yield_keys(self, *, prefix: Optional[str] = None) -> Iterator[str]:
+        with self._lock:
+            if prefix is None:
+                rows = self._connection.execute("SELECT key FROM generations")
+            else:
+                rows = self._connection.execute(
+                    "SELECT key FROM generations WHERE substr(key, 1, ?) = ?",
+                    (len(prefix), prefix),
+                )
+            keys = [key for (key,) in rows]
+        yield from keys
+
+    def purge_expired(self) -> None:
+        """Delete the expired responses from the database."""
+        with self._lock, self._connection:
+            self._connection.execute(
+                "DELETE FROM generations WHERE expires <= ?", (time.time(),)
+            )
+
+    def close(self) -> None:
+        """Close the underlying database connection."""
+        with self._lock:
+            self._connection.close()
+
+
+class _VectorIndex:
+    """Brute-force cosine similarity index over unit-length NumPy vectors."""
+
+    def __init__(self, dim: int) -> None:
+        np = _import_numpy()
+        self.size = 0
+        self.vectors = np.empty((16, dim), dtype=np.float32)
+        self.expires = np.empty(16, dtype=np.float64)
+        self.used = np.empty(16, dtype=np.float64)
+        self.responses: List[Dict[str, Any]] = []
+
+    def search(self, vector: Any, now: float) -> Tuple[int, float]:
+        """Return the row of the most similar live vector and its similarity."""
+        np = _import_numpy()
+        similarities = self.vectors[: self.size] @ vector
+        similarities[self.expires[: self.size] <= now] = -np.inf
+        row = int(np.argmax(similarities))
+        return row, float(similarities[row])
+
+    def add(
+        self,
+        vector: Any,
+        response: Dict[str, Any],
+        expires: float,
+        now: float,
+        maxsize: Optional[int],
+    ) -> None:
+        """Add a vector, replacing an expired or the least recently used one
+        once ``maxsize`` vectors are held."""
+        np = _import_numpy()
+        if maxsize is not None and self.size >= maxsize:
+            # expired rows sort before any live one
+            used = np.where(
+                self.expires[: self.size] <= now, -np.inf, self.used[: self.size]
+            )
+            row = int(np.argmin(used))
+            self.responses[row] = response
+        else:
+            if self.size == len(self.vectors):
+                capacity = 2 * self.size
+                self.vectors = np.resize(
+                    self.vectors, (capacity, self.vectors.shape[1])
+                )
+                self.expires = np.resize(self.expires, capacity)
+                self.used = np.resize(self.used, capacity)
+            row = self.size
+            self.size += 1
+            self.responses.append(response)
+        self.vectors[row] = vector
+        self.expires[row] = expires
+        self.used[row] = now
+
+
+class SemanticGenerationCache:
+    """In-memory cache of generation responses looked up by the meaning of the
+    prompt rather than its exact text.
+
+    Prompts are embedded with ``embeddings`` and compared by cosine
+    similarity against the prompts cached in the same namespace, i.e. with
+    the same model, parameters and conversation context. The response of the
+    most similar prompt is returned if its similarity reaches
+    ``similarity_threshold``. Requires ``numpy``.
+
+    Example:
+        .. code-block:: python
+
+            from langchain_ibm import ChatWatsonx, WatsonxEmbeddings
+            from langchain_ibm.cache import SemanticGenerationCache
+
+            embeddings = WatsonxEmbeddings(
+                model_id="ibm/slate-125m-english-rtrvr",
+                url="https://us-south.ml.cloud.ibm.com",
+                project_id="*****",
+            )
+            chat = ChatWatsonx(
+                model_id="ibm/granite-13b-chat-v2",
+                url="https://us-south.ml.cloud.ibm.com",
+                project_id="*****",
+                semantic_cache=SemanticGenerationCache(
+                    embeddings, similarity_threshold=0.95
+                ),
+            )
+    """
+
+    def __init__(
+        self,
+        embeddings: Embeddings,
+        similarity_threshold: float = 0.95,
+        maxsize: Optional[int] = 1_000,
+        ttl: Optional[float] = None,
+        max_namespaces: Optional[int] = 128,
+    ) -> None:
+        """Initialize the cache.
+
+        Args:
+            embeddings: Embedding model the prompts are embedded with, e.g.
+                ``WatsonxEmbeddings``.
+            similarity_threshold: Minimum cosine similarity between two prompts
+                for them to share a response.
+            maxsize: Maximum number of responses kept per namespace, evicting
+                the least recently used. ``None`` disables eviction.
+            ttl: Seconds a response is served from the cache. ``None`` keeps
+                responses until they are evicted.
+            max_namespaces: Maximum number of namespaces kept, evicting the
+                least recently used with all their responses. ``None``
+                disables eviction.
+        """
+        _import_numpy()
+        self.embeddings = embeddings
+        self.similarity_threshold = similarity_threshold
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.max_namespaces = max_namespaces
+        self._indexes: "OrderedDict[str, _VectorIndex]" = OrderedDict()
+        # vectors of the prompts last looked up, reused when caching their
+        # responses instead of embedding the prompts again
+        self._vectors: "OrderedDict[str, Any]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def _normalize(embedding: List[float]) -> Any:
+        np = _import_numpy()
+        vector = np.asarray(embedding, dtype=np.float32)
+        norm = np.linalg.norm(vector)
+        return vector / norm if norm else vector
+
+    def _search(
+        self, namespace: str, prompt: str, vector: Any
+    ) -> Optional[Dict[str, Any]]:
+        now = time.monotonic()
+        with self._lock:
+            self._vectors[prompt] = vector
+            while len(self._vectors) > 128:
+                self._vectors.popitem(last=False)
+            index = self._indexes.get(namespace)
+            if index is None or not index.size:
+                return None
+            self._indexes.move_to_end(namespace)
+            row, similarity = index.search(vector, now)
+            if similarity < self.similarity_threshold:
+                return None
+            index.used[row] = now
+            return index.responses[row]
+
+    def lookup(self, namespace: str, prompt: str) -> Optional[Dict[str, Any]]:
+        """Return the cached response of the prompt most similar to ``prompt``,
+        or ``None`` if no cached prompt is similar enough."""
+        vector = self._normalize(self.embeddings.embed_query(prompt))
+        return self._search(namespace, prompt, vector)
+
+    async def alookup(self, namespace: str, prompt: str) -> Optional[Dict[str, Any]]:
+        """Asynchronously return the cached response of the prompt most similar
+        to ``prompt``, or ``None`` if no cached prompt is similar enough."""
+        vector = self._normalize(await self.embeddings.aembed_query(prompt))
+        return self._search(namespace, prompt, vector)
+
+    def _add(self, namespace: str, vector: Any, response: Dict[str, Any]) -> None:
+        now = time.monotonic()
+        expires = now + self.ttl if self.ttl is not None else math.inf
+        with self._lock:
+            index = self._indexes.get(namespace)
+            if index is None:
+                index = self._indexes[namespace] = _VectorIndex(len(vector))
+                if self.max_namespaces is not None:
+                    while len(self._indexes) > self.max_namespaces:
+                        self._indexes.popitem(last=False)
+            else:
+                self._indexes.move_to_end(namespace)
+            index.add(vector, response, expires, now, self.maxsize)
+
+    def update(self, namespace: str, prompt: str, response: Dict[str, Any]) -> None:
+        """Cache the response generated for ``prompt``."""
+        with self._lock:
+            vector = self._vectors.pop(prompt, None)
+        if vector is None:
+            vector = self._normalize(self.embeddings.embed_query(prompt))
+        self._add(namespace, vector, response)
+
+    async def aupdate(
+        self, namespace: str, prompt: str, response: Dict[str, Any]
+    ) -> None:
+        """Asynchronously cache the response generated for ``prompt``."""
+        with self._lock:
+            vector = self._vectors.pop(prompt, None)
+        if vector is None:
+            vector = self._normalize(await self.embeddings.aembed_query(prompt))
+        self._add(namespace, vector, response)
+
+    def clear(self) -> None:
+        """Remove all cached responses."""
+        with self._lock:
+            self._indexes.clear()
+            self._vectors.clear()
@@ -3,10 +3,13 @@
 import json
 import logging
 import os
+from contextlib import aclosing, closing
 from datetime import datetime
 from operator import itemgetter
 from typing import (
+    TYPE_CHECKING,
     Any,
+    AsyncIterator,
     Callable,
     Dict,
     Iterator,
@@ -22,13 +25,16 @@ from typing import (
     cast,
 )
 
-from ibm_watsonx_ai import Credentials  # type: ignore
-from ibm_watsonx_ai.foundation_models import ModelInference  # type: ignore
-from langchain_core.callbacks import CallbackManagerForLLMRun
+import httpx
+from langchain_core.callbacks import (
+    AsyncCallbackManagerForLLMRun,
+    CallbackManagerForLLMRun,
+)
 from langchain_core.language_models import LanguageModelInput
 from langchain_core.language_models.chat_models import (
     BaseChatModel,
     LangSmithParams,
+    agenerate_from_stream,
     generate_from_stream,
 )
 from langchain_core.messages import (
@@ -48,28 +54,114 @@ from langchain_core.messages import (
     ToolCall,
     ToolMessage,
     ToolMessageChunk,
-    convert_to_messages,
-)
-from langchain_core.output_parsers import JsonOutputParser, PydanticOutputParser
-from langchain_core.output_parsers.base import OutputParserLike
-from langchain_core.output_parsers.openai_tools import (
-    JsonOutputKeyToolsParser,
-    PydanticToolsParser,
 )
 from langchain_core.outputs import ChatGeneration, ChatGenerationChunk, ChatResult
-from langchain_core.prompt_values import ChatPromptValue
-from langchain_core.pydantic_v1 import BaseModel, Field, SecretStr, root_validator
+from langchain_core.pydantic_v1 import (
+    BaseModel,
+    Field,
+    PrivateAttr,
+    SecretStr,
+    root_validator,
+)
 from langchain_core.runnables import Runnable, RunnableMap, RunnablePassthrough
-from langchain_core.tools import BaseTool
+from langchain_core.stores import BaseStore
 from langchain_core.utils import convert_to_secret_str, get_from_dict_or_env
 from langchain_core.utils.function_calling import (
     convert_to_openai_function,
     convert_to_openai_tool,
 )
 
+from langchain_ibm.cache import (
+    SemanticGenerationCache,
+    generation_cache_key,
+    generation_cache_namespace,
+)
+from langchain_ibm.chat_templates import IncrementalChatRenderer, get_chat_template
+from langchain_ibm.tool_parsing import (
+    FINAL_ANSWER,
+    ToolCallStreamParser,
+    final_answer_output,
+    iter_json_blocks,
+)
+from langchain_ibm.utils import (
+    AdaptiveConcurrencyLimiter,
+    RetryPolicy,
+    StreamMetrics,
+    _report_stream_metrics,
+    agenerate,
+    agenerate_stream,
+    configure_http_session,
+    generate,
+    generate_stream,
+    get_api_client,
+    get_async_http_client,
+    model_init_lock,
+)
+
+if TYPE_CHECKING:
+    # imported on first use, as importing them takes a while
+    from ibm_watsonx_ai.foundation_models import ModelInference  # type: ignore
+    from langchain_core.output_parsers.base import OutputParserLike
+    from langchain_core.tools import BaseTool
+
 logger = logging.getLogger(__name__)
 
 
+# the function-calling prompt wrapped around the conversation when tools are
+# bound, with the JSON schema of the first tool between its header and the
+# instructions
+_TOOLS_PROMPT_HEADER = """
+You are Mixtral Chat function calling, an AI language model developed by Mistral AI. 
+You are a cautious assistant. You carefully follow instructions. You are helpful and 
+harmless and you follow ethical guidelines and promote positive behavior. Here are a 
+few of the tools available to you:
+[AVAILABLE_TOOLS]
+"""
+
+_TOOLS_PROMPT_INSTRUCTIONS = """
+[/AVAILABLE_TOOLS]
+To use these tools you must always respond in JSON format containing `"type"` and 
+`"function"` key-value pairs. Also `"function"` key-value pair always containing 
+`"name"` and `"arguments"` key-value pairs. For example, to answer the question, 
+"What is a length of word think?" you must use the get_word_length tool like so:
+
+```json
+{
+    "type": "function",
+    "function": {
+        "name": "get_word_length",
+        "arguments": {
+            "word": "think"
+        }
+    }
+}
+```
+</endoftext>
+
+Remember, even when answering to the user, you must still use this JSON format! 
+If you'd like to ask how the user is doing you must write:
+
+```json
+{
+    "type": "function",
+    "function": {
+        "name": "Final Answer",
+        "arguments": {
+            "output": "How are you today?"
+        }
+    }
+}
+```
+</endoftext>
+
+Remember to end your response with '</endoftext>'
+
+"""
+
+_TOOLS_PROMPT_REMINDER = """
+(reminder to respond in a JSON blob no matter what and use tools only if necessary)"""
+
+
 def _convert_dict_to_message(_dict: Mapping[str, Any], call_id: str) -> BaseMessage:
     """Convert a dictionary to a LangChain message.
 
@@ -87,35 +179,42 @@ def _convert_dict_to_message(_dict: Mapping[str, Any], call_id: str) -> BaseMess
         additional_kwargs: Dict = {}
         tool_calls = []
         invalid_tool_calls: List[InvalidToolCall] = []
-        content = ""
-
-        raw_tool_calls = _dict.get("generated_text", "")
-
-        if "json" in raw_tool_calls:
-            try:
-                split_raw_tool_calls = raw_tool_calls.split("\n\n")
-                for raw_tool_call in split_raw_tool_calls:
-                    if "json" in raw_tool_call:
-                        json_parts = JsonOutputParser().parse(raw_tool_call)
-
-                        if json_parts["function"]["name"] == "Final Answer":
-                            content = json_parts["function"]["arguments"]["output"]
-                            break
-
-                        additional_kwargs["tool_calls"] = json_parts
-
-                        parsed = {
-                            "name": json_parts["function"]["name"] or "",
-                            "args": json_parts["function"]["arguments"] or {},
-                            "id": call_id,
-                        }
-                        tool_calls.append(parsed)
-
-            except:  # noqa: E722
-                content = _dict.get("generated_text", "") or ""
+        content: Optional[str] = None
+
+        generated_text = _dict.get("generated_text", "") or ""
+        for raw_tool_call, json_parts, error in iter_json_blocks(generated_text):
+            name = None
+            if error is None:
+                function = (
+                    json_parts.get("function") if isinstance(json_parts, dict) else None
+                )
+                if not isinstance(function, dict):
+                    # JSON generated as part of the answer
+                    continue
+                name = function.get("name")
+                arguments = function.get("arguments") or {}
+                if name == FINAL_ANSWER:
+                    content = final_answer_output(arguments)
+                    break
+                if not name or not isinstance(name, str):
+                    error = "Missing function name."
+                elif not isinstance(arguments, dict):
+                    error = "Function arguments are not a JSON object."
+                else:
+                    additional_kwargs["tool_calls"] = json_parts
+                    tool_calls.append({"name": name, "args": arguments, "id": call_id})
+                    continue
+            invalid_tool_calls.append(
+                InvalidToolCall(
+                    name=name if isinstance(name, str) else None,
+                    args=raw_tool_call,
+                    id=call_id,
+                    error=error,
+                )
+            )
 
-        else:
-            content = _dict.get("generated_text", "") or ""
+        if content is None:
+            content = "" if tool_calls else generated_text
 
         return AIMessage(
             content=content,
@@ -372,7 +471,71 @@ class ChatWatsonx(BaseChatModel):
     streaming: bool = False
     """ Whether to stream the results or not. """
 
-    watsonx_model: ModelInference = Field(default=None, exclude=True)  #: :meta private:
+    max_connections: Optional[int] = None
+    """Maximum number of pooled HTTP connections to the service."""
+
+    keepalive_expiry: Optional[float] = None
+    """Seconds an idle pooled connection is kept open for reuse by
+    asynchronous requests."""
+
+    http2: bool = False
+    """Whether asynchronous requests negotiate HTTP/2.
+    Requires the ``h2`` package."""
+
+    timeout: Optional[float] = None
+    """Timeout in seconds of a single HTTP request."""
+
+    max_retries: int = 3
+    """Maximum number of retries of a throttled or failed request."""
+
+    retry_policy: Optional[RetryPolicy] = Field(default=None, exclude=True)
+    """Policy for retrying throttled and failed requests with a jittered
+    exponential backoff, honouring ``Retry-After``. Created from
+    ``max_retries`` if not given."""
+
+    concurrency_limiter: Optional[AdaptiveConcurrencyLimiter] = Field(
+        default=None, exclude=True
+    )
+    """Adaptive concurrency limiter applied to every request, lowering the
+    number of requests in flight while the service throttles them. Pass the
+    same instance to several models to adapt them together."""
+
+    generation_cache: Optional[BaseStore] = Field(default=None, exclude=True)
+    """Optional store of previous generation responses, e.g.
+    ``langchain_ibm.cache.LRUGenerationCache`` or
+    ``langchain_ibm.cache.SQLiteGenerationCache``. Entries are keyed by the
+    rendered chat prompt, ``model_id``, ``deployment_id`` and the normalized
+    parameters. Requests using sampling and streamed requests bypass the
+    cache."""
+
+    semantic_cache: Optional[SemanticGenerationCache] = Field(
+        default=None, exclude=True
+    )
+    """Optional ``langchain_ibm.cache.SemanticGenerationCache`` answering
+    requests whose last message is similar enough to one answered before, in
+    the same conversation context. Consulted after ``generation_cache``;
+    requests using sampling and streamed requests bypass it."""
+
+    stream_metrics_callback: Optional[Callable[[StreamMetrics], Any]] = Field(
+        default=None, exclude=True
+    )
+    """Optional function called with the ``StreamMetrics`` of every streamed
+    generation once it ended or was abandoned, e.g. to export the time to
+    first token to Prometheus or OpenTelemetry. The metrics of completed
+    streams are also added to the ``response_metadata`` of their last chunk,
+    under ``stream_metrics``."""
+
+    watsonx_model: Any = Field(default=None, exclude=True)  #: :meta private:
+
+    _prompt_renderer: IncrementalChatRenderer = PrivateAttr(
+        default_factory=lambda: IncrementalChatRenderer(_convert_message_to_dict)
+    )
+
+    # rendered tool prompts by the id of the bound tool they render, which is
+    # kept alive so that the id is not reused
+    _tool_prompts: Dict[int, Tuple[Dict[str, Any], str]] = PrivateAttr(
+        default_factory=dict
+    )
 
     class Config:
         """Configuration for this pydantic object."""
@@ -423,6 +586,9 @@ class ChatWatsonx(BaseChatModel):
     @root_validator(pre=False, skip_on_failure=True)
     def validate_environment(cls, values: Dict) -> Dict:
         """Validate that credentials and python package exists in environment."""
+        if values["retry_policy"] is None:
+            values["retry_policy"] = RetryPolicy(max_retries=values["max_retries"])
+
         values["url"] = convert_to_secret_str(
             get_from_dict_or_env(values, "url", "WATSONX_URL")
         )
@@ -469,37 +635,60 @@ class ChatWatsonx(BaseChatModel):
                 values["instance_id"] = convert_to_secret_str(
                     get_from_dict_or_env(values, "instance_id", "WATSONX_INSTANCE_ID")
                 )
-        credentials = Credentials(
-            url=values["url"].get_secret_value() if values["url"] else None,
-            api_key=values["apikey"].get_secret_value() if values["apikey"] else None,
-            token=values["token"].get_secret_value() if values["token"] else None,
-            password=(
-                values["password"].get_secret_value() if values["password"] else None
-            ),
-            username=(
-                values["username"].get_secret_value() if values["username"] else None
-            ),
-            instance_id=(
-                values["instance_id"].get_secret_value()
-                if values["instance_id"]
-                else None
-            ),
-            version=values["version"].get_secret_value() if values["version"] else None,
-            verify=values["verify"],
-        )
-
-        watsonx_chat = ModelInference(
-            model_id=values["model_id"],
-            deployment_id=values["deployment_id"],
-            credentials=credentials,
-            params=values["params"],
-            project_id=values["project_id"],
-            space_id=values["space_id"],
-        )
-        values["watsonx_model"] = watsonx_chat
 
         return values
 
+    def _get_watsonx_model(self) -> "ModelInference":
+        """Return the underlying ``ModelInference``, creating it on first use."""
+        if self.watsonx_model is not None:
+            return self.watsonx_model
+        from ibm_watsonx_ai import Credentials  # type: ignore
+        from ibm_watsonx_ai.foundation_models import ModelInference  # type: ignore
+
+        with model_init_lock:
+            if self.watsonx_model is not None:
+                return self.watsonx_model
+            credentials = Credentials(
+                url=self.url.get_secret_value() if self.url else None,
+                api_key=self.apikey.get_secret_value() if self.apikey else None,
+                token=self.token.get_secret_value() if self.token else None,
+                password=(self.password.get_secret_value() if self.password else None),
+                username=(self.username.get_secret_value() if self.username else None),
+                instance_id=(
+                    self.instance_id.get_secret_value() if self.instance_id else None
+                ),
+                version=self.version.get_secret_value() if self.version else None,
+                verify=self.verify,
+            )
+
+            watsonx_chat = ModelInference(
+                model_id=self.model_id,
+                deployment_id=self.deployment_id,
+                api_client=get_api_client(
+                    credentials,
+                    project_id=self.project_id,
+                    space_id=self.space_id,
+                ),
+                params=self.params,
+                project_id=self.project_id,
+                space_id=self.space_id,
+            )
+            configure_http_session(
+                watsonx_chat._inference._session,
+                max_connections=self.max_connections,
+                timeout=self.timeout,
+            )
+            self.watsonx_model = watsonx_chat
+        return watsonx_chat
+
+    def warmup(self) -> None:
+        """Create the underlying model and authenticate up front.
+
+        The model is otherwise created on first use, so calling this at
+        application startup keeps the first request fast.
+        """
+        self._get_watsonx_model()
+
     def _generate(
         self,
         messages: List[BaseMessage],
@@ -515,79 +704,86 @@ class ChatWatsonx(BaseChatModel):
             )
             return generate_from_stream(stream_iter)
 
-        message_dicts, params = self._create_message_dicts(messages, stop, **kwargs)
-        if message_dicts[-1].get("role") == "tool":
-            chat_prompt = (
-                "User: Please summarize given sentences into "
-                "JSON containing Final Answer: '"
-            )
-            for message in message_dicts:
-                if message["content"]:
-                    chat_prompt += message["content"] + "\n"
-            chat_prompt += "'"
-        else:
-            chat_prompt = self._create_chat_prompt(message_dicts)
-
-        tools = kwargs.get("tools")
-
-        if tools:
-            chat_prompt = f"""
-You are Mixtral Chat function calling, an AI language model developed by Mistral AI. 
-You are a cautious assistant. You carefully follow instructions. You are helpful and 
-harmless and you follow ethical guidelines and promote positive behavior. Here are a 
-few of the tools available to you:
-[AVAILABLE_TOOLS]
-{json.dumps(tools[0], indent=2)}
-[/AVAILABLE_TOOLS]
-To use these tools you must always respond in JSON format containing `"type"` and 
-`"function"` key-value pairs. Also `"function"` key-value pair always containing 
-`"name"` and `"arguments"` key-value pairs. For example, to answer the question, 
-"What is a length of word think?" you must use the get_word_length tool like so:
-
-```json
-{{
-    "type": "function",
-    "function": {{
-        "name": "get_word_length",
-        "arguments": {{
-            "word": "think"
-        }}
-    }}
-}}
-```
-</endoftext>
-
-Remember, even when answering to the user, you must still use this JSON format! 
-If you'd like to ask how the user is doing you must write:
-
-```json
-{{
-    "type": "function",
-    "function": {{
-        "name": "Final Answer",
-        "arguments": {{
-            "output": "How are you today?"
-        }}
-    }}
-}}
-```
-</endoftext>
-
-Remember to end your response with '</endoftext>'
-
-{chat_prompt}
-(reminder to respond in a JSON blob no matter what and use tools only if necessary)"""
-
-            params = params | {"stop_sequences": ["</endoftext>"]}
+        tool_options = {
+            "tools": kwargs.get("tools"),
+            "tool_choice": kwargs.get("tool_choice"),
+        }
+        chat_prompt, params, kwargs = self._prepare_chat_request(
+            messages, stop, **kwargs
+        )
+        cache_key = self._generation_cache_key(chat_prompt, params, **kwargs)
+        if self.generation_cache is not None and cache_key is not None:
+            cached = self.generation_cache.mget([cache_key])[0]
+            if cached is not None:
+                return self._create_chat_result(cached)
+        semantic_query = self._semantic_cache_query(
+            messages, params, **tool_options, **kwargs
+        )
+        if self.semantic_cache is not None and semantic_query is not None:
+            cached = self.semantic_cache.lookup(*semantic_query)
+            if cached is not None:
+                return self._create_chat_result(cached)
+        response = generate(
+            self._get_watsonx_model(),
+            chat_prompt,
+            params=params,
+            retry_policy=self.retry_policy,
+            concurrency_limiter=self.concurrency_limiter,
+            **kwargs,
+        )
+        if self.generation_cache is not None and cache_key is not None:
+            self.generation_cache.mset([(cache_key, response)])
+        if self.semantic_cache is not None and semantic_query is not None:
+            self.semantic_cache.update(*semantic_query, response)
+        return self._create_chat_result(response)
 
-        if "tools" in kwargs:
-            del kwargs["tools"]
-        if "tool_choice" in kwargs:
-            del kwargs["tool_choice"]
+    async def _agenerate(
+        self,
+        messages: List[BaseMessage],
+        stop: Optional[List[str]] = None,
+        run_manager: Optional[AsyncCallbackManagerForLLMRun] = None,
+        stream: Optional[bool] = None,
+        **kwargs: Any,
+    ) -> ChatResult:
+        should_stream = stream if stream is not None else self.streaming
+        if should_stream:
+            stream_iter = self._astream(
+                messages, stop=stop, run_manager=run_manager, **kwargs
+            )
+            return await agenerate_from_stream(stream_iter)
 
-        response = self.watsonx_model.generate(
-            prompt=chat_prompt, **(kwargs | {"params": params})
+        tool_options = {
+            "tools": kwargs.get("tools"),
+            "tool_choice": kwargs.get("tool_choice"),
+        }
+        chat_prompt, params, kwargs = self._prepare_chat_request(
+            messages, stop, **kwargs
         )
+        cache_key = self._generation_cache_key(chat_prompt, params, **kwargs)
+        if self.generation_cache is not None and cache_key is not None:
+            cached = (await self.generation_cache.amget([cache_key]))[0]
+            if cached is not None:
+                return self._create_chat_result(cached)
+        semantic_query = self._semantic_cache_query(
+            messages, params, **tool_options, **kwargs
+        )
+        if self.semantic_cache is not None and semantic_query is not None:
+            cached = await self.semantic_cache.alookup(*semantic_query)
+            if cached is not None:
+                return self._create_chat_result(cached)
+        response = await agenerate(
+            self._get_watsonx_model(),
+            chat_prompt,
+            params=params,
+            client=self._get_async_client(),
+            retry_policy=self.retry_policy,
+            concurrency_limiter=self.concurrency_limiter,
+            **kwargs,
+        )
+        if self.generation_cache is not None and cache_key is not None:
+            await self.generation_cache.amset([(cache_key, response)])
+        if self.semantic_cache is not None and semantic_query is not None:
+            await self.semantic_cache.aupdate(*semantic_query, response)
         return self._create_chat_result(response)
 
     def _stream(
@@ -597,139 +793,256 @@ Remember to end your response with '</endoftext>'
         run_manager: Optional[CallbackManagerForLLMRun] = None,
         **kwargs: Any,
     ) -> Iterator[ChatGenerationChunk]:
-        message_dicts, params = self._create_message_dicts(messages, stop, **kwargs)
+        tool_parser = ToolCallStreamParser() if kwargs.get("tools") else None
+        chat_prompt, params, kwargs = self._prepare_chat_request(
+            messages, stop, stream=True, **kwargs
+        )
+        metrics = StreamMetrics(self.model_id or self.deployment_id)
+        try:
+            with closing(
+                generate_stream(
+                    self._get_watsonx_model(),
+                    chat_prompt,
+                    params=params,
+                    retry_policy=self.retry_policy,
+                    concurrency_limiter=self.concurrency_limiter,
+                    **kwargs,
+                )
+            ) as stream:
+                for stream_resp in stream:
+                    metrics.record(stream_resp)
+                    chunk = self._stream_response_to_chat_generation_chunk(
+                        stream_resp, tool_parser
+                    )
+                    if chunk is None:
+                        continue
+                    if chunk.generation_info:
+                        # only the last chunk has a finish reason
+                        metrics.finish()
+                        chunk.generation_info["stream_metrics"] = metrics.to_dict()
+                    if run_manager:
+                        run_manager.on_llm_new_token(chunk.text, chunk=chunk)
+
+                    yield chunk
+            if tool_parser is not None:
+                chunk = self._flush_tool_calls(tool_parser)
+                if chunk is not None:
+                    if run_manager:
+                        run_manager.on_llm_new_token(chunk.text, chunk=chunk)
+                    yield chunk
+        finally:
+            _report_stream_metrics(metrics, self.stream_metrics_callback)
+
+    async def _astream(
+        self,
+        messages: List[BaseMessage],
+        stop: Optional[List[str]] = None,
+        run_manager: Optional[AsyncCallbackManagerForLLMRun] = None,
+        **kwargs: Any,
+    ) -> AsyncIterator[ChatGenerationChunk]:
+        tool_parser = ToolCallStreamParser() if kwargs.get("tools") else None
+        chat_prompt, params, kwargs = self._prepare_chat_request(
+            messages, stop, stream=True, **kwargs
+        )
+        metrics = StreamMetrics(self.model_id or self.deployment_id)
+        try:
+            async with aclosing(
+                agenerate_stream(
+                    self._get_watsonx_model(),
+                    chat_prompt,
+                    params=params,
+                    client=self._get_async_client(),
+                    retry_policy=self.retry_policy,
+                    concurrency_limiter=self.concurrency_limiter,
+                    **kwargs,
+                )
+            ) as stream:
+                async for stream_resp in stream:
+                    metrics.record(stream_resp)
+                    chunk = self._stream_response_to_chat_generation_chunk(
+                        stream_resp, tool_parser
+                    )
+                    if chunk is None:
+                        continue
+                    if chunk.generation_info:
+                        # only the last chunk has a finish reason
+                        metrics.finish()
+                        chunk.generation_info["stream_metrics"] = metrics.to_dict()
+                    if run_manager:
+                        await run_manager.on_llm_new_token(chunk.text, chunk=chunk)
+
+                    yield chunk
+            if tool_parser is not None:
+                chunk = self._flush_tool_calls(tool_parser)
+                if chunk is not None:
+                    if run_manager:
+                        await run_manager.on_llm_new_token(chunk.text, chunk=chunk)
+                    yield chunk
+        finally:
+            _report_stream_metrics(metrics, self.stream_metrics_callback)
+
+    def _get_async_client(self) -> httpx.AsyncClient:
+        return get_async_http_client(
+            max_connections=self.max_connections,
+            keepalive_expiry=self.keepalive_expiry,
+            http2=self.http2,
+            timeout=self.timeout,
+        )
+
+    def _generation_cache_key(
+        self, chat_prompt: str, params: Dict[str, Any], **kwargs: Any
+    ) -> Optional[str]:
+        if self.generation_cache is None:
+            return None
+        namespace = generation_cache_namespace(
+            self.model_id, self.deployment_id, params, **kwargs
+        )
+        return (
+            generation_cache_key(namespace, chat_prompt)
+            if namespace is not None
+            else None
+        )
+
+    def _semantic_cache_query(
+        self, messages: List[BaseMessage], params: Dict[str, Any], **kwargs: Any
+    ) -> Optional[Tuple[str, str]]:
+        """Return the namespace and text a request is looked up by in the
+        semantic cache: the last message, in the context of the previous ones."""
+        if self.semantic_cache is None or not messages:
+            return None
+        message_dicts, _ = self._prompt_renderer.render(
+            get_chat_template(self.model_id), messages
+        )
+        namespace = generation_cache_namespace(
+            self.model_id,
+            self.deployment_id,
+            params,
+            context=message_dicts[:-1],
+            role=message_dicts[-1]["role"],
+            **kwargs,
+        )
+        if namespace is None:
+            return None
+        return namespace, message_dicts[-1].get("content") or ""
+
+    def _tools_prompt(self, tool: Dict[str, Any]) -> str:
+        """Return the function-calling prompt preceding the conversation.
+
+        Tools are bound once and sent with every request, so the prompt is
+        rendered once per bound tool.
+        """
+        cached = self._tool_prompts.get(id(tool))
+        if cached is None or cached[0] is not tool:
+            cached = (
+                tool,
+                "".join(
+                    [
+                        _TOOLS_PROMPT_HEADER,
+                        json.dumps(tool, indent=2),
+                        _TOOLS_PROMPT_INSTRUCTIONS,
+                    ]
+                ),
+            )
+            self._tool_prompts[id(tool)] = cached
+            while len(self._tool_prompts) > 16:
+                self._tool_prompts.pop(next(iter(self._tool_prompts)), None)
+        return cached[1]
+
+    def _prepare_chat_request(
+        self,
+        messages: List[BaseMessage],
+        stop: Optional[List[str]] = None,
+        stream: bool = False,
+        **kwargs: Any,
+    ) -> Tuple[str, Dict[str, Any], Dict[str, Any]]:
+        """Render the prompt and parameters shared by all generation paths.
+
+        Returns the chat prompt, the generation parameters and the remaining
+        keyword arguments to pass to the inference call.
+        """
+        params = self._create_params(stop, **kwargs)
+        tools = kwargs.get("tools")
+        template = get_chat_template(self.model_id)
+        if tools and template.bos:
+            # the conversation follows the function-calling prompt, so formats
+            # starting the prompt with a BOS token fall back to the generic one
+            template = get_chat_template(None)
+        message_dicts, chat_prompt = self._prompt_renderer.render(template, messages)
         if message_dicts[-1].get("role") == "tool":
             chat_prompt = (
-                "User: Please summarize given sentences into JSON "
-                "containing Final Answer: '"
+                "User: Please summarize given sentences into "
+                "JSON containing Final Answer: '"
             )
             for message in message_dicts:
                 if message["content"]:
                     chat_prompt += message["content"] + "\n"
             chat_prompt += "'"
-        else:
-            chat_prompt = self._create_chat_prompt(message_dicts)
-
-        tools = kwargs.get("tools")
 
         if tools:
-            chat_prompt = f"""
-You are Mixtral Chat function calling, an AI language model developed by Mistral AI. 
-You are a cautious assistant. You carefully follow instructions. You are helpful and 
-harmless and you follow ethical guidelines and promote positive behavior. Here are a 
-few of the tools available to you:
-[AVAILABLE_TOOLS]
-{json.dumps(tools[0], indent=2)}
-[/AVAILABLE_TOOLS]
-To use these tools you must always respond in JSON format containing `"type"` and 
-`"function"` key-value pairs. Also `"function"` key-value pair always containing 
-`"name"` and `"arguments"` key-value pairs. For example, to answer the question, 
-"What is a length of word think?" you must use the get_word_length tool like so:
-
-```json
-{{
-    "type": "function",
-    "function": {{
-        "name": "get_word_length",
-        "arguments": {{
-            "word": "think"
-        }}
-    }}
-}}
-```
-</endoftext>
-
-Remember, even when answering to the user, you must still use this JSON format! 
-If you'd like to ask how the user is doing you must write:
-
-```json
-{{
-    "type": "function",
-    "function": {{
-        "name": "Final Answer",
-        "arguments": {{
-            "output": "How are you today?"
-        }}
-    }}
-}}
-```
-</endoftext>
-
-Remember to end your response with '</endoftext>'
-
-{chat_prompt[:-5]}
-(reminder to respond in a JSON blob no matter what and use tools only if necessary)"""
+            if stream:
+                # the reminder follows the last message, not the assistant turn
+                chat_prompt = chat_prompt.removesuffix(
+                    template.separator + template.generation_prompt
+                )
+            chat_prompt = "".join(
+                [self._tools_prompt(tools[0]), chat_prompt, _TOOLS_PROMPT_REMINDER]
+            )
 
             params = params | {"stop_sequences": ["</endoftext>"]}
 
-        if "tools" in kwargs:
-            del kwargs["tools"]
-        if "tool_choice" in kwargs:
-            del kwargs["tool_choice"]
+        kwargs.pop("params", None)
+        kwargs.pop("tools", None)
+        kwargs.pop("tool_choice", None)
 
-        default_chunk_class: Type[BaseMessageChunk] = AIMessageChunk
+        return chat_prompt, params, kwargs
 
-        for chunk in self.watsonx_model.generate_text_stream(
-            prompt=chat_prompt, raw_response=True, **(kwargs | {"params": params})
-        ):
-            if not isinstance(chunk, dict):
-                chunk = chunk.dict()
-            if len(chunk["results"]) == 0:
-                continue
-            choice = chunk["results"][0]
-
-            message_chunk = _convert_delta_to_message_chunk(choice, default_chunk_class)
-            generation_info = {}
-            if (finish_reason := choice.get("stop_reason")) != "not_finished":
-                generation_info["finish_reason"] = finish_reason
-            chunk = ChatGenerationChunk(
-                message=message_chunk, generation_info=generation_info or None
-            )
-            if run_manager:
-                run_manager.on_llm_new_token(chunk.text, chunk=chunk)
-
-            yield chunk
-
-    def _create_chat_prompt(self, messages: List[Dict[str, Any]]) -> str:
-        prompt = ""
-
-        if self.model_id in ["ibm/granite-13b-chat-v1", "ibm/granite-13b-chat-v2"]:
-            for message in messages:
-                if message["role"] == "system":
-                    prompt += "<|system|>\n" + message["content"] + "\n\n"
-                elif message["role"] == "assistant":
-                    prompt += "<|assistant|>\n" + message["content"] + "\n\n"
-                elif message["role"] == "function":
-                    prompt += "<|function|>\n" + message["content"] + "\n\n"
-                elif message["role"] == "tool":
-                    prompt += "<|tool|>\n" + message["content"] + "\n\n"
-                else:
-                    prompt += "<|user|>:\n" + message["content"] + "\n\n"
-
-            prompt += "<|assistant|>\n"
-
-        elif self.model_id in [
-            "meta-llama/llama-2-13b-chat",
-            "meta-llama/llama-2-70b-chat",
-        ]:
-            for message in messages:
-                if message["role"] == "system":
-                    prompt += "[INST] <<SYS>>\n" + message["content"] + "<</SYS>>\n\n"
-                elif message["role"] == "assistant":
-                    prompt += message["content"] + "\n[INST]\n\n"
-                else:
-                    prompt += message["content"] + "\n[/INST]\n"
+    def _stream_response_to_chat_generation_chunk(
+        self,
+        stream_response: Dict[str, Any],
+        tool_parser: Optional[ToolCallStreamParser] = None,
+    ) -> Optional[ChatGenerationChunk]:
+        """Convert a stream response to a chat generation chunk.
 
-        else:
-            prompt = ChatPromptValue(
-                messages=convert_to_messages(messages) + [AIMessage(content="")]
-            ).to_string()
+        With ``tool_parser``, the generated text is parsed for tool calls, so
+        that they are streamed as tool call chunks rather than content.
+        """
+        if len(stream_response["results"]) == 0:
+            return None
+        choice = stream_response["results"][0]
+
+        message_chunk = _convert_delta_to_message_chunk(choice, AIMessageChunk)
+        if tool_parser is not None:
+            content, tool_call_chunks = tool_parser.feed(
+                cast(str, message_chunk.content)
+            )
+            message_chunk = AIMessageChunk(
+                content=content,
+                id=message_chunk.id,
+                tool_call_chunks=tool_call_chunks,
+            )
+        generation_info = {}
+        if (finish_reason := choice.get("stop_reason")) != "not_finished":
+            generation_info["finish_reason"] = finish_reason
+        return ChatGenerationChunk(
+            message=message_chunk, generation_info=generation_info or None
+        )
 
-        return prompt
+    def _flush_tool_calls(
+        self, tool_parser: ToolCallStreamParser
+    ) -> Optional[ChatGenerationChunk]:
+        """Return the chunk left in ``tool_parser`` once the stream ended."""
+        content, tool_call_chunks = tool_parser.flush()
+        if not content and not tool_call_chunks:
+            return None
+        return ChatGenerationChunk(
+            message=AIMessageChunk(
+                content=content, id="sample_id", tool_call_chunks=tool_call_chunks
+            )
+        )
 
-    def _create_message_dicts(
-        self, messages: List[BaseMessage], stop: Optional[List[str]], **kwargs: Any
-    ) -> Tuple[List[Dict[str, Any]], Dict[str, Any]]:
+    def _create_params(
+        self, stop: Optional[List[str]], **kwargs: Any
+    ) -> Dict[str, Any]:
         params = {**self.params} if self.params else {}
         params = params | {**kwargs.get("params", {})}
         if stop is not None:
@@ -738,8 +1051,7 @@ Remember to end your response with '</endoftext>'
                     "`stop_sequences` found in both the input and default params."
                 )
             params = (params or {}) | {"stop_sequences": stop}
-        message_dicts = [_convert_message_to_dict(m) for m in messages]
-        return message_dicts, params
+        return params
 
     def _create_chat_result(self, response: Union[dict]) -> ChatResult:
         generations = []
@@ -786,7 +1098,9 @@ Remember to end your response with '</endoftext>'
 
     def bind_functions(
         self,
-        functions: Sequence[Union[Dict[str, Any], Type[BaseModel], Callable, BaseTool]],
+        functions: Sequence[
+            Union[Dict[str, Any], Type[BaseModel], Callable, "BaseTool"]
+        ],
         function_call: Optional[
             Union[_FunctionCall, str, Literal["auto", "none"]]
         ] = None,
@@ -838,7 +1152,7 @@ Remember to end your response with '</endoftext>'
 
     def bind_tools(
         self,
-        tools: Sequence[Union[Dict[str, Any], Type[BaseModel], Callable, BaseTool]],
+        tools: Sequence[Union[Dict[str, Any], Type[BaseModel], Callable, "BaseTool"]],
         **kwargs: Any,
     ) -> Runnable[LanguageModelInput, BaseMessage]:
         """Bind tool-like objects to this chat model.
@@ -1021,6 +1335,15 @@ Remember to end your response with '</endoftext>'
                 #     'parsing_error': None
                 # }
         """  # noqa: E501
+        from langchain_core.output_parsers import (
+            JsonOutputParser,
+            PydanticOutputParser,
+        )
+        from langchain_core.output_parsers.openai_tools import (
+            JsonOutputKeyToolsParser,
+            PydanticToolsParser,
+        )
+
         if kwargs:
             raise ValueError(f"Received unsupported arguments {kwargs}")
         is_pydantic_schema = _is_pydantic_class(schema)
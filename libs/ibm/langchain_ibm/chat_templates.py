@@ -0,0 +1,348 @@
+"""Chat prompt templates of the model families served by IBM watsonx.ai."""
+
+import threading
+from functools import lru_cache
+from typing import (
+    Any,
+    Callable,
+    Dict,
+    Iterable,
+    List,
+    Mapping,
+    Optional,
+    Sequence,
+    Tuple,
+)
+
+
+class ChatTemplate:
+    """Chat prompt format of a model family.
+
+    Every message is rendered as the text before its content, the content and
+    the text after it, as chosen by its role. Messages are separated by
+    ``separator`` and followed by ``generation_prompt``, which opens the turn
+    of the assistant. All pieces are collected first and joined once.
+
+    Example:
+        .. code-block:: python
+
+            from langchain_ibm.chat_templates import (
+                ChatTemplate,
+                register_chat_template,
+            )
+
+            register_chat_template(
+                ChatTemplate(
+                    roles={
+                        "system": ("<|system|>\\n", "\\n"),
+                        "user": ("<|user|>\\n", "\\n"),
+                        "assistant": ("<|assistant|>\\n", "\\n"),
+                    },
+                    generation_prompt="<|assistant|>\\n",
+                ),
+                model_ids=["my-org/my-chat-model"],
+            )
+    """
+
+    def __init__(
+        self,
+        roles: Mapping[str, Tuple[str, str]],
+        default_role: Optional[Tuple[str, str]] = None,
+        bos: str = "",
+        separator: str = "",
+        generation_prompt: str = "",
+    ) -> None:
+        """Initialize the template.
+
+        Args:
+            roles: Text rendered before and after the content of a message,
+                by message role.
+            default_role: Text rendered before and after the content of a
+                message with any other role. Such messages are rejected if
+                not given.
+            bos: Text rendered once before the first message.
+            separator: Text rendered between two messages and before
+                ``generation_prompt``.
+            generation_prompt: Text rendered after the last message.
+        """
+        self.roles = dict(roles)
+        self.default_role = default_role
+        self.bos = bos
+        self.separator = separator
+        self.generation_prompt = generation_prompt
+
+    def _message_pieces(self, message: Dict[str, Any]) -> Tuple[str, str, str]:
+        role = message.get("role")
+        affixes = self.roles.get(role, self.default_role)  # type: ignore[arg-type]
+        if affixes is None:
+            raise ValueError(
+                f"Unexpected message type: {role}. Use one of "
+                f"{', '.join(repr(name) for name in self.roles)}."
+            )
+        content = message.get("content") or ""
+        if not isinstance(content, str):
+            content = str(content)
+        return affixes[0], content, affixes[1]
+
+    def render_messages(self, messages: Iterable[Dict[str, Any]]) -> List[str]:
+        """Return the pieces of the given messages, without ``bos`` and
+        ``generation_prompt``."""
+        pieces: List[str] = []
+        for message in messages:
+            if pieces and self.separator:
+                pieces.append(self.separator)
+            pieces.extend(self._message_pieces(message))
+        return pieces
+
+    def render(self, messages: Iterable[Dict[str, Any]]) -> str:
+        """Render a conversation of message dictionaries into a prompt."""
+        pieces = self.render_messages(messages)
+        if pieces and self.separator:
+            pieces.append(self.separator)
+        return "".join([self.bos, *pieces, self.generation_prompt])
+
+
+_GRANITE_CHAT = ChatTemplate(
+    roles={
+        "system": ("<|system|>\n", "\n\n"),
+        "assistant": ("<|assistant|>\n", "\n\n"),
+        "function": ("<|function|>\n", "\n\n"),
+        "tool": ("<|tool|>\n", "\n\n"),
+    },
+    default_role=("<|user|>:\n", "\n\n"),
+    generation_prompt="<|assistant|>\n",
+)
+
+_LLAMA_2_CHAT = ChatTemplate(
+    roles={
+        "system": ("[INST] <<SYS>>\n", "<</SYS>>\n\n"),
+        "assistant": ("", "\n[INST]\n\n"),
+    },
+    default_role=("", "\n[/INST]\n"),
+)
+
+_LLAMA_3_CHAT = ChatTemplate(
+    roles={
+        role: (f"<|start_header_id|>{role}<|end_header_id|>\n\n", "<|eot_id|>")
+        for role in ("system", "user", "assistant", "ipython")
+    }
+    | {
+        role: ("<|start_header_id|>ipython<|end_header_id|>\n\n", "<|eot_id|>")
+        for role in ("function", "tool")
+    },
+    default_role=("<|start_header_id|>user<|end_header_id|>\n\n", "<|eot_id|>"),
+    bos="<|begin_of_text|>",
+    generation_prompt="<|start_header_id|>assistant<|end_header_id|>\n\n",
+)
+
+_MIXTRAL_CHAT = ChatTemplate(
+    roles={"assistant": (" ", "</s>")},
+    default_role=("[INST] ", " [/INST]"),
+    bos="<s>",
+)
+
+# the format of ``langchain_core.messages.get_buffer_string``, followed by an
+# empty AI turn
+_DEFAULT_CHAT = ChatTemplate(
+    roles={
+        "user": ("Human: ", ""),
+        "human": ("Human: ", ""),
+        "assistant": ("AI: ", ""),
+        "ai": ("AI: ", ""),
+        "system": ("System: ", ""),
+        "function": ("Function: ", ""),
+        "tool": ("Tool: ", ""),
+    },
+    separator="\n",
+    generation_prompt="AI: ",
+)
+
+_chat_templates: Dict[str, ChatTemplate] = {
+    "ibm/granite-13b-chat-v1": _GRANITE_CHAT,
+    "ibm/granite-13b-chat-v2": _GRANITE_CHAT,
+    "meta-llama/llama-2-13b-chat": _LLAMA_2_CHAT,
+    "meta-llama/llama-2-70b-chat": _LLAMA_2_CHAT,
+}
+
+# families matched by model ID prefix, after the exact model IDs above
+_chat_template_prefixes: List[Tuple[str, ChatTemplate]] = [
+    ("meta-llama/llama-3", _LLAMA_3_CHAT),
+    ("mistralai/mixtral-", _MIXTRAL_CHAT),
+    ("ibm-mistralai/mixtral-", _MIXTRAL_CHAT),
+]
+
+
+def register_chat_template(
+    template: ChatTemplate,
+    model_ids: Iterable[str] = (),
+    prefixes: Iterable[str] = (),
+) -> None:
+    """Use ``template`` for the given models.
+
+    Args:
+        template: The template to render the prompts of the models with.
+        model_ids: IDs of the models.
+        prefixes: Prefixes of the IDs of model families, checked after the
+            exact model IDs, most recently registered first.
+    """
+    for model_id in model_ids:
+        _chat_templates[model_id] = template
+    for prefix in prefixes:
+        _chat_template_prefixes.insert(0, (prefix, template))
+    get_chat_template.cache_clear()
+
+
+@lru_cache(maxsize=None)
+def get_chat_template(model_id: Optional[str]) -> ChatTemplate:
+    """Return the template rendering the chat prompts of a model."""
+    if model_id:
+        if model_id in _chat_templates:
+            return _chat_templates[model_id]
+        for prefix, template in _chat_template_prefixes:
+            if model_id.startswith(prefix):
+                return template
+    return _DEFAULT_CHAT
+
+
+def _fingerprint(message: Any) -> Tuple[Any, Any]:
+    """Return the type and content of a message, compared to tell whether a
+    message was edited since it was rendered."""
+    if isinstance(message, dict):
+        return message.get("role"), message.get("content")
+    return getattr(message, "type", None), getattr(message, "content", None)
+
+
+class _RenderedConversation:
+    """Messages rendered by a template, with where each one ends."""
+
+    def __init__(
+        self,
+        template: ChatTemplate,
+        messages: List[Any],
+        message_dicts: List[Dict[str, Any]],
+        text: str,
+        ends: List[int],
+    ) -> None:
+        self.template = template
+        self.messages = messages
+        self.fingerprints = [_fingerprint(message) for message in messages]
+        self.message_dicts = message_dicts
+        self.text = text
+        self.ends = ends
+
+    def shared_prefix(self, template: ChatTemplate, messages: Sequence[Any]) -> int:
+        """Return the number of leading messages shared with ``messages``."""
+        if template is not self.template:
+            return 0
+        shared = 0
+        for cached, (kind, content), message in zip(
+            self.messages, self.fingerprints, messages
+        ):
+            if cached is not message:
+                break
+            fingerprint = _fingerprint(message)
+            if fingerprint[0] != kind or fingerprint[1] is not content:
+                # edited in place since it was rendered
+                break
+            shared += 1
+        return shared
+
+
+class IncrementalChatRenderer:
+    """Renders growing conversations, reusing the work done for the messages
+    they share with the conversations rendered before.
+
+    Messages are matched by identity, so a conversation that is extended by
+    appending messages, as in agent loops, is converted and rendered only
+    for the new messages. A message whose type or content was reassigned
+    since it was rendered is rendered again; changes inside its content, like
+    appending to a list of content blocks, are not noticed. The rendered
+    conversations are kept in memory, at most ``maxsize`` of them, dropping
+    the least recently used.
+    """
+
+    def __init__(
+        self,
+        convert_message: Callable[[Any], Dict[str, Any]],
+        maxsize: int = 16,
+    ) -> None:
+        """Initialize the renderer.
+
+        Args:
+            convert_message: Function converting a message to the dictionary
+                rendered by the templates.
+            maxsize: Maximum number of conversations kept.
+        """
+        self.convert_message = convert_message
+        self.maxsize = maxsize
+        self._conversations: List[_RenderedConversation] = []
+        self._lock = threading.Lock()
+
+    def _longest_prefix(
+        self, template: ChatTemplate, messages: Sequence[Any]
+    ) -> Tuple[Optional[_RenderedConversation], int]:
+        best: Optional[_RenderedConversation] = None
+        best_shared = 0
+        with self._lock:
+            for conversation in self._conversations:
+                shared = conversation.shared_prefix(template, messages)
+                if shared > best_shared:
+                    best, best_shared = conversation, shared
+        return best, best_shared
+
+    def render(
+        self, template: ChatTemplate, messages: Sequence[Any]
+    ) -> Tuple[List[Dict[str, Any]], str]:
+        """Render a conversation.
+
+        Args:
+            template: The template to render the conversation with.
+            messages: The messages of the conversation.
+
+        Returns:
+            The message dictionaries and the rendered prompt.
+        """
+        cached, shared = self._longest_prefix(template, messages)
+        if cached is not None and shared:
+            message_dicts = cached.message_dicts[:shared]
+            ends = cached.ends[:shared]
+            parts = [cached.text[: ends[-1]]]
+            length = ends[-1]
+        else:
+            message_dicts, ends, parts, length = [], [], [], 0
+
+        for message in messages[shared:]:
+            message_dict = self.convert_message(message)
+            pieces = template._message_pieces(message_dict)
+            if message_dicts and template.separator:
+                parts.append(template.separator)
+                length += len(template.separator)
+            parts.extend(pieces)
+            length += sum(len(piece) for piece in pieces)
+            message_dicts.append(message_dict)
+            ends.append(length)
+        text = "".join(parts)
+
+        if shared < len(messages) or cached is None:
+            conversation = _RenderedConversation(
+                template, list(messages), message_dicts, text, ends
+            )
+            with self._lock:
+                if cached is not None and shared == len(cached.messages):
+                    # the conversation was extended, so its prefix is no
+                    # longer needed on its own
+                    try:
+                        self._conversations.remove(cached)
+                    except ValueError:
+                        pass
+                self._conversations.insert(0, conversation)
+                del self._conversations[self.maxsize :]
+        else:
+            with self._lock:
+                if cached in self._conversations:
+                    self._conversations.remove(cached)
+                    self._conversations.insert(0, cached)
+
+        separator = template.separator if message_dicts else ""
+        prompt = "".join([template.bos, text, separator, template.generation_prompt])
+        return list(message_dicts), prompt
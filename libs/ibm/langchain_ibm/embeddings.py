@@ -1,8 +1,24 @@
+import asyncio
 import os
-from typing import Dict, List, Optional, Union
+from collections import deque
+from concurrent.futures import Future, ThreadPoolExecutor
+from itertools import islice
+from typing import (
+    TYPE_CHECKING,
+    Any,
+    AsyncGenerator,
+    Deque,
+    Dict,
+    Iterable,
+    Iterator,
+    List,
+    Optional,
+    Tuple,
+    Union,
+    cast,
+)
 
-from ibm_watsonx_ai import APIClient, Credentials  # type: ignore
-from ibm_watsonx_ai.foundation_models.embeddings import Embeddings  # type: ignore
+import httpx
 from langchain_core.embeddings import Embeddings as LangChainEmbeddings
 from langchain_core.pydantic_v1 import (
     BaseModel,
@@ -11,8 +27,33 @@ from langchain_core.pydantic_v1 import (
     SecretStr,
     root_validator,
 )
+from langchain_core.stores import BaseStore
 from langchain_core.utils import convert_to_secret_str, get_from_dict_or_env
 
+from langchain_ibm.cache import embedding_cache_key, embedding_cache_namespace
+from langchain_ibm.utils import (
+    AdaptiveConcurrencyLimiter,
+    RetryPolicy,
+    _import_numpy,
+    aembed,
+    configure_http_session,
+    embed,
+    get_api_client,
+    get_async_http_client,
+    model_init_lock,
+)
+
+if TYPE_CHECKING:
+    import numpy as np
+
+    # ibm_watsonx_ai is imported on first use, as importing it takes a while
+    from ibm_watsonx_ai.foundation_models.embeddings import (  # type: ignore
+        Embeddings,
+    )
+
+# Maximum number of inputs the embeddings endpoint accepts in a single request.
+_MAX_INPUTS_LENGTH = 1000
+
 
 class WatsonxEmbeddings(BaseModel, LangChainEmbeddings):
     """IBM WatsonX.ai embedding models."""
@@ -57,9 +98,55 @@ class WatsonxEmbeddings(BaseModel, LangChainEmbeddings):
         True - default path to truststore will be taken
         False - no verification will be made"""
 
-    watsonx_embed: Embeddings = Field(default=None)  #: :meta private:
+    batch_size: int = _MAX_INPUTS_LENGTH
+    """Maximum number of texts sent to the embeddings endpoint in one request."""
+
+    max_concurrency: int = 10
+    """Maximum number of embedding requests in flight at once."""
+
+    max_connections: Optional[int] = None
+    """Maximum number of pooled HTTP connections to the service."""
+
+    keepalive_expiry: Optional[float] = None
+    """Seconds an idle pooled connection is kept open for reuse by
+    asynchronous requests."""
 
-    watsonx_client: APIClient = Field(default=None)  #: :meta private:
+    http2: bool = False
+    """Whether asynchronous requests negotiate HTTP/2.
+    Requires the ``h2`` package."""
+
+    timeout: Optional[float] = None
+    """Timeout in seconds of a single HTTP request."""
+
+    cache: Optional[BaseStore] = Field(default=None, exclude=True)
+    """Optional store of previously computed vectors, e.g.
+    ``langchain_ibm.cache.LRUEmbeddingCache`` or
+    ``langchain_ibm.cache.SQLiteEmbeddingCache``. Entries are keyed by
+    ``model_id``, ``params`` and a hash of the text, so only cache misses
+    are sent to the service."""
+
+    max_retries: int = 3
+    """Maximum number of retries of a throttled or failed request."""
+
+    retry_policy: Optional[RetryPolicy] = Field(default=None, exclude=True)
+    """Policy for retrying throttled and failed requests with a jittered
+    exponential backoff, honouring ``Retry-After``. Created from
+    ``max_retries`` if not given."""
+
+    adaptive_concurrency: bool = False
+    """Whether to lower the number of requests in flight while the service
+    throttles them, and raise it back up to ``max_concurrency`` afterwards."""
+
+    concurrency_limiter: Optional[AdaptiveConcurrencyLimiter] = Field(
+        default=None, exclude=True
+    )
+    """Adaptive concurrency limiter applied to every request. Created if
+    ``adaptive_concurrency`` is set and not given; pass the same instance to
+    several models to adapt them together."""
+
+    watsonx_embed: Any = Field(default=None)  #: :meta private:
+
+    watsonx_client: Any = Field(default=None)  #: :meta private:
 
     class Config:
         """Configuration for this pydantic object."""
@@ -70,18 +157,26 @@ class WatsonxEmbeddings(BaseModel, LangChainEmbeddings):
     @root_validator(pre=False, skip_on_failure=True)
     def validate_environment(cls, values: Dict) -> Dict:
         """Validate that credentials and python package exists in environment."""
-        if isinstance(values.get("watsonx_client"), APIClient):
-            watsonx_embed = Embeddings(
-                model_id=values["model_id"],
-                params=values["params"],
-                api_client=values["watsonx_client"],
-                project_id=values["project_id"],
-                space_id=values["space_id"],
-                verify=values["verify"],
+        if not 1 <= values["batch_size"] <= _MAX_INPUTS_LENGTH:
+            raise ValueError(
+                f"`batch_size` must be between 1 and {_MAX_INPUTS_LENGTH}, "
+                f"got {values['batch_size']}."
+            )
+        if values["max_concurrency"] < 1:
+            raise ValueError(
+                f"`max_concurrency` must be at least 1, "
+                f"got {values['max_concurrency']}."
             )
-            values["watsonx_embed"] = watsonx_embed
+        if values["retry_policy"] is None:
+            values["retry_policy"] = RetryPolicy(max_retries=values["max_retries"])
+        if values["concurrency_limiter"] is None and values["adaptive_concurrency"]:
+            values["concurrency_limiter"] = AdaptiveConcurrencyLimiter(
+                max_concurrency=values["max_concurrency"]
+            )
+
+        from ibm_watsonx_ai import APIClient  # type: ignore
 
-        else:
+        if not isinstance(values.get("watsonx_client"), APIClient):
             values["url"] = convert_to_secret_str(
                 get_from_dict_or_env(values, "url", "WATSONX_URL")
             )
@@ -131,43 +226,353 @@ class WatsonxEmbeddings(BaseModel, LangChainEmbeddings):
                         )
                     )
 
-            credentials = Credentials(
-                url=values["url"].get_secret_value() if values["url"] else None,
-                api_key=values["apikey"].get_secret_value()
-                if values["apikey"]
-                else None,
-                token=values["token"].get_secret_value() if values["token"] else None,
-                password=values["password"].get_secret_value()
-                if values["password"]
-                else None,
-                username=values["username"].get_secret_value()
-                if values["username"]
-                else None,
-                instance_id=values["instance_id"].get_secret_value()
-                if values["instance_id"]
-                else None,
-                version=values["version"].get_secret_value()
-                if values["version"]
-                else None,
-                verify=values["verify"],
-            )
+        return values
+
+    def _get_watsonx_embed(self) -> "Embeddings":
+        """Return the underlying ``Embeddings``, creating it on first use."""
+        if self.watsonx_embed is not None:
+            return self.watsonx_embed
+        from ibm_watsonx_ai import APIClient, Credentials  # type: ignore
+        from ibm_watsonx_ai.foundation_models.embeddings import (  # type: ignore
+            Embeddings,
+        )
+
+        with model_init_lock:
+            if self.watsonx_embed is not None:
+                return self.watsonx_embed
+            if isinstance(self.watsonx_client, APIClient):
+                watsonx_embed = Embeddings(
+                    model_id=self.model_id,
+                    params=self.params,
+                    api_client=self.watsonx_client,
+                    project_id=self.project_id,
+                    space_id=self.space_id,
+                    verify=self.verify,
+                )
+            else:
+                credentials = Credentials(
+                    url=self.url.get_secret_value() if self.url else None,
+                    api_key=self.apikey.get_secret_value() if self.apikey else None,
+                    token=self.token.get_secret_value() if self.token else None,
+                    password=self.password.get_secret_value()
+                    if self.password
+                    else None,
+                    username=self.username.get_secret_value()
+                    if self.username
+                    else None,
+                    instance_id=self.instance_id.get_secret_value()
+                    if self.instance_id
+                    else None,
+                    version=self.version.get_secret_value() if self.version else None,
+                    verify=self.verify,
+                )
 
-            watsonx_embed = Embeddings(
-                model_id=values["model_id"],
-                params=values["params"],
-                credentials=credentials,
-                project_id=values["project_id"],
-                space_id=values["space_id"],
+                watsonx_embed = Embeddings(
+                    model_id=self.model_id,
+                    params=self.params,
+                    api_client=get_api_client(
+                        credentials,
+                        project_id=self.project_id,
+                        space_id=self.space_id,
+                    ),
+                    project_id=self.project_id,
+                    space_id=self.space_id,
+                )
+            configure_http_session(
+                watsonx_embed._session,
+                max_connections=self.max_connections,
+                timeout=self.timeout,
             )
+            self.watsonx_embed = watsonx_embed
+        return watsonx_embed
 
-            values["watsonx_embed"] = watsonx_embed
+    def warmup(self) -> None:
+        """Create the underlying model and authenticate up front.
 
-        return values
+        The model is otherwise created on first use, so calling this at
+        application startup keeps the first request fast.
+        """
+        self._get_watsonx_embed()
+
+    def _get_async_client(self) -> httpx.AsyncClient:
+        return get_async_http_client(
+            max_connections=self.max_connections,
+            keepalive_expiry=self.keepalive_expiry,
+            http2=self.http2,
+            timeout=self.timeout,
+        )
+
+    def _split_into_batches(self, texts: List[str]) -> List[List[str]]:
+        """Split texts into request-sized batches, preserving input order."""
+        return [
+            texts[i : i + self.batch_size]
+            for i in range(0, len(texts), self.batch_size)
+        ]
+
+    def _cache_keys(self, texts: List[str]) -> List[str]:
+        namespace = embedding_cache_namespace(self.model_id, self.params)
+        return [embedding_cache_key(namespace, text) for text in texts]
 
     def embed_documents(self, texts: List[str]) -> List[List[float]]:
         """Embed search docs."""
-        return self.watsonx_embed.embed_documents(texts=texts)
+        if self.cache is None:
+            return self._embed_documents(texts)
+
+        keys = self._cache_keys(texts)
+        embeddings = self.cache.mget(keys)
+        missing = {
+            key: text
+            for key, text, embedding in zip(keys, texts, embeddings)
+            if embedding is None
+        }
+        if missing:
+            computed = dict(zip(missing, self._embed_documents(list(missing.values()))))
+            self.cache.mset(list(computed.items()))
+            embeddings = [
+                computed[key] if embedding is None else embedding
+                for key, embedding in zip(keys, embeddings)
+            ]
+        return cast(List[List[float]], embeddings)
+
+    def _embed_documents(self, texts: List[str]) -> List[List[float]]:
+        watsonx_embed = self._get_watsonx_embed()
+
+        def _embed_batch(batch: List[str]) -> List[List[float]]:
+            response = embed(
+                watsonx_embed,
+                batch,
+                retry_policy=self.retry_policy,
+                concurrency_limiter=self.concurrency_limiter,
+            )
+            return [result["embedding"] for result in response.get("results", [])]
+
+        batches = self._split_into_batches(texts)
+        if not batches:
+            return []
+        if len(batches) == 1:
+            return _embed_batch(texts)
+
+        with ThreadPoolExecutor(
+            max_workers=min(self.max_concurrency, len(batches))
+        ) as executor:
+            embedded_batches = executor.map(_embed_batch, batches)
+            return [embedding for batch in embedded_batches for embedding in batch]
 
     def embed_query(self, text: str) -> List[float]:
         """Embed query text."""
         return self.embed_documents([text])[0]
+
+    async def aembed_documents(self, texts: List[str]) -> List[List[float]]:
+        """Asynchronous Embed search docs."""
+        if self.cache is None:
+            return await self._aembed_documents(texts)
+
+        keys = self._cache_keys(texts)
+        embeddings = await self.cache.amget(keys)
+        missing = {
+            key: text
+            for key, text, embedding in zip(keys, texts, embeddings)
+            if embedding is None
+        }
+        if missing:
+            computed = dict(
+                zip(missing, await self._aembed_documents(list(missing.values())))
+            )
+            await self.cache.amset(list(computed.items()))
+            embeddings = [
+                computed[key] if embedding is None else embedding
+                for key, embedding in zip(keys, embeddings)
+            ]
+        return cast(List[List[float]], embeddings)
+
+    async def _aembed_documents(self, texts: List[str]) -> List[List[float]]:
+        watsonx_embed = self._get_watsonx_embed()
+        semaphore = asyncio.Semaphore(self.max_concurrency)
+        client = self._get_async_client()
+
+        async def _aembed_batch(batch: List[str]) -> List[List[float]]:
+            async with semaphore:
+                response = await aembed(
+                    watsonx_embed,
+                    batch,
+                    client=client,
+                    retry_policy=self.retry_policy,
+                    concurrency_limiter=self.concurrency_limiter,
+                )
+            return [result["embedding"] for result in response.get("results", [])]
+
+        embedded_batches = await asyncio.gather(
+            *(_aembed_batch(batch) for batch in self._split_into_batches(texts))
+        )
+        return [embedding for batch in embedded_batches for embedding in batch]
+
+    async def aembed_query(self, text: str) -> List[float]:
+        """Asynchronous Embed query text."""
+        return (await self.aembed_documents([text]))[0]
+
+    def embed_documents_array(
+        self, texts: List[str], dtype: str = "float32"
+    ) -> "np.ndarray":
+        """Embed search docs into a contiguous ``(len(texts), dim)`` NumPy array.
+
+        At most ``max_concurrency`` batches are in flight and each one is
+        copied into the preallocated array as soon as it arrives, so only the
+        batches in flight are held as Python lists.
+
+        Args:
+            texts: The texts to embed.
+            dtype: NumPy dtype of the returned array, e.g. ``"float32"`` or
+                ``"float16"``.
+
+        Returns:
+            The embeddings, one row per text, in input order.
+        """
+        np = _import_numpy()
+        batches = self._split_into_batches(texts)
+        if not batches:
+            return np.empty((0, 0), dtype=dtype)
+
+        embeddings: Any = None
+        batches_iterator = iter(batches)
+        pending: Deque[Tuple[int, Future]] = deque()
+        offset = 0
+        with ThreadPoolExecutor(
+            max_workers=min(self.max_concurrency, len(batches))
+        ) as executor:
+            try:
+                while True:
+                    while len(pending) < self.max_concurrency and (
+                        batch := next(batches_iterator, None)
+                    ):
+                        pending.append(
+                            (offset, executor.submit(self.embed_documents, batch))
+                        )
+                        offset += len(batch)
+                    if not pending:
+                        break
+                    start, future = pending.popleft()
+                    vectors = future.result()
+                    if embeddings is None:
+                        embeddings = np.empty(
+                            (len(texts), len(vectors[0])), dtype=dtype
+                        )
+                    embeddings[start : start + len(vectors)] = vectors
+            finally:
+                for _, future in pending:
+                    future.cancel()
+        return embeddings
+
+    async def aembed_documents_array(
+        self, texts: List[str], dtype: str = "float32"
+    ) -> "np.ndarray":
+        """Asynchronous Embed search docs into a contiguous ``(len(texts), dim)``
+        NumPy array.
+
+        Args:
+            texts: The texts to embed.
+            dtype: NumPy dtype of the returned array, e.g. ``"float32"`` or
+                ``"float16"``.
+
+        Returns:
+            The embeddings, one row per text, in input order.
+        """
+        np = _import_numpy()
+        batches = self._split_into_batches(texts)
+        if not batches:
+            return np.empty((0, 0), dtype=dtype)
+
+        semaphore = asyncio.Semaphore(self.max_concurrency)
+
+        async def _aembed_batch(
+            offset: int, batch: List[str]
+        ) -> Tuple[int, List[List[float]]]:
+            async with semaphore:
+                return offset, await self.aembed_documents(batch)
+
+        embeddings: Any = None
+        for next_batch in asyncio.as_completed(
+            [
+                _aembed_batch(i * self.batch_size, batch)
+                for i, batch in enumerate(batches)
+            ]
+        ):
+            offset, vectors = await next_batch
+            if embeddings is None:
+                embeddings = np.empty((len(texts), len(vectors[0])), dtype=dtype)
+            embeddings[offset : offset + len(vectors)] = vectors
+        return embeddings
+
+    def iter_embed_documents(
+        self, texts: Iterable[str]
+    ) -> Iterator[Tuple[int, List[float]]]:
+        """Lazily embed a stream of search docs.
+
+        Texts are consumed from ``texts`` one batch at a time and at most
+        ``max_concurrency`` batches are in flight, so memory stays bounded
+        regardless of the corpus size.
+
+        Args:
+            texts: Iterable of texts to embed, e.g. a generator reading a file.
+
+        Yields:
+            ``(index, vector)`` pairs in input order.
+
+        Example:
+            .. code-block:: python
+
+                for index, vector in watsonx_embedding.iter_embed_documents(texts):
+                    vector_store.add(index, vector)
+        """
+        texts_iterator = iter(texts)
+        pending: Deque[Tuple[int, Future]] = deque()
+        offset = 0
+        with ThreadPoolExecutor(max_workers=self.max_concurrency) as executor:
+            try:
+                while True:
+                    while len(pending) < self.max_concurrency and (
+                        batch := list(islice(texts_iterator, self.batch_size))
+                    ):
+                        pending.append(
+                            (offset, executor.submit(self.embed_documents, batch))
+                        )
+                        offset += len(batch)
+                    if not pending:
+                        break
+                    start, future = pending.popleft()
+                    yield from enumerate(future.result(), start)
+            finally:
+                for _, future in pending:
+                    future.cancel()
+
+    async def aiter_embed_documents(
+        self, texts: Iterable[str]
+    ) -> AsyncGenerator[Tuple[int, List[float]], None]:
+        """Asynchronously and lazily embed a stream of search docs.
+
+        Args:
+            texts: Iterable of texts to embed, e.g. a generator reading a file.
+
+        Yields:
+            ``(index, vector)`` pairs in input order.
+        """
+        texts_iterator = iter(texts)
+        pending: Deque[Tuple[int, asyncio.Task]] = deque()
+        offset = 0
+        try:
+            while True:
+                while len(pending) < self.max_concurrency and (
+                    batch := list(islice(texts_iterator, self.batch_size))
+                ):
+                    pending.append(
+                        (offset, asyncio.ensure_future(self.aembed_documents(batch)))
+                    )
+                    offset += len(batch)
+                if not pending:
+                    break
+                start, task = pending.popleft()
+                for index, vector in enumerate(await task, start):
+                    yield index, vector
+        finally:
+            for _, task in pending:
+                task.cancel()
+            await asyncio.gather(*(task for _, task in pending), return_exceptions=True)
@@ -1,20 +1,77 @@
+import asyncio
 import logging
 import os
-from typing import Any, Dict, Iterator, List, Mapping, Optional, Tuple, Union
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import aclosing, closing
+from functools import lru_cache
+from queue import Queue
+from typing import (
+    TYPE_CHECKING,
+    Any,
+    AsyncGenerator,
+    AsyncIterator,
+    Callable,
+    Dict,
+    Generator,
+    Iterator,
+    List,
+    Mapping,
+    Optional,
+    Tuple,
+    Union,
+)
 
-from ibm_watsonx_ai import APIClient, Credentials  # type: ignore
-from ibm_watsonx_ai.foundation_models import Model, ModelInference  # type: ignore
-from ibm_watsonx_ai.metanames import GenTextParamsMetaNames  # type: ignore
-from langchain_core.callbacks import CallbackManagerForLLMRun
+import httpx
+from langchain_core.callbacks import (
+    AsyncCallbackManagerForLLMRun,
+    CallbackManagerForLLMRun,
+)
 from langchain_core.language_models.llms import BaseLLM
 from langchain_core.outputs import Generation, GenerationChunk, LLMResult
 from langchain_core.pydantic_v1 import Extra, Field, SecretStr, root_validator
+from langchain_core.stores import BaseStore
 from langchain_core.utils import convert_to_secret_str, get_from_dict_or_env
 
+from langchain_ibm.cache import generation_cache_key, generation_cache_namespace
+from langchain_ibm.utils import (
+    AdaptiveConcurrencyLimiter,
+    RateLimiter,
+    RetryPolicy,
+    StreamMetrics,
+    _report_stream_metrics,
+    agenerate,
+    agenerate_stream,
+    configure_http_session,
+    generate,
+    generate_stream,
+    get_api_client,
+    get_async_http_client,
+    model_init_lock,
+)
+
+if TYPE_CHECKING:
+    # ibm_watsonx_ai is imported on first use, as importing it takes a while
+    from ibm_watsonx_ai.foundation_models import ModelInference  # type: ignore
+
 logger = logging.getLogger(__name__)
-textgen_valid_params = [
-    value for key, value in GenTextParamsMetaNames.__dict__.items() if key.isupper()
-]
+
+
+@lru_cache(maxsize=None)
+def _textgen_valid_params() -> List[str]:
+    from ibm_watsonx_ai.metanames import GenTextParamsMetaNames  # type: ignore
+
+    return [
+        value for key, value in GenTextParamsMetaNames.__dict__.items() if key.isupper()
+    ]
+
+
+def __getattr__(name: str) -> Any:
+    # `textgen_valid_params` is resolved on first access, so that importing
+    # this module does not import ibm_watsonx_ai
+    if name == "textgen_valid_params":
+        return _textgen_valid_params()
+    raise AttributeError(f"module {__name__} has no attribute {name}")
 
 
 class WatsonxLLM(BaseLLM):
@@ -95,9 +152,73 @@ class WatsonxLLM(BaseLLM):
     streaming: bool = False
     """ Whether to stream the results or not. """
 
-    watsonx_model: ModelInference = Field(default=None, exclude=True)  #: :meta private:
+    max_connections: Optional[int] = None
+    """Maximum number of pooled HTTP connections to the service."""
+
+    keepalive_expiry: Optional[float] = None
+    """Seconds an idle pooled connection is kept open for reuse by
+    asynchronous requests."""
+
+    http2: bool = False
+    """Whether asynchronous requests negotiate HTTP/2.
+    Requires the ``h2`` package."""
+
+    timeout: Optional[float] = None
+    """Timeout in seconds of a single HTTP request."""
+
+    max_concurrency: int = 10
+    """Maximum number of generation requests in flight at once. Can be overridden
+    per call with the ``concurrency_limit`` keyword argument."""
 
-    watsonx_client: APIClient = Field(default=None)  #: :meta private:
+    requests_per_second: Optional[float] = None
+    """Client-side limit of generation requests per second."""
+
+    tokens_per_minute: Optional[float] = None
+    """Client-side limit of input and generated tokens per minute."""
+
+    rate_limiter: Optional[RateLimiter] = Field(default=None, exclude=True)
+    """Rate limiter applied to every request. Created from
+    ``requests_per_second`` and ``tokens_per_minute`` if not given; pass the
+    same instance to several models to limit them together."""
+
+    max_retries: int = 3
+    """Maximum number of retries of a throttled or failed request."""
+
+    retry_policy: Optional[RetryPolicy] = Field(default=None, exclude=True)
+    """Policy for retrying throttled and failed requests with a jittered
+    exponential backoff, honouring ``Retry-After``. Created from
+    ``max_retries`` if not given."""
+
+    adaptive_concurrency: bool = False
+    """Whether to lower the number of requests in flight while the service
+    throttles them, and raise it back up to ``max_concurrency`` afterwards."""
+
+    concurrency_limiter: Optional[AdaptiveConcurrencyLimiter] = Field(
+        default=None, exclude=True
+    )
+    """Adaptive concurrency limiter applied to every request. Created if
+    ``adaptive_concurrency`` is set and not given; pass the same instance to
+    several models to adapt them together."""
+
+    generation_cache: Optional[BaseStore] = Field(default=None, exclude=True)
+    """Optional store of previous generation responses, e.g.
+    ``langchain_ibm.cache.LRUGenerationCache`` or
+    ``langchain_ibm.cache.SQLiteGenerationCache``. Entries are keyed by the
+    prompt, ``model_id``, ``deployment_id`` and the normalized parameters.
+    Requests using sampling and streamed requests bypass the cache."""
+
+    stream_metrics_callback: Optional[Callable[[StreamMetrics], Any]] = Field(
+        default=None, exclude=True
+    )
+    """Optional function called with the ``StreamMetrics`` of every streamed
+    generation once it ended or was abandoned, e.g. to export the time to
+    first token to Prometheus or OpenTelemetry. The metrics of completed
+    streams are also added to the ``generation_info`` of their last chunk,
+    under ``stream_metrics``."""
+
+    watsonx_model: Any = Field(default=None, exclude=True)  #: :meta private:
+
+    watsonx_client: Any = Field(default=None)  #: :meta private:
 
     class Config:
         """Configuration for this pydantic object."""
@@ -134,6 +255,31 @@ class WatsonxLLM(BaseLLM):
     @root_validator(pre=False, skip_on_failure=True)
     def validate_environment(cls, values: Dict) -> Dict:
         """Validate that credentials and python package exists in environment."""
+        from ibm_watsonx_ai import APIClient  # type: ignore
+        from ibm_watsonx_ai.foundation_models import (  # type: ignore
+            Model,
+            ModelInference,
+        )
+
+        if values["max_concurrency"] < 1:
+            raise ValueError(
+                f"`max_concurrency` must be at least 1, "
+                f"got {values['max_concurrency']}."
+            )
+        if values["rate_limiter"] is None and (
+            values["requests_per_second"] or values["tokens_per_minute"]
+        ):
+            values["rate_limiter"] = RateLimiter(
+                requests_per_second=values["requests_per_second"],
+                tokens_per_minute=values["tokens_per_minute"],
+            )
+        if values["retry_policy"] is None:
+            values["retry_policy"] = RetryPolicy(max_retries=values["max_retries"])
+        if values["concurrency_limiter"] is None and values["adaptive_concurrency"]:
+            values["concurrency_limiter"] = AdaptiveConcurrencyLimiter(
+                max_concurrency=values["max_concurrency"]
+            )
+
         if isinstance(values.get("watsonx_model"), (ModelInference, Model)):
             values["model_id"] = getattr(values["watsonx_model"], "model_id")
             values["deployment_id"] = getattr(
@@ -148,18 +294,13 @@ class WatsonxLLM(BaseLLM):
             )
             values["params"] = getattr(values["watsonx_model"], "params")
 
-        elif isinstance(values.get("watsonx_client"), APIClient):
-            watsonx_model = ModelInference(
-                model_id=values["model_id"],
-                params=values["params"],
-                api_client=values["watsonx_client"],
-                project_id=values["project_id"],
-                space_id=values["space_id"],
-                verify=values["verify"],
+            configure_http_session(
+                values["watsonx_model"]._inference._session,
+                max_connections=values["max_connections"],
+                timeout=values["timeout"],
             )
-            values["watsonx_model"] = watsonx_model
 
-        else:
+        elif not isinstance(values.get("watsonx_client"), APIClient):
             values["url"] = convert_to_secret_str(
                 get_from_dict_or_env(values, "url", "WATSONX_URL")
             )
@@ -208,38 +349,73 @@ class WatsonxLLM(BaseLLM):
                             values, "instance_id", "WATSONX_INSTANCE_ID"
                         )
                     )
-            credentials = Credentials(
-                url=values["url"].get_secret_value() if values["url"] else None,
-                api_key=values["apikey"].get_secret_value()
-                if values["apikey"]
-                else None,
-                token=values["token"].get_secret_value() if values["token"] else None,
-                password=values["password"].get_secret_value()
-                if values["password"]
-                else None,
-                username=values["username"].get_secret_value()
-                if values["username"]
-                else None,
-                instance_id=values["instance_id"].get_secret_value()
-                if values["instance_id"]
-                else None,
-                version=values["version"].get_secret_value()
-                if values["version"]
-                else None,
-                verify=values["verify"],
-            )
 
-            watsonx_model = ModelInference(
-                model_id=values["model_id"],
-                deployment_id=values["deployment_id"],
-                credentials=credentials,
-                params=values["params"],
-                project_id=values["project_id"],
-                space_id=values["space_id"],
+        return values
+
+    def _get_watsonx_model(self) -> "ModelInference":
+        """Return the underlying ``ModelInference``, creating it on first use."""
+        if self.watsonx_model is not None:
+            return self.watsonx_model
+        from ibm_watsonx_ai import APIClient, Credentials  # type: ignore
+        from ibm_watsonx_ai.foundation_models import ModelInference  # type: ignore
+
+        with model_init_lock:
+            if self.watsonx_model is not None:
+                return self.watsonx_model
+            if isinstance(self.watsonx_client, APIClient):
+                watsonx_model = ModelInference(
+                    model_id=self.model_id,
+                    params=self.params,
+                    api_client=self.watsonx_client,
+                    project_id=self.project_id,
+                    space_id=self.space_id,
+                    verify=self.verify,
+                )
+            else:
+                credentials = Credentials(
+                    url=self.url.get_secret_value() if self.url else None,
+                    api_key=self.apikey.get_secret_value() if self.apikey else None,
+                    token=self.token.get_secret_value() if self.token else None,
+                    password=self.password.get_secret_value()
+                    if self.password
+                    else None,
+                    username=self.username.get_secret_value()
+                    if self.username
+                    else None,
+                    instance_id=self.instance_id.get_secret_value()
+                    if self.instance_id
+                    else None,
+                    version=self.version.get_secret_value() if self.version else None,
+                    verify=self.verify,
+                )
+
+                watsonx_model = ModelInference(
+                    model_id=self.model_id,
+                    deployment_id=self.deployment_id,
+                    api_client=get_api_client(
+                        credentials,
+                        project_id=self.project_id,
+                        space_id=self.space_id,
+                    ),
+                    params=self.params,
+                    project_id=self.project_id,
+                    space_id=self.space_id,
+                )
+            configure_http_session(
+                watsonx_model._inference._session,
+                max_connections=self.max_connections,
+                timeout=self.timeout,
             )
-            values["watsonx_model"] = watsonx_model
+            self.watsonx_model = watsonx_model
+        return watsonx_model
 
-        return values
+    def warmup(self) -> None:
+        """Create the underlying model and authenticate up front.
+
+        The model is otherwise created on first use, so calling this at
+        application startup keeps the first request fast.
+        """
+        self._get_watsonx_model()
 
     @property
     def _identifying_params(self) -> Mapping[str, Any]:
@@ -289,10 +465,10 @@ class WatsonxLLM(BaseLLM):
     ) -> Dict[str, Any]:
         """Validate and fix the chat parameters"""
         for param in params.keys():
-            if param.lower() not in textgen_valid_params:
+            if param.lower() not in _textgen_valid_params():
                 raise Exception(
                     f"Parameter {param} is not valid. "
-                    f"Valid parameters are: {textgen_valid_params}"
+                    f"Valid parameters are: {_textgen_valid_params()}"
                 )
         return params
 
@@ -307,7 +483,7 @@ class WatsonxLLM(BaseLLM):
         those keys from kwargs.
         """
         for key in list(kwargs.keys()):
-            if key.lower() in textgen_valid_params:
+            if key.lower() in _textgen_valid_params():
                 params[key] = kwargs.pop(key)
         return params, kwargs
 
@@ -371,6 +547,311 @@ class WatsonxLLM(BaseLLM):
             ),
         )
 
+    @staticmethod
+    def _add_stream_metrics(chunk: GenerationChunk, metrics: StreamMetrics) -> None:
+        """Add the metrics of the stream to its last chunk."""
+        if chunk.generation_info and chunk.generation_info.get("finish_reason"):
+            metrics.finish()
+            chunk.generation_info["stream_metrics"] = metrics.to_dict()
+
+    @staticmethod
+    def _estimate_token_usage(prompt: str, params: Optional[Dict[str, Any]]) -> int:
+        """Estimate the tokens a request consumes before it is sent, assuming
+        about four characters per input token and a full-length generation."""
+        # 20 is the service default of max_new_tokens
+        max_new_tokens = (params or {}).get("max_new_tokens") or 20
+        return len(prompt) // 4 + int(max_new_tokens)
+
+    def _generation_cache_key(
+        self, prompt: str, params: Optional[Dict[str, Any]], **kwargs: Any
+    ) -> Optional[str]:
+        if self.generation_cache is None:
+            return None
+        namespace = generation_cache_namespace(
+            self.model_id, self.deployment_id, params, **kwargs
+        )
+        if namespace is None:
+            return None
+        return generation_cache_key(namespace, prompt)
+
+    def _generate_single(
+        self,
+        watsonx_model: "ModelInference",
+        prompt: str,
+        params: Optional[Dict[str, Any]],
+        **kwargs: Any,
+    ) -> Dict[str, Any]:
+        """Generate a single prompt from the cache or within the rate limits."""
+        cache_key = self._generation_cache_key(prompt, params, **kwargs)
+        if self.generation_cache is not None and cache_key is not None:
+            cached = self.generation_cache.mget([cache_key])[0]
+            if cached is not None:
+                return cached
+        response = self._generate_uncached(watsonx_model, prompt, params, **kwargs)
+        if self.generation_cache is not None and cache_key is not None:
+            self.generation_cache.mset([(cache_key, response)])
+        return response
+
+    def _generate_uncached(
+        self,
+        watsonx_model: "ModelInference",
+        prompt: str,
+        params: Optional[Dict[str, Any]],
+        **kwargs: Any,
+    ) -> Dict[str, Any]:
+        """Generate a single prompt within the rate limits."""
+        kwargs.update(
+            retry_policy=self.retry_policy,
+            concurrency_limiter=self.concurrency_limiter,
+        )
+        if self.rate_limiter is None:
+            return generate(watsonx_model, prompt, params=params, **kwargs)
+        estimate = self._estimate_token_usage(prompt, params)
+        self.rate_limiter.acquire(estimate)
+        response = generate(watsonx_model, prompt, params=params, **kwargs)
+        usage = self._extract_token_usage([response])
+        self.rate_limiter.adjust(sum(usage.values()) - estimate)
+        return response
+
+    async def _agenerate_single(
+        self,
+        watsonx_model: "ModelInference",
+        prompt: str,
+        params: Optional[Dict[str, Any]],
+        client: httpx.AsyncClient,
+        **kwargs: Any,
+    ) -> Dict[str, Any]:
+        """Asynchronously generate a single prompt from the cache or within the
+        rate limits."""
+        cache_key = self._generation_cache_key(prompt, params, **kwargs)
+        if self.generation_cache is not None and cache_key is not None:
+            cached = (await self.generation_cache.amget([cache_key]))[0]
+            if cached is not None:
+                return cached
+        response = await self._agenerate_uncached(
+            watsonx_model, prompt, params, client, **kwargs
+        )
+        if self.generation_cache is not None and cache_key is not None:
+            await self.generation_cache.amset([(cache_key, response)])
+        return response
+
+    async def _agenerate_uncached(
+        self,
+        watsonx_model: "ModelInference",
+        prompt: str,
+        params: Optional[Dict[str, Any]],
+        client: httpx.AsyncClient,
+        **kwargs: Any,
+    ) -> Dict[str, Any]:
+        """Asynchronously generate a single prompt within the rate limits."""
+        kwargs.update(
+            retry_policy=self.retry_policy,
+            concurrency_limiter=self.concurrency_limiter,
+        )
+        if self.rate_limiter is None:
+            return await agenerate(
+                watsonx_model, prompt, params=params, client=client, **kwargs
+            )
+        estimate = self._estimate_token_usage(prompt, params)
+        await self.rate_limiter.aacquire(estimate)
+        response = await agenerate(
+            watsonx_model, prompt, params=params, client=client, **kwargs
+        )
+        usage = self._extract_token_usage([response])
+        self.rate_limiter.adjust(sum(usage.values()) - estimate)
+        return response
+
+    def _generate_stream(
+        self,
+        watsonx_model: "ModelInference",
+        prompt: str,
+        params: Optional[Dict[str, Any]],
+        **kwargs: Any,
+    ) -> Generator[Dict[str, Any], None, None]:
+        """Stream a single prompt within the rate limits."""
+        estimate = self._estimate_token_usage(prompt, params)
+        if self.rate_limiter is not None:
+            self.rate_limiter.acquire(estimate)
+        stream_resp = None
+        with closing(
+            generate_stream(
+                watsonx_model,
+                prompt,
+                params=params,
+                retry_policy=self.retry_policy,
+                concurrency_limiter=self.concurrency_limiter,
+                **kwargs,
+            )
+        ) as stream:
+            for stream_resp in stream:
+                yield stream_resp
+        if self.rate_limiter is not None and stream_resp is not None:
+            # the token counts of the last event cover the whole generation
+            usage = self._extract_token_usage([stream_resp])
+            self.rate_limiter.adjust(sum(usage.values()) - estimate)
+
+    async def _agenerate_stream(
+        self,
+        watsonx_model: "ModelInference",
+        prompt: str,
+        params: Optional[Dict[str, Any]],
+        client: httpx.AsyncClient,
+        **kwargs: Any,
+    ) -> AsyncGenerator[Dict[str, Any], None]:
+        """Asynchronously stream a single prompt within the rate limits."""
+        estimate = self._estimate_token_usage(prompt, params)
+        if self.rate_limiter is not None:
+            await self.rate_limiter.aacquire(estimate)
+        stream_resp = None
+        async with aclosing(
+            agenerate_stream(
+                watsonx_model,
+                prompt,
+                params=params,
+                client=client,
+                retry_policy=self.retry_policy,
+                concurrency_limiter=self.concurrency_limiter,
+                **kwargs,
+            )
+        ) as stream:
+            async for stream_resp in stream:
+                yield stream_resp
+        if self.rate_limiter is not None and stream_resp is not None:
+            # the token counts of the last event cover the whole generation
+            usage = self._extract_token_usage([stream_resp])
+            self.rate_limiter.adjust(sum(usage.values()) - estimate)
+
+    def _create_streamed_llm_result(
+        self, generations: List[GenerationChunk]
+    ) -> LLMResult:
+        """Create the LLMResult of streamed generations, one per prompt."""
+        llm_output = None
+        for generation in generations:
+            if isinstance(generation.generation_info, dict):
+                # merging the chunks concatenated the per-chunk string values
+                generation.generation_info.pop("llm_output", None)
+                llm_output = {
+                    "model_id": self.model_id,
+                    "deployment_id": self.deployment_id,
+                }
+        return LLMResult(
+            generations=[[generation] for generation in generations],
+            llm_output=llm_output,
+        )
+
+    def _stream_prompts(
+        self,
+        prompts: List[str],
+        params: Dict[str, Any],
+        run_manager: Optional[CallbackManagerForLLMRun],
+        concurrency_limit: int,
+        **kwargs: Any,
+    ) -> List[GenerationChunk]:
+        """Stream several prompts concurrently.
+
+        Chunks are reported to ``run_manager`` as they arrive, from the calling
+        thread, with the index of their prompt passed as ``prompt_index``.
+        """
+        watsonx_model = self._get_watsonx_model()
+        queue: "Queue[Tuple[int, Union[GenerationChunk, BaseException, None]]]" = (
+            Queue()
+        )
+        # set when the results are no longer awaited, to close the open streams
+        cancelled = threading.Event()
+
+        def _stream_prompt(index: int, prompt: str) -> None:
+            try:
+                with closing(
+                    self._generate_stream(watsonx_model, prompt, params, **kwargs)
+                ) as stream:
+                    for stream_resp in stream:
+                        if cancelled.is_set():
+                            break
+                        queue.put(
+                            (
+                                index,
+                                self._stream_response_to_generation_chunk(stream_resp),
+                            )
+                        )
+            except BaseException as e:
+                queue.put((index, e))
+            else:
+                queue.put((index, None))
+
+        generations = [GenerationChunk(text="") for _ in prompts]
+        with ThreadPoolExecutor(
+            max_workers=min(concurrency_limit, len(prompts))
+        ) as executor:
+            futures = [
+                executor.submit(_stream_prompt, index, prompt)
+                for index, prompt in enumerate(prompts)
+            ]
+            unfinished = len(prompts)
+            try:
+                while unfinished:
+                    index, item = queue.get()
+                    if item is None:
+                        unfinished -= 1
+                    elif isinstance(item, BaseException):
+                        for future in futures:
+                            future.cancel()
+                        raise item
+                    else:
+                        generations[index] += item
+                        if run_manager:
+                            run_manager.on_llm_new_token(
+                                item.text, chunk=item, prompt_index=index
+                            )
+            finally:
+                cancelled.set()
+        return generations
+
+    async def _astream_prompts(
+        self,
+        prompts: List[str],
+        params: Dict[str, Any],
+        run_manager: Optional[AsyncCallbackManagerForLLMRun],
+        concurrency_limit: int,
+        **kwargs: Any,
+    ) -> List[GenerationChunk]:
+        """Asynchronously stream several prompts concurrently.
+
+        Chunks are reported to ``run_manager`` as they arrive, with the index of
+        their prompt passed as ``prompt_index``.
+        """
+        watsonx_model = self._get_watsonx_model()
+        client = self._get_async_client()
+        semaphore = asyncio.Semaphore(concurrency_limit)
+
+        async def _astream_prompt(index: int, prompt: str) -> GenerationChunk:
+            generation = GenerationChunk(text="")
+            async with semaphore:
+                async with aclosing(
+                    self._agenerate_stream(
+                        watsonx_model, prompt, params, client, **kwargs
+                    )
+                ) as stream:
+                    async for stream_resp in stream:
+                        chunk = self._stream_response_to_generation_chunk(stream_resp)
+                        generation += chunk
+                        if run_manager:
+                            await run_manager.on_llm_new_token(
+                                chunk.text, chunk=chunk, prompt_index=index
+                            )
+            return generation
+
+        tasks = [
+            asyncio.ensure_future(_astream_prompt(index, prompt))
+            for index, prompt in enumerate(prompts)
+        ]
+        try:
+            return list(await asyncio.gather(*tasks))
+        except BaseException:
+            # gather leaves the other streams running if one of them fails
+            for task in tasks:
+                task.cancel()
+            raise
+
     def _call(
         self,
         prompt: str,
@@ -419,30 +900,97 @@ class WatsonxLLM(BaseLLM):
         params = self._validate_chat_params(params)
         should_stream = stream if stream is not None else self.streaming
         if should_stream:
+            concurrency_limit = kwargs.pop("concurrency_limit", self.max_concurrency)
             if len(prompts) > 1:
-                raise ValueError(
-                    f"WatsonxLLM currently only supports single prompt, got {prompts}"
+                return self._create_streamed_llm_result(
+                    self._stream_prompts(
+                        prompts, params, run_manager, concurrency_limit, **kwargs
+                    )
                 )
             generation = GenerationChunk(text="")
             stream_iter = self._stream(
                 prompts[0], stop=stop, run_manager=run_manager, **kwargs
             )
             for chunk in stream_iter:
-                if generation is None:
-                    generation = chunk
-                else:
-                    generation += chunk
-            assert generation is not None
-            if isinstance(generation.generation_info, dict):
-                llm_output = generation.generation_info.pop("llm_output")
-                return LLMResult(generations=[[generation]], llm_output=llm_output)
-            return LLMResult(generations=[[generation]])
+                generation += chunk
+            return self._create_streamed_llm_result([generation])
         else:
-            response = self.watsonx_model.generate(
-                prompt=prompts, params=params, **kwargs
-            )
+            concurrency_limit = kwargs.pop("concurrency_limit", self.max_concurrency)
+            watsonx_model = self._get_watsonx_model()
+            if len(prompts) == 1:
+                response = [
+                    self._generate_single(watsonx_model, prompts[0], params, **kwargs)
+                ]
+            else:
+                with ThreadPoolExecutor(
+                    max_workers=min(concurrency_limit, len(prompts))
+                ) as executor:
+                    response = list(
+                        executor.map(
+                            lambda prompt: self._generate_single(
+                                watsonx_model, prompt, params, **kwargs
+                            ),
+                            prompts,
+                        )
+                    )
             return self._create_llm_result(response)
 
+    async def _agenerate(
+        self,
+        prompts: List[str],
+        stop: Optional[List[str]] = None,
+        run_manager: Optional[AsyncCallbackManagerForLLMRun] = None,
+        stream: Optional[bool] = None,
+        **kwargs: Any,
+    ) -> LLMResult:
+        """Asynchronously call the IBM watsonx.ai inference endpoint which then
+        generate the response.
+        Args:
+            prompts: List of strings (prompts) to pass into the model.
+            stop: Optional list of stop words to use when generating.
+            run_manager: Optional callback manager.
+        Returns:
+            The full LLMResult output.
+        Example:
+            .. code-block:: python
+
+                response = await watsonx_llm.agenerate(["What is a molecule"])
+        """
+        params, kwargs = self._get_chat_params(stop=stop, **kwargs)
+        params = self._validate_chat_params(params)
+        should_stream = stream if stream is not None else self.streaming
+        if should_stream:
+            concurrency_limit = kwargs.pop("concurrency_limit", self.max_concurrency)
+            if len(prompts) > 1:
+                return self._create_streamed_llm_result(
+                    await self._astream_prompts(
+                        prompts, params, run_manager, concurrency_limit, **kwargs
+                    )
+                )
+            generation = GenerationChunk(text="")
+            async for chunk in self._astream(
+                prompts[0], stop=stop, run_manager=run_manager, **kwargs
+            ):
+                generation += chunk
+            return self._create_streamed_llm_result([generation])
+        else:
+            semaphore = asyncio.Semaphore(
+                kwargs.pop("concurrency_limit", self.max_concurrency)
+            )
+            watsonx_model = self._get_watsonx_model()
+            client = self._get_async_client()
+
+            async def _agenerate_limited(prompt: str) -> Dict[str, Any]:
+                async with semaphore:
+                    return await self._agenerate_single(
+                        watsonx_model, prompt, params, client, **kwargs
+                    )
+
+            response = await asyncio.gather(
+                *(_agenerate_limited(prompt) for prompt in prompts)
+            )
+            return self._create_llm_result(list(response))
+
     def _stream(
         self,
         prompt: str,
@@ -466,19 +1014,82 @@ class WatsonxLLM(BaseLLM):
         """
         params, kwargs = self._get_chat_params(stop=stop, **kwargs)
         params = self._validate_chat_params(params)
-        for stream_resp in self.watsonx_model.generate_text_stream(
-            prompt=prompt, params=params, **(kwargs | {"raw_response": True})
-        ):
-            if not isinstance(stream_resp, dict):
-                stream_resp = stream_resp.dict()
-            chunk = self._stream_response_to_generation_chunk(stream_resp)
+        metrics = StreamMetrics(self.model_id or self.deployment_id)
+        try:
+            # closing the returned generator closes the HTTP stream as well
+            with closing(
+                self._generate_stream(
+                    self._get_watsonx_model(), prompt, params, **kwargs
+                )
+            ) as stream:
+                for stream_resp in stream:
+                    metrics.record(stream_resp)
+                    chunk = self._stream_response_to_generation_chunk(stream_resp)
+                    self._add_stream_metrics(chunk, metrics)
 
-            if run_manager:
-                run_manager.on_llm_new_token(chunk.text, chunk=chunk)
-            yield chunk
+                    if run_manager:
+                        run_manager.on_llm_new_token(chunk.text, chunk=chunk)
+                    yield chunk
+        finally:
+            _report_stream_metrics(metrics, self.stream_metrics_callback)
+
+    async def _astream(
+        self,
+        prompt: str,
+        stop: Optional[List[str]] = None,
+        run_manager: Optional[AsyncCallbackManagerForLLMRun] = None,
+        **kwargs: Any,
+    ) -> AsyncIterator[GenerationChunk]:
+        """Asynchronously call the IBM watsonx.ai inference endpoint which then
+        streams the response.
+        Args:
+            prompt: The prompt to pass into the model.
+            stop: Optional list of stop words to use when generating.
+            run_manager: Optional callback manager.
+        Returns:
+            The async iterator which yields generation chunks.
+        Example:
+            .. code-block:: python
+
+                response = watsonx_llm.astream("What is a molecule")
+                async for chunk in response:
+                    print(chunk, end='', flush=True)
+        """
+        params, kwargs = self._get_chat_params(stop=stop, **kwargs)
+        params = self._validate_chat_params(params)
+        metrics = StreamMetrics(self.model_id or self.deployment_id)
+        try:
+            # closing the returned generator closes the HTTP stream as well
+            async with aclosing(
+                self._agenerate_stream(
+                    self._get_watsonx_model(),
+                    prompt,
+                    params,
+                    self._get_async_client(),
+                    **kwargs,
+                )
+            ) as stream:
+                async for stream_resp in stream:
+                    metrics.record(stream_resp)
+                    chunk = self._stream_response_to_generation_chunk(stream_resp)
+                    self._add_stream_metrics(chunk, metrics)
+
+                    if run_manager:
+                        await run_manager.on_llm_new_token(chunk.text, chunk=chunk)
+                    yield chunk
+        finally:
+            _report_stream_metrics(metrics, self.stream_metrics_callback)
+
+    def _get_async_client(self) -> httpx.AsyncClient:
+        return get_async_http_client(
+            max_connections=self.max_connections,
+            keepalive_expiry=self.keepalive_expiry,
+            http2=self.http2,
+            timeout=self.timeout,
+        )
 
     def get_num_tokens(self, text: str) -> int:
-        response = self.watsonx_model.tokenize(text, return_tokens=False)
+        response = self._get_watsonx_model().tokenize(text, return_tokens=False)
         return response["result"]["token_count"]
 
     def get_token_ids(self, text: str) -> List[int]:
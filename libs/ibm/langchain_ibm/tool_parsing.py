@@ -0,0 +1,434 @@
+"""Parsing of the tool calls generated by watsonx.ai chat models."""
+
+import json
+import uuid
+from typing import Any, Iterator, List, Optional, Tuple
+
+from langchain_core.messages import ToolCallChunk
+from langchain_core.utils.json import parse_partial_json
+
+_FENCE = "```"
+_WHITESPACE = " \t\r\n"
+# control characters like raw newlines are allowed in strings, as models
+# generate them
+_DECODER = json.JSONDecoder(strict=False)
+# characters ending a number, ``true``, ``false`` or ``null``
+_PRIMITIVE_END = ",}]" + _WHITESPACE
+
+# the pseudo-tool the function-calling prompt asks for when answering directly
+FINAL_ANSWER = "Final Answer"
+
+
+class _Frame:
+    """An object or array the scanner is inside of."""
+
+    __slots__ = ("kind", "key", "state")
+
+    def __init__(self, kind: str) -> None:
+        self.kind = kind
+        self.key: Optional[str] = None
+        # objects: "key", "colon", "value" or "comma"; arrays: "value" or "comma"
+        self.state = "key" if kind == "{" else "value"
+
+
+class ToolCallStreamParser:
+    """Incremental parser of tool calls in streamed generated text.
+
+    Tool calls are generated as JSON objects of the form
+    ``{"type": "function", "function": {"name": ..., "arguments": ...}}``,
+    usually in fenced ``json`` code blocks. The text is scanned character by
+    character, so a tool call chunk carrying the name is emitted as soon as
+    the name is complete, followed by the raw text of the arguments as it is
+    generated. Tool execution can therefore start before the generation ends.
+
+    Calls of the ``Final Answer`` pseudo-tool are returned as content once
+    complete. Other text before the first tool call, including JSON that is
+    not a tool call, is returned as content as it arrives; text after a tool
+    call, like the closing fence or the end of text marker, is dropped.
+    """
+
+    def __init__(self) -> None:
+        self._held = ""
+        # whether any text other than leading whitespace was consumed
+        self._started = False
+        self._blocks = 0
+        self._index = 0
+        self._in_block = False
+        self._after_block = False
+        self._reset_block()
+
+    def _reset_block(self) -> None:
+        self._raw: List[str] = []
+        self._fenced = False
+        self._stack: List[_Frame] = []
+        self._complete = False
+        self._in_string = False
+        self._escape = False
+        self._string_is_key = False
+        self._key: List[str] = []
+        self._in_primitive = False
+        self._name_raw: Optional[List[str]] = None
+        self._name: Optional[str] = None
+        self._args: List[str] = []
+        self._args_depth: Optional[int] = None
+        self._args_done = False
+        self._emitted_args = 0
+        self._emitted_name = False
+        self._id = f"call_{uuid.uuid4().hex}"
+
+    @property
+    def done(self) -> bool:
+        """Whether a tool call or final answer was parsed completely."""
+        return self._blocks > 0
+
+    def feed(self, text: str) -> Tuple[str, List[ToolCallChunk]]:
+        """Consume the next piece of generated text.
+
+        Returns:
+            The content and the tool call chunks that became available.
+        """
+        content: List[str] = []
+        chunks: List[ToolCallChunk] = []
+        text = self._held + text
+        self._held = ""
+        position = 0
+        while position < len(text):
+            if self._in_block:
+                position = self._scan(text, position, content, chunks)
+            elif self._after_block:
+                position = self._skip_closing_fence(text, position, content)
+                if position < 0:
+                    break
+            else:
+                position = self._find_block(text, position, content)
+                if position < 0:
+                    break
+        if self._in_block:
+            self._emit_args(chunks)
+        return "".join(content), chunks
+
+    def flush(self) -> Tuple[str, List[ToolCallChunk]]:
+        """Finish parsing once the generation ended.
+
+        Returns:
+            The remaining content and tool call chunks. An unfinished tool
+            call that has not been emitted yet is returned as content.
+        """
+        content: List[str] = []
+        chunks: List[ToolCallChunk] = []
+        if self._in_block:
+            if self._emitted_name:
+                self._emit_args(chunks)
+            elif self._blocks == 0:
+                content.append("".join(self._raw))
+        elif self._blocks == 0:
+            content.append(self._held)
+        self._held = ""
+        self._in_block = self._after_block = False
+        self._reset_block()
+        return "".join(content), chunks
+
+    def _find_block(self, text: str, position: int, content: List[str]) -> int:
+        """Emit the text up to the next tool call and return where the call
+        starts, or -1 if more text is needed."""
+        if not self._started:
+            # an unfenced JSON object generated right away
+            start = len(text) - len(text[position:].lstrip(_WHITESPACE))
+            if start == len(text):
+                self._held = text[position:]
+                return -1
+            self._started = True
+            if text[start] == "{":
+                self._in_block = True
+                return start
+        fence = text.find(_FENCE, position)
+        if fence < 0:
+            # hold back what could be the start of a fence
+            keep = len(text) - len(text.rstrip("`"))
+            self._emit_content(text[position : len(text) - keep], content)
+            self._held = text[len(text) - keep :]
+            return -1
+        line_end = text.find("\n", fence)
+        if line_end < 0:
+            self._emit_content(text[position:fence], content)
+            self._held = text[fence:]
+            return -1
+        self._emit_content(text[position:fence], content)
+        if text[fence + len(_FENCE) : line_end].strip() not in ("", "json"):
+            # another kind of code block
+            self._emit_content(text[fence : line_end + 1], content)
+            return line_end + 1
+        self._in_block = True
+        self._fenced = True
+        self._raw.append(text[fence : line_end + 1])
+        return line_end + 1
+
+    def _emit_content(self, text: str, content: List[str]) -> None:
+        if text and self._blocks == 0:
+            content.append(text)
+
+    def _skip_closing_fence(self, text: str, position: int, content: List[str]) -> int:
+        """Skip the fence closing a JSON block and return where the text after
+        it starts, or -1 if more text is needed. The fence of a block that is
+        not a tool call is emitted as content."""
+        start = len(text) - len(text[position:].lstrip(_WHITESPACE))
+        if start == len(text) or (
+            text[start] == "`" and len(text) - start < len(_FENCE)
+        ):
+            self._held = text[position:]
+            return -1
+        self._after_block = False
+        end = start + len(_FENCE) if text.startswith(_FENCE, start) else start
+        self._emit_content(text[position:end], content)
+        return end
+
+    def _scan(
+        self,
+        text: str,
+        position: int,
+        content: List[str],
+        chunks: List[ToolCallChunk],
+    ) -> int:
+        """Scan the JSON of a tool call until it is complete or the text ends,
+        and return where scanning stopped."""
+        for position in range(position, len(text)):
+            char = text[position]
+            self._raw.append(char)
+            if not self._scan_char(char):
+                # not a JSON object after all
+                if self._blocks == 0:
+                    content.append("".join(self._raw))
+                self._in_block = False
+                self._reset_block()
+                return position + 1
+            if self._complete:
+                self._finish_block(content, chunks)
+                return position + 1
+        return len(text)
+
+    def _scan_char(self, char: str) -> bool:
+        """Advance the scanner by one character; ``False`` if the text is not a
+        JSON object."""
+        if self._in_string:
+            self._capture(char)
+            if self._name_raw is not None:
+                self._name_raw.append(char)
+            if self._escape:
+                self._escape = False
+            elif char == "\\":
+                self._escape = True
+            elif char == '"':
+                self._in_string = False
+                if self._string_is_key:
+                    self._stack[-1].key = "".join(self._key)
+                    self._stack[-1].state = "colon"
+                else:
+                    self._end_value()
+            elif self._string_is_key:
+                self._key.append(char)
+            return True
+
+        if self._in_primitive:
+            if char not in _PRIMITIVE_END:
+                self._capture(char)
+                return True
+            self._in_primitive = False
+            self._end_value()
+
+        if not self._stack:
+            if char in _WHITESPACE:
+                return True
+            if char != "{":
+                return False
+            self._stack.append(_Frame("{"))
+            return True
+
+        frame = self._stack[-1]
+        if frame.state == "value" and char not in _WHITESPACE:
+            if char != "]" or frame.kind != "[":
+                self._start_value(char)
+                return True
+        self._capture(char)
+        if char in _WHITESPACE:
+            pass
+        elif frame.state == "key":
+            if char == '"':
+                self._in_string = True
+                self._string_is_key = True
+                self._key = []
+            elif char == "}":
+                self._close()
+        elif frame.state == "colon":
+            if char == ":":
+                frame.state = "value"
+        elif char == ",":
+            frame.state = "key" if frame.kind == "{" else "value"
+        elif char in "}]":
+            self._close()
+        return True
+
+    def _path(self) -> Tuple[Optional[str], ...]:
+        return tuple(frame.key if frame.kind == "{" else None for frame in self._stack)
+
+    def _start_value(self, char: str) -> None:
+        path = self._path()
+        if path == ("function", "arguments") and not self._args_done:
+            self._args_depth = len(self._stack)
+        self._capture(char)
+        if char in "{[":
+            self._stack.append(_Frame(char))
+        elif char == '"':
+            self._in_string = True
+            self._string_is_key = False
+            if path == ("function", "name"):
+                self._name_raw = [char]
+        else:
+            self._in_primitive = True
+
+    def _close(self) -> None:
+        self._stack.pop()
+        if self._stack:
+            self._end_value()
+        else:
+            self._complete = True
+
+    def _end_value(self) -> None:
+        self._stack[-1].state = "comma"
+        if self._args_depth is not None and len(self._stack) == self._args_depth:
+            self._args_depth = None
+            self._args_done = True
+        if self._name_raw is not None:
+            try:
+                name = _DECODER.decode("".join(self._name_raw))
+            except json.JSONDecodeError:
+                name = None
+            self._name = name if isinstance(name, str) else None
+            self._name_raw = None
+
+    def _capture(self, char: str) -> None:
+        if self._args_depth is not None:
+            self._args.append(char)
+
+    def _emit_args(self, chunks: List[ToolCallChunk]) -> None:
+        """Emit the name of the tool call once known, then the arguments
+        generated since the last emitted chunk."""
+        if self._name is None or self._name == FINAL_ANSWER:
+            return
+        args = "".join(self._args[self._emitted_args :])
+        self._emitted_args = len(self._args)
+        if not self._emitted_name:
+            self._emitted_name = True
+            chunks.append(
+                ToolCallChunk(
+                    name=self._name, args=args, id=self._id, index=self._index
+                )
+            )
+        elif args:
+            chunks.append(
+                ToolCallChunk(name=None, args=args, id=None, index=self._index)
+            )
+
+    def _finish_block(self, content: List[str], chunks: List[ToolCallChunk]) -> None:
+        if self._name == FINAL_ANSWER:
+            content.append(_final_answer_output("".join(self._args)))
+        elif self._name is not None:
+            self._emit_args(chunks)
+            if not self._args:
+                chunks.append(
+                    ToolCallChunk(name=None, args="{}", id=None, index=self._index)
+                )
+            self._index += 1
+        else:
+            # not a tool call, so the text after it is content as well
+            self._emit_content("".join(self._raw), content)
+            self._in_block = False
+            self._after_block = self._fenced
+            self._reset_block()
+            return
+        self._blocks += 1
+        self._in_block = False
+        self._after_block = True
+        self._reset_block()
+
+
+def final_answer_output(arguments: Any) -> str:
+    """Return the output of the arguments of a ``Final Answer`` call."""
+    output = arguments.get("output") if isinstance(arguments, dict) else arguments
+    return output if isinstance(output, str) else json.dumps(output)
+
+
+def _final_answer_output(raw_arguments: str) -> str:
+    try:
+        arguments = _DECODER.decode(raw_arguments)
+    except json.JSONDecodeError:
+        return raw_arguments
+    return final_answer_output(arguments)
+
+
+def _json_start(text: str, position: int, end: int) -> int:
+    while position < end and text[position] in _WHITESPACE:
+        position += 1
+    return position
+
+
+def _decode_partial(raw: str, error: json.JSONDecodeError) -> Tuple[Any, Optional[str]]:
+    """Decode JSON cut off before its end, e.g. by ``max_new_tokens``, by
+    closing its open strings, arrays and objects."""
+    try:
+        return parse_partial_json(raw), None
+    except json.JSONDecodeError:
+        return None, str(error)
+
+
+def iter_json_blocks(text: str) -> Iterator[Tuple[str, Any, Optional[str]]]:
+    """Find the JSON values generated in fenced ``json`` code blocks, or
+    unfenced at the start of ``text``.
+
+    The text is scanned once: every value is decoded in place with a shared
+    decoder, so no fragments of the text are copied unless a value fails to
+    decode. Values that fail to decode, like ones cut off before their end,
+    are decoded as partial JSON.
+
+    Yields:
+        The raw text of every block, its decoded value and the decoding error,
+        if any.
+    """
+    position = _json_start(text, 0, len(text))
+    if text.startswith("{", position):
+        try:
+            value, end = _DECODER.raw_decode(text, position)
+        except json.JSONDecodeError as e:
+            raw = text[position:].rstrip()
+            yield (raw, *_decode_partial(raw, e))
+            return
+        yield text[position:end], value, None
+        position = end
+
+    while True:
+        fence = text.find(_FENCE, position)
+        if fence < 0:
+            return
+        line_end = text.find("\n", fence)
+        if line_end < 0:
+            return
+        if text[fence + len(_FENCE) : line_end].strip() not in ("", "json"):
+            # another kind of code block
+            close = text.find(_FENCE, line_end)
+            if close < 0:
+                return
+            position = close + len(_FENCE)
+            continue
+        start = _json_start(text, line_end + 1, len(text))
+        try:
+            value, end = _DECODER.raw_decode(text, start)
+        except json.JSONDecodeError as e:
+            close = text.find(_FENCE, start)
+            end = close if close >= 0 else len(text)
+            raw = text[start:end].rstrip()
+            yield (raw, *_decode_partial(raw, e))
+        else:
+            yield text[start:end], value, None
+            close = text.find(_FENCE, end)
+        if close < 0:
+            return
+        position = close + len(_FENCE)
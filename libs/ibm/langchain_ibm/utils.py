@@ -0,0 +1,1483 @@
+"""Shared helpers for IBM watsonx.ai integrations."""
+
+import asyncio
+import hashlib
+import json
+import logging
+import random
+import threading
+import time
+import weakref
+from contextlib import aclosing, nullcontext
+from datetime import datetime, timedelta, timezone
+from email.utils import parsedate_to_datetime
+from typing import (
+    TYPE_CHECKING,
+    Any,
+    AsyncGenerator,
+    Awaitable,
+    Callable,
+    Dict,
+    Generator,
+    Iterable,
+    List,
+    Optional,
+    Tuple,
+)
+
+import httpx
+import requests
+from requests.adapters import HTTPAdapter
+
+if TYPE_CHECKING:
+    # ibm_watsonx_ai is imported on first use, as importing it takes a while
+    from ibm_watsonx_ai import APIClient, Credentials  # type: ignore
+    from ibm_watsonx_ai.foundation_models import ModelInference  # type: ignore
+    from ibm_watsonx_ai.foundation_models.embeddings import (  # type: ignore
+        Embeddings,
+    )
+
+logger = logging.getLogger(__name__)
+
+# held weakly, so a client is released once no model uses it anymore
+_api_clients: "weakref.WeakValueDictionary[str, APIClient]" = (
+    weakref.WeakValueDictionary()
+)
+_api_clients_lock = threading.Lock()
+
+# guards the lazy creation of the SDK models wrapped by the LangChain classes
+model_init_lock = threading.RLock()
+
+# shared tokens are renewed this many seconds before the SDK would renew them
+# on a request, plus a random jitter so clients do not refresh in lockstep
+_TOKEN_REFRESH_MARGIN = 300.0
+_TOKEN_REFRESH_JITTER = 60.0
+# delay before retrying a failed or premature refresh
+_TOKEN_REFRESH_RETRY = 30.0
+
+# shared async clients, one set per event loop since they cannot cross loops
+_async_http_clients: "weakref.WeakKeyDictionary[Any, Dict[Tuple, Any]]" = (
+    weakref.WeakKeyDictionary()
+)
+
+
+def _import_numpy() -> Any:
+    try:
+        import numpy as np
+    except ImportError as e:
+        raise ImportError(
+            "Could not import numpy python package. "
+            "Please install it with `pip install numpy`."
+        ) from e
+    return np
+
+
+def get_api_client(
+    credentials: "Credentials", project_id: str = "", space_id: str = ""
+) -> "APIClient":
+    """Return the process-wide ``APIClient`` for a set of credentials and scope.
+
+    Model instances created from equal credentials, project/space and
+    ``verify`` settings share one authenticated client, so the IAM token is
+    exchanged and refreshed once for all of them. The client is kept only as
+    long as a model uses it.
+
+    Args:
+        credentials: Credentials to authenticate with.
+        project_id: ID of the Watson Studio project.
+        space_id: ID of the Watson Studio space.
+
+    Returns:
+        The shared ``APIClient``.
+    """
+    from ibm_watsonx_ai import APIClient  # type: ignore
+    from ibm_watsonx_ai.wml_client_error import (  # type: ignore
+        InvalidMultipleArguments,
+    )
+
+    if not project_id and not space_id:
+        raise InvalidMultipleArguments(
+            params_names_list=["space_id", "project_id"],
+            reason="None of the arguments were provided.",
+        )
+    identity = json.dumps(
+        {
+            "credentials": credentials.to_dict(),
+            "project_id": project_id,
+            "space_id": space_id,
+        },
+        sort_keys=True,
+        default=str,
+    )
+    key = hashlib.sha256(identity.encode("utf-8")).hexdigest()
+    with _api_clients_lock:
+        api_client = _api_clients.get(key)
+        if api_client is None:
+            api_client = _api_clients[key] = APIClient(credentials)
+            created = True
+        else:
+            created = False
+    if created:
+        weakref.finalize(api_client, _token_refresher.cancel, key)
+        _token_refresher.schedule(key, api_client)
+    return api_client
+
+
+def clear_api_clients() -> None:
+    """Forget all shared ``APIClient`` instances, e.g. after rotating keys."""
+    with _api_clients_lock:
+        _api_clients.clear()
+    _token_refresher.clear()
+
+
+def _next_token_refresh(api_client: "APIClient") -> Optional[float]:
+    """Return when the token of a client should be renewed in the background,
+    or ``None`` if it cannot be renewed."""
+    service_instance = api_client.service_instance
+    if api_client.proceed or not service_instance._is_token_refresh_possible():
+        return None
+    # the windows in which ServiceInstance._get_token renews the token
+    if api_client.ICP_PLATFORM_SPACES:
+        window = timedelta(minutes=50)
+    elif api_client._is_IAM():
+        window = service_instance._min_expiration_time
+    else:
+        window = timedelta(minutes=30)
+    refresh_at = (
+        service_instance._get_expiration_datetime() - window
+    ).timestamp() - random.uniform(
+        _TOKEN_REFRESH_MARGIN, _TOKEN_REFRESH_MARGIN + _TOKEN_REFRESH_JITTER
+    )
+    return max(refresh_at, time.time() + _TOKEN_REFRESH_RETRY)
+
+
+def _refresh_token(api_client: "APIClient") -> None:
+    """Renew the token of a client the way ``ServiceInstance._get_token`` does
+    once it is about to expire.
+
+    This mirrors private token internals of the SDK, which is why
+    ``ibm-watsonx-ai`` is pinned to the releases it was checked against.
+    """
+    service_instance = api_client.service_instance
+    if api_client.ICP_PLATFORM_SPACES:
+        api_client.token = service_instance._get_cpd_token_from_request()
+        api_client.repository._refresh_repo_client()
+    elif api_client._is_IAM():
+        api_client.token = service_instance._get_IAM_token()
+        api_client.repository._refresh_repo_client()
+    else:
+        api_client.repository._refresh_repo_client()
+        service_instance._refresh_token()
+
+
+class _TokenRefresher:
+    """Daemon thread renewing the tokens of shared ``APIClient`` instances
+    ahead of expiry, so requests never wait for authentication.
+
+    Clients are refreshed only while they are in use: the refreshes of a
+    client are cancelled once it is released, and the thread holds no
+    reference to a client between refreshes.
+    """
+
+    def __init__(self) -> None:
+        self._due: Dict[str, float] = {}
+        self._condition = threading.Condition()
+        self._thread: Optional[threading.Thread] = None
+
+    def schedule(self, key: str, api_client: "APIClient") -> None:
+        """Schedule the next background refresh of a shared client."""
+        refresh_at = _next_token_refresh(api_client)
+        if refresh_at is None:
+            return
+        with self._condition:
+            self._due[key] = refresh_at
+            if self._thread is None or not self._thread.is_alive():
+                self._thread = threading.Thread(
+                    target=self._run, name="watsonx-token-refresher", daemon=True
+                )
+                self._thread.start()
+            self._condition.notify()
+
+    def cancel(self, key: str) -> None:
+        """Cancel the refreshes of a released client, unless a new client was
+        shared under the same key since."""
+        with self._condition:
+            if _api_clients.get(key) is None:
+                self._due.pop(key, None)
+
+    def clear(self) -> None:
+        """Cancel all scheduled refreshes."""
+        with self._condition:
+            self._due.clear()
+            self._condition.notify()
+
+    def _run(self) -> None:
+        while True:
+            with self._condition:
+                now = time.time()
+                due_keys = [key for key, due in self._due.items() if due <= now]
+                if not due_keys:
+                    self._condition.wait(
+                        min(self._due.values()) - now if self._due else None
+                    )
+                    continue
+                for key in due_keys:
+                    del self._due[key]
+            for key in due_keys:
+                self._refresh(key)
+
+    def _refresh(self, key: str) -> None:
+        """Renew the token of a shared client and schedule its next refresh,
+        unless the client was released."""
+        with _api_clients_lock:
+            api_client = _api_clients.get(key)
+        if api_client is None:
+            return
+        try:
+            _refresh_token(api_client)
+        except Exception as e:
+            # the SDK still renews the token lazily on the next request
+            logger.warning(f"Background token refresh failed: {e}")
+            with self._condition:
+                self._due[key] = time.time() + _TOKEN_REFRESH_RETRY
+            return
+        self.schedule(key, api_client)
+
+
+_token_refresher = _TokenRefresher()
+
+
+class _TokenBucket:
+    """Token bucket refilled at a constant rate up to its capacity.
+
+    Amounts are reserved up front and may overdraw the bucket; the caller then
+    waits until the refill would have covered the debt. Waiters are therefore
+    served in the order they reserved.
+    """
+
+    def __init__(self, rate: float, capacity: float) -> None:
+        self.rate = rate
+        self.capacity = capacity
+        self._tokens = capacity
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def reserve(self, amount: float) -> float:
+        """Take ``amount`` from the bucket and return the seconds to wait."""
+        with self._lock:
+            now = time.monotonic()
+            self._tokens = min(
+                self.capacity, self._tokens + (now - self._updated) * self.rate
+            )
+            self._updated = now
+            self._tokens -= amount
+            return max(0.0, -self._tokens / self.rate)
+
+
+class RateLimiter:
+    """Client-side rate limiter for requests per second and tokens per minute.
+
+    Both limits are token buckets, allowing bursts up to one second worth of
+    requests and one minute worth of tokens. Share one instance between
+    models to keep them together under a common quota.
+
+    Example:
+        .. code-block:: python
+
+            from langchain_ibm import WatsonxLLM
+            from langchain_ibm.utils import RateLimiter
+
+            watsonx_llm = WatsonxLLM(
+                model_id="google/flan-ul2",
+                url="https://us-south.ml.cloud.ibm.com",
+                project_id="*****",
+                rate_limiter=RateLimiter(
+                    requests_per_second=8, tokens_per_minute=100_000
+                ),
+            )
+    """
+
+    def __init__(
+        self,
+        requests_per_second: Optional[float] = None,
+        tokens_per_minute: Optional[float] = None,
+    ) -> None:
+        """Initialize the limiter.
+
+        Args:
+            requests_per_second: Maximum sustained number of requests per second.
+            tokens_per_minute: Maximum sustained number of input and generated
+                tokens per minute.
+        """
+        self.requests_per_second = requests_per_second
+        self.tokens_per_minute = tokens_per_minute
+        self._requests = (
+            _TokenBucket(requests_per_second, max(1.0, requests_per_second))
+            if requests_per_second
+            else None
+        )
+        self._tokens = (
+            _TokenBucket(tokens_per_minute / 60, tokens_per_minute)
+            if tokens_per_minute
+            else None
+        )
+
+    def _reserve(self, tokens: int) -> float:
+        delay = 0.0
+        if self._requests is not None:
+            delay = self._requests.reserve(1)
+        if self._tokens is not None:
+            delay = max(delay, self._tokens.reserve(tokens))
+        return delay
+
+    def acquire(self, tokens: int = 0) -> None:
+        """Block until a request of an estimated ``tokens`` tokens may be sent."""
+        delay = self._reserve(tokens)
+        if delay:
+            time.sleep(delay)
+
+    async def aacquire(self, tokens: int = 0) -> None:
+        """Wait until a request of an estimated ``tokens`` tokens may be sent."""
+        delay = self._reserve(tokens)
+        if delay:
+            await asyncio.sleep(delay)
+
+    def adjust(self, tokens: int) -> None:
+        """Charge ``tokens`` more (or, if negative, fewer) tokens than acquired,
+        once the actual usage of a request is known."""
+        if self._tokens is not None and tokens:
+            self._tokens.reserve(tokens)
+
+
+class RetryPolicy:
+    """Retry policy for throttled and transient failures of watsonx.ai requests.
+
+    Failed attempts are retried after an exponential backoff with full jitter,
+    so concurrent clients spread their retries instead of retrying in lockstep.
+    A ``Retry-After`` header sent by the service takes precedence over the
+    backoff.
+
+    Responses with one of ``retry_status_codes`` are always retried, since the
+    service did not return a result. Transport errors are retried only when
+    the request could not have reached the service, unless the request is
+    idempotent: repeating an embedding or greedy generation request after a
+    dropped connection yields the same result, while a sampled generation
+    would not. Streams are never retried once the first event was received.
+
+    Example:
+        .. code-block:: python
+
+            from langchain_ibm import WatsonxLLM
+            from langchain_ibm.utils import RetryPolicy
+
+            watsonx_llm = WatsonxLLM(
+                model_id="google/flan-ul2",
+                url="https://us-south.ml.cloud.ibm.com",
+                project_id="*****",
+                retry_policy=RetryPolicy(max_retries=5, max_delay=30),
+            )
+    """
+
+    def __init__(
+        self,
+        max_retries: int = 3,
+        initial_delay: float = 1.0,
+        max_delay: float = 60.0,
+        multiplier: float = 2.0,
+        retry_status_codes: Iterable[int] = (429, 500, 502, 503, 504, 520),
+        retry_non_idempotent: bool = False,
+    ) -> None:
+        """Initialize the policy.
+
+        Args:
+            max_retries: Maximum number of retries after the first attempt.
+            initial_delay: Upper bound in seconds of the first backoff.
+            max_delay: Upper bound in seconds of any backoff, including the
+                delays requested by ``Retry-After``.
+            multiplier: Factor the backoff bound grows by with every retry.
+            retry_status_codes: HTTP status codes that are retried.
+            retry_non_idempotent: Whether to also retry non-idempotent requests
+                after a transport error, when the service may have processed
+                them.
+        """
+        if max_retries < 0:
+            raise ValueError(f"`max_retries` must not be negative, got {max_retries}.")
+        self.max_retries = max_retries
+        self.initial_delay = initial_delay
+        self.max_delay = max_delay
+        self.multiplier = multiplier
+        self.retry_status_codes = frozenset(retry_status_codes)
+        self.retry_non_idempotent = retry_non_idempotent
+
+    def should_retry_status(self, attempt: int, status_code: int) -> bool:
+        """Whether a response of ``status_code`` to ``attempt`` is retried."""
+        return attempt < self.max_retries and status_code in self.retry_status_codes
+
+    def should_retry_error(
+        self, attempt: int, error: Exception, idempotent: bool
+    ) -> bool:
+        """Whether a transport ``error`` raised by ``attempt`` is retried."""
+        if attempt >= self.max_retries:
+            return False
+        if isinstance(
+            error,
+            (httpx.ConnectError, httpx.ConnectTimeout, requests.ConnectTimeout),
+        ):
+            return True
+        return (idempotent or self.retry_non_idempotent) and isinstance(
+            error,
+            (
+                httpx.TransportError,
+                requests.ConnectionError,
+                requests.Timeout,
+                requests.exceptions.ChunkedEncodingError,
+            ),
+        )
+
+    def delay(self, attempt: int, retry_after: Optional[str] = None) -> float:
+        """Return the seconds to wait before retrying ``attempt``.
+
+        Args:
+            attempt: Zero-based number of the failed attempt.
+            retry_after: Value of the ``Retry-After`` header of the response,
+                either in seconds or as an HTTP date.
+        """
+        server_delay = _parse_retry_after(retry_after)
+        if server_delay is not None:
+            return min(server_delay, self.max_delay)
+        bound = min(self.max_delay, self.initial_delay * self.multiplier**attempt)
+        return random.uniform(0, bound)
+
+
+def _parse_retry_after(value: Optional[str]) -> Optional[float]:
+    if not value:
+        return None
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        date = parsedate_to_datetime(value)
+    except (TypeError, ValueError):
+        return None
+    if date.tzinfo is None:
+        date = date.replace(tzinfo=timezone.utc)
+    return max(0.0, (date - datetime.now(timezone.utc)).total_seconds())
+
+
+class AdaptiveConcurrencyLimiter:
+    """Concurrency limit adapting to throttling by the service.
+
+    The limit is halved whenever a request is throttled with a ``429`` or
+    ``503`` response, at most once per ``cooldown`` seconds so that a burst of
+    throttled requests counts as a single signal, and grows back by one
+    request for every ``limit`` successful requests up to ``max_concurrency``.
+    Requests beyond the current limit wait for a slot. Share one instance
+    between models that draw on the same quota.
+
+    Example:
+        .. code-block:: python
+
+            from langchain_ibm import WatsonxLLM
+            from langchain_ibm.utils import AdaptiveConcurrencyLimiter
+
+            watsonx_llm = WatsonxLLM(
+                model_id="google/flan-ul2",
+                url="https://us-south.ml.cloud.ibm.com",
+                project_id="*****",
+                concurrency_limiter=AdaptiveConcurrencyLimiter(max_concurrency=16),
+            )
+    """
+
+    throttle_status_codes = frozenset({429, 503})
+
+    def __init__(
+        self,
+        max_concurrency: int = 10,
+        min_concurrency: int = 1,
+        cooldown: float = 1.0,
+    ) -> None:
+        """Initialize the limiter.
+
+        Args:
+            max_concurrency: Initial and maximum number of requests in flight.
+            min_concurrency: Number of requests in flight the limit never drops
+                below.
+            cooldown: Minimum seconds between two decreases of the limit.
+        """
+        if not 1 <= min_concurrency <= max_concurrency:
+            raise ValueError(
+                "Expected 1 <= `min_concurrency` <= `max_concurrency`, "
+                f"got {min_concurrency} and {max_concurrency}."
+            )
+        self.max_concurrency = max_concurrency
+        self.min_concurrency = min_concurrency
+        self.cooldown = cooldown
+        self._limit = float(max_concurrency)
+        self._in_flight = 0
+        self._last_decrease = -float("inf")
+        self._condition = threading.Condition()
+        self._async_waiters: List[Tuple[asyncio.AbstractEventLoop, asyncio.Future]] = []
+
+    @property
+    def limit(self) -> int:
+        """The current number of requests allowed in flight."""
+        return int(self._limit)
+
+    def acquire(self) -> None:
+        """Block until a request may be sent."""
+        with self._condition:
+            while self._in_flight >= self.limit:
+                self._condition.wait()
+            self._in_flight += 1
+
+    async def aacquire(self) -> None:
+        """Wait until a request may be sent."""
+        loop = asyncio.get_running_loop()
+        while True:
+            with self._condition:
+                if self._in_flight < self.limit:
+                    self._in_flight += 1
+                    return
+                waiter = loop.create_future()
+                self._async_waiters.append((loop, waiter))
+            await waiter
+
+    def release(self) -> None:
+        """Free the slot of a finished request."""
+        with self._condition:
+            self._in_flight -= 1
+            self._notify()
+
+    def record(self, status_code: int) -> None:
+        """Adapt the limit to the status code of a response."""
+        with self._condition:
+            if status_code in self.throttle_status_codes:
+                now = time.monotonic()
+                if now - self._last_decrease >= self.cooldown:
+                    self._last_decrease = now
+                    self._limit = max(float(self.min_concurrency), self._limit / 2)
+            elif status_code < 400 and self._limit < self.max_concurrency:
+                self._limit = min(
+                    float(self.max_concurrency), self._limit + 1 / self._limit
+                )
+                self._notify()
+
+    def _notify(self) -> None:
+        self._condition.notify_all()
+        for loop, waiter in self._async_waiters:
+            loop.call_soon_threadsafe(_resolve_waiter, waiter)
+        self._async_waiters.clear()
+
+    def __enter__(self) -> None:
+        self.acquire()
+
+    def __exit__(self, *exc_info: Any) -> None:
+        self.release()
+
+    async def __aenter__(self) -> None:
+        await self.aacquire()
+
+    async def __aexit__(self, *exc_info: Any) -> None:
+        self.release()
+
+
+def _resolve_waiter(waiter: asyncio.Future) -> None:
+    if not waiter.done():
+        waiter.set_result(None)
+
+
+def _send_with_retry(
+    send: Callable[[], requests.Response],
+    retry_policy: Optional[RetryPolicy] = None,
+    concurrency_limiter: Optional[AdaptiveConcurrencyLimiter] = None,
+    idempotent: bool = False,
+) -> requests.Response:
+    """Call ``send`` until it returns a response that is not retried."""
+    attempt = 0
+    while True:
+        try:
+            response = send()
+        except Exception as e:
+            if retry_policy is None or not retry_policy.should_retry_error(
+                attempt, e, idempotent
+            ):
+                raise
+            delay = retry_policy.delay(attempt)
+            logger.debug("Retrying request in %.2fs after %r", delay, e)
+        else:
+            if concurrency_limiter is not None:
+                concurrency_limiter.record(response.status_code)
+            if retry_policy is None or not retry_policy.should_retry_status(
+                attempt, response.status_code
+            ):
+                return response
+            delay = retry_policy.delay(attempt, response.headers.get("Retry-After"))
+            response.close()
+            logger.debug(
+                "Retrying request in %.2fs after status %s",
+                delay,
+                response.status_code,
+            )
+        time.sleep(delay)
+        attempt += 1
+
+
+async def _asend_with_retry(
+    send: Callable[[], Awaitable[httpx.Response]],
+    retry_policy: Optional[RetryPolicy] = None,
+    concurrency_limiter: Optional[AdaptiveConcurrencyLimiter] = None,
+    idempotent: bool = False,
+) -> httpx.Response:
+    """Await ``send`` until it returns a response that is not retried."""
+    attempt = 0
+    while True:
+        try:
+            response = await send()
+        except Exception as e:
+            if retry_policy is None or not retry_policy.should_retry_error(
+                attempt, e, idempotent
+            ):
+                raise
+            delay = retry_policy.delay(attempt)
+            logger.debug("Retrying request in %.2fs after %r", delay, e)
+        else:
+            if concurrency_limiter is not None:
+                concurrency_limiter.record(response.status_code)
+            if retry_policy is None or not retry_policy.should_retry_status(
+                attempt, response.status_code
+            ):
+                return response
+            delay = retry_policy.delay(attempt, response.headers.get("Retry-After"))
+            await response.aclose()
+            logger.debug(
+                "Retrying request in %.2fs after status %s",
+                delay,
+                response.status_code,
+            )
+        await asyncio.sleep(delay)
+        attempt += 1
+
+
+class _TimeoutHTTPAdapter(HTTPAdapter):
+    """``HTTPAdapter`` applying a default timeout to every request it sends."""
+
+    def __init__(self, timeout: Optional[float] = None, **kwargs: Any) -> None:
+        self.timeout = timeout
+        super().__init__(**kwargs)
+
+    def send(  # type: ignore[override]
+        self, request: requests.PreparedRequest, **kwargs: Any
+    ) -> requests.Response:
+        if kwargs.get("timeout") is None:
+            kwargs["timeout"] = self.timeout
+        return super().send(request, **kwargs)
+
+
+def configure_http_session(
+    session: requests.Session,
+    max_connections: Optional[int] = None,
+    timeout: Optional[float] = None,
+) -> None:
+    """Resize the connection pool of a ``requests`` session and set its timeout.
+
+    The SDK keeps one persistent session per model with a pool of 10
+    connections. Connections are kept alive and reused by later requests.
+
+    Args:
+        session: The session to configure.
+        max_connections: Maximum number of pooled connections per host.
+        timeout: Timeout in seconds of a single request.
+    """
+    if max_connections is None and timeout is None:
+        return
+    pool_size = max_connections or requests.adapters.DEFAULT_POOLSIZE
+    for prefix in ("http://", "https://"):
+        session.mount(
+            prefix,
+            _TimeoutHTTPAdapter(
+                timeout=timeout,
+                pool_block=True,
+                pool_connections=pool_size,
+                pool_maxsize=pool_size,
+            ),
+        )
+
+
+def get_async_http_client(
+    max_connections: Optional[int] = None,
+    keepalive_expiry: Optional[float] = None,
+    http2: bool = False,
+    timeout: Optional[float] = None,
+) -> httpx.AsyncClient:
+    """Return the shared ``httpx.AsyncClient`` of the running event loop.
+
+    Asynchronous calls with equal settings share one client, so TLS
+    connections are kept alive and reused across requests instead of being
+    opened for every call. Close the clients with
+    ``aclose_async_http_clients`` before the event loop shuts down.
+
+    Args:
+        max_connections: Maximum number of concurrent connections.
+        keepalive_expiry: Seconds an idle connection is kept open for reuse.
+        http2: Whether to negotiate HTTP/2. Requires the ``h2`` package.
+        timeout: Timeout in seconds of a single request.
+
+    Returns:
+        The shared client, bound to the running event loop.
+    """
+    loop = asyncio.get_running_loop()
+    key = (max_connections, keepalive_expiry, http2, timeout)
+    clients = _async_http_clients.setdefault(loop, {})
+    client = clients.get(key)
+    if client is not None and not client.is_closed:
+        return client
+    from ibm_watsonx_ai._wrappers.requests import get_async_client  # type: ignore
+
+    # fall back to the httpx defaults
+    limits = httpx.Limits(
+        max_connections=max_connections or 100,
+        max_keepalive_connections=max_connections or 20,
+        keepalive_expiry=keepalive_expiry if keepalive_expiry is not None else 5.0,
+    )
+    client = get_async_client(limits=limits, http2=http2)
+    if timeout is not None:
+        client.timeout = httpx.Timeout(timeout)
+    clients[key] = client
+    return client
+
+
+async def aclose_async_http_clients() -> None:
+    """Close the shared ``httpx.AsyncClient`` objects of the running event loop.
+
+    Call it before the event loop shuts down, e.g. at the end of the
+    coroutine run by ``asyncio.run``, so that the kept-alive connections are
+    closed rather than left to the garbage collector. Clients requested
+    afterwards are created anew.
+
+    Example:
+        .. code-block:: python
+
+            from langchain_ibm.utils import aclose_async_http_clients
+
+            async def main() -> None:
+                try:
+                    await chat.ainvoke("What is 2+2?")
+                finally:
+                    await aclose_async_http_clients()
+    """
+    clients = _async_http_clients.pop(asyncio.get_running_loop(), {})
+    await asyncio.gather(
+        *(client.aclose() for client in clients.values()), return_exceptions=True
+    )
+
+
+class StopSequenceMatcher:
+    """Finds stop sequences in text generated in chunks.
+
+    The end of a chunk that could be the start of a stop sequence is held back
+    until the next chunk tells whether it is, so stop sequences split across
+    chunks are found as well. Only the last ``len(stop sequence) - 1``
+    characters are ever kept, so every chunk is searched once.
+    """
+
+    def __init__(
+        self, stop_sequences: Iterable[str], include_stop_sequence: bool = True
+    ) -> None:
+        """Initialize the matcher.
+
+        Args:
+            stop_sequences: The sequences to stop the generation at.
+            include_stop_sequence: Whether the matched stop sequence is kept at
+                the end of the text, as the service does by default.
+        """
+        self.stop_sequences = [stop for stop in stop_sequences if stop]
+        self.include_stop_sequence = include_stop_sequence
+        self.stopped = False
+        self._held = ""
+
+    def feed(self, text: str, final: bool = False) -> str:
+        """Return the text of the next chunk that is known to precede any stop
+        sequence, up to and including the first stop sequence found.
+
+        Args:
+            text: The next chunk of generated text.
+            final: Whether the chunk is the last one, so that no text is held
+                back.
+        """
+        if self.stopped:
+            return ""
+        text = self._held + text
+        self._held = ""
+        match: Optional[Tuple[int, str]] = None
+        for stop in self.stop_sequences:
+            position = text.find(stop)
+            if position >= 0 and (
+                match is None
+                or position < match[0]
+                or (position == match[0] and len(stop) > len(match[1]))
+            ):
+                match = (position, stop)
+        if match is not None:
+            self.stopped = True
+            position, stop = match
+            return text[: position + (len(stop) if self.include_stop_sequence else 0)]
+        if not final:
+            held = self._partial_match(text)
+            if held:
+                self._held = text[-held:]
+                text = text[:-held]
+        return text
+
+    def _partial_match(self, text: str) -> int:
+        """Return the length of the longest end of ``text`` that starts a stop
+        sequence."""
+        longest = 0
+        for stop in self.stop_sequences:
+            for size in range(min(len(stop) - 1, len(text)), longest, -1):
+                if text.endswith(stop[:size]):
+                    longest = size
+                    break
+        return longest
+
+
+def _stop_sequence_matcher(payload: Dict[str, Any]) -> Optional[StopSequenceMatcher]:
+    parameters = payload.get("parameters") or {}
+    if not parameters.get("stop_sequences"):
+        return None
+    return StopSequenceMatcher(
+        parameters["stop_sequences"],
+        include_stop_sequence=parameters.get("include_stop_sequence", True),
+    )
+
+
+def _match_stop_sequences(
+    event: Dict[str, Any], stop_matcher: StopSequenceMatcher
+) -> Dict[str, Any]:
+    """Cut the text of a stream event at the first stop sequence."""
+    results = event.get("results")
+    if not results:
+        return event
+    result = results[0]
+    finished = result.get("stop_reason", "not_finished") != "not_finished"
+    result = result | {
+        "generated_text": stop_matcher.feed(
+            result.get("generated_text") or "", final=finished
+        )
+    }
+    if stop_matcher.stopped:
+        result["stop_reason"] = "stop_sequence"
+    return event | {"results": [result, *results[1:]]}
+
+
+def _stop_matcher_rest(
+    stop_matcher: Optional[StopSequenceMatcher],
+) -> Optional[Dict[str, Any]]:
+    """Return an event with the text held back when the stream ended without
+    a last event."""
+    if stop_matcher is None:
+        return None
+    text = stop_matcher.feed("", final=True)
+    if not text:
+        return None
+    return {"results": [{"generated_text": text, "stop_reason": "not_finished"}]}
+
+
+class StreamMetrics:
+    """Latency of a streamed generation.
+
+    Times are measured on the client, in seconds, from when the request is
+    about to be sent. A stream event may carry more than one token, so the
+    inter-token latency is the gap between events carrying generated text.
+    Token counts are the ones reported by the service, if any.
+
+    Example:
+        .. code-block:: python
+
+            from prometheus_client import Histogram
+
+            ttft = Histogram("watsonx_ttft_seconds", "TTFT", ["model_id"])
+
+            def record(metrics: StreamMetrics) -> None:
+                if metrics.time_to_first_token is not None:
+                    ttft.labels(metrics.model_id).observe(
+                        metrics.time_to_first_token
+                    )
+
+            watsonx_llm = WatsonxLLM(..., stream_metrics_callback=record)
+    """
+
+    def __init__(self, model_id: Optional[str] = None) -> None:
+        self.model_id = model_id
+        self.start = time.perf_counter()
+        self.end: Optional[float] = None
+        self.first_token: Optional[float] = None
+        self.last_token: Optional[float] = None
+        self.events = 0
+        self.max_inter_token_latency = 0.0
+        self.generated_token_count: Optional[int] = None
+        self.input_token_count: Optional[int] = None
+        self._inter_token_latency_sum = 0.0
+
+    def record(self, event: Dict[str, Any]) -> None:
+        """Record a stream event as it is received."""
+        now = time.perf_counter()
+        results = event.get("results") or [{}]
+        result = results[0]
+        if result.get("generated_text"):
+            if self.last_token is None:
+                self.first_token = now
+            else:
+                latency = now - self.last_token
+                self._inter_token_latency_sum += latency
+                self.max_inter_token_latency = max(
+                    self.max_inter_token_latency, latency
+                )
+            self.last_token = now
+            self.events += 1
+        # the counts of an event cover the generation so far
+        if result.get("generated_token_count") is not None:
+            self.generated_token_count = result["generated_token_count"]
+        if result.get("input_token_count") is not None:
+            self.input_token_count = result["input_token_count"]
+
+    def finish(self) -> None:
+        """Record the end of the stream."""
+        if self.end is None:
+            self.end = time.perf_counter()
+
+    @property
+    def duration(self) -> float:
+        """Time until the end of the stream, or until now if not ended."""
+        end = self.end if self.end is not None else time.perf_counter()
+        return end - self.start
+
+    @property
+    def time_to_first_token(self) -> Optional[float]:
+        """Time until the first generated text was received."""
+        if self.first_token is None:
+            return None
+        return self.first_token - self.start
+
+    @property
+    def mean_inter_token_latency(self) -> Optional[float]:
+        """Mean gap between the events carrying generated text."""
+        if self.events < 2:
+            return None
+        return self._inter_token_latency_sum / (self.events - 1)
+
+    @property
+    def tokens_per_second(self) -> Optional[float]:
+        """Generated tokens per second over the whole stream, counting one
+        token per event if the service reports no token counts."""
+        tokens = (
+            self.generated_token_count
+            if self.generated_token_count is not None
+            else self.events
+        )
+        duration = self.duration
+        return tokens / duration if tokens and duration > 0 else None
+
+    def to_dict(self) -> Dict[str, Any]:
+        """Return the metrics as a dictionary, e.g. for ``generation_info``."""
+        return {
+            "time_to_first_token": self.time_to_first_token,
+            "mean_inter_token_latency": self.mean_inter_token_latency,
+            "max_inter_token_latency": self.max_inter_token_latency,
+            "tokens_per_second": self.tokens_per_second,
+            "duration": self.duration,
+            "generated_token_count": self.generated_token_count,
+            "input_token_count": self.input_token_count,
+        }
+
+
+def _report_stream_metrics(
+    metrics: StreamMetrics, callback: Optional[Callable[[StreamMetrics], Any]]
+) -> None:
+    """Finish ``metrics`` and pass them to ``callback``, if given."""
+    metrics.finish()
+    if callback is None:
+        return
+    try:
+        callback(metrics)
+    except Exception as e:
+        # metrics must not break the generation they measure
+        logger.warning(f"Stream metrics callback failed: {e}")
+
+
+def _prepare_generation_request(
+    watsonx_model: "ModelInference",
+    prompt: Optional[str],
+    params: Optional[Dict[str, Any]] = None,
+    stream: bool = False,
+    guardrails: bool = False,
+    guardrails_hap_params: Optional[Dict[str, Any]] = None,
+    guardrails_pii_params: Optional[Dict[str, Any]] = None,
+    validate_prompt_variables: bool = True,
+    concurrency_limit: Optional[int] = None,
+    async_mode: bool = False,
+) -> Tuple[str, Dict[str, Any]]:
+    """Build the url and payload the SDK would send for a generation request.
+
+    The keyword arguments of ``ModelInference.generate`` are accepted. The
+    prompt variables of prompt template deployments are validated like the
+    SDK does. ``concurrency_limit`` and ``async_mode`` only apply to lists of
+    prompts, which are sent one request per prompt here, so they are ignored.
+    """
+    if async_mode:
+        logger.warning(
+            "`async_mode` is ignored: prompts are sent one request each and "
+            "their responses are returned in order."
+        )
+    api_client = watsonx_model._client
+    href_definitions = api_client.service_instance._href_definitions
+    item = "text_stream" if stream else "text"
+
+    if watsonx_model.deployment_id:
+        if stream and api_client._use_fm_ga_api:
+            url = href_definitions.get_fm_deployment_generation_stream_href(
+                deployment_id=watsonx_model.deployment_id
+            )
+        else:
+            url = href_definitions.get_fm_deployment_generation_href(
+                deployment_id=watsonx_model.deployment_id, item=item
+            )
+    elif stream and api_client._use_fm_ga_api:
+        url = href_definitions.get_fm_generation_stream_href()
+    else:
+        url = href_definitions.get_fm_generation_href(item)
+
+    inference = watsonx_model._inference
+    if watsonx_model.deployment_id:
+        prompt_required = inference._deployment_type_validation(
+            params, validate_prompt_variables
+        )
+        inference._validate_type(prompt, "prompt", str, prompt_required)
+    prepare_payload = (
+        inference._prepare_inference_payload
+        if api_client._use_fm_ga_api
+        else inference._prepare_beta_inference_payload
+    )
+    payload = prepare_payload(
+        prompt,
+        params=params,
+        guardrails=guardrails,
+        guardrails_hap_params=guardrails_hap_params,
+        guardrails_pii_params=guardrails_pii_params,
+    )
+    return url, payload
+
+
+def _is_idempotent_generation(payload: Dict[str, Any]) -> bool:
+    """Whether repeating a generation request yields the same result."""
+    decoding_method = (payload.get("parameters") or {}).get("decoding_method")
+    return getattr(decoding_method, "value", decoding_method) != "sample"
+
+
+def _limited(
+    concurrency_limiter: Optional[AdaptiveConcurrencyLimiter],
+) -> Any:
+    return concurrency_limiter if concurrency_limiter is not None else nullcontext()
+
+
+def _parse_stream_line(line: str) -> Optional[Dict[str, Any]]:
+    from ibm_watsonx_ai.wml_client_error import WMLClientError  # type: ignore
+
+    if "generated_text" not in line:
+        return None
+    data = line.replace("data: ", "", 1)
+    try:
+        return json.loads(data)
+    except json.JSONDecodeError:
+        raise WMLClientError(f"Could not parse {data} as json")
+
+
+def generate(
+    watsonx_model: "ModelInference",
+    prompt: Optional[str],
+    params: Optional[Dict[str, Any]] = None,
+    retry_policy: Optional[RetryPolicy] = None,
+    concurrency_limiter: Optional[AdaptiveConcurrencyLimiter] = None,
+    **kwargs: Any,
+) -> Dict[str, Any]:
+    """Call the watsonx.ai text generation endpoint.
+
+    The request is sent over the persistent session of the model and retried
+    according to ``retry_policy`` instead of the fixed retries of the SDK.
+
+    Args:
+        watsonx_model: Initialized ``ModelInference`` providing the credentials,
+            endpoint and default parameters.
+        prompt: The prompt to send.
+        params: Generation parameters overriding the model defaults.
+        retry_policy: Policy for retrying failed requests. Failed requests
+            are not retried if not given.
+        concurrency_limiter: Limiter to hold a slot of while the request is
+            in flight and to report throttling to.
+        **kwargs: Guardrails and validation options accepted by
+            ``ModelInference.generate``.
+
+    Returns:
+        The raw response of the generation endpoint.
+    """
+    url, payload = _prepare_generation_request(
+        watsonx_model, prompt, params=params, **kwargs
+    )
+    api_client = watsonx_model._client
+    session = watsonx_model._inference._session
+    with _limited(concurrency_limiter):
+        response = _send_with_retry(
+            lambda: session.post(
+                url=url,
+                json=payload,
+                headers=api_client._get_headers(),
+                params=api_client._params(skip_for_create=True, skip_userfs=True),
+            ),
+            retry_policy=retry_policy,
+            concurrency_limiter=concurrency_limiter,
+            idempotent=_is_idempotent_generation(payload),
+        )
+    return watsonx_model._handle_response(200, "generate", response)
+
+
+async def agenerate(
+    watsonx_model: "ModelInference",
+    prompt: Optional[str],
+    params: Optional[Dict[str, Any]] = None,
+    client: Optional[httpx.AsyncClient] = None,
+    retry_policy: Optional[RetryPolicy] = None,
+    concurrency_limiter: Optional[AdaptiveConcurrencyLimiter] = None,
+    **kwargs: Any,
+) -> Dict[str, Any]:
+    """Asynchronously call the watsonx.ai text generation endpoint.
+
+    Args:
+        watsonx_model: Initialized ``ModelInference`` providing the credentials,
+            endpoint and default parameters.
+        prompt: The prompt to send.
+        params: Generation parameters overriding the model defaults.
+        client: HTTP client to send the request with. A new client is opened
+            and closed for the call if not given.
+        retry_policy: Policy for retrying failed requests. Failed requests
+            are not retried if not given.
+        concurrency_limiter: Limiter to hold a slot of while the request is
+            in flight and to report throttling to.
+        **kwargs: Guardrails and validation options accepted by
+            ``ModelInference.generate``.
+
+    Returns:
+        The raw response of the generation endpoint.
+    """
+    if client is None:
+        from ibm_watsonx_ai._wrappers.requests import (  # type: ignore
+            get_async_client,
+        )
+
+        async with get_async_client() as client:
+            return await agenerate(
+                watsonx_model,
+                prompt,
+                params=params,
+                client=client,
+                retry_policy=retry_policy,
+                concurrency_limiter=concurrency_limiter,
+                **kwargs,
+            )
+    http_client = client
+    url, payload = _prepare_generation_request(
+        watsonx_model, prompt, params=params, **kwargs
+    )
+    api_client = watsonx_model._client
+    async with _limited(concurrency_limiter):
+        # ``send`` rather than ``post``, which the SDK client retries itself
+        response = await _asend_with_retry(
+            lambda: http_client.send(
+                http_client.build_request(
+                    "POST",
+                    url,
+                    json=payload,
+                    headers=api_client._get_headers(),
+                    params=api_client._params(skip_for_create=True, skip_userfs=True),
+                )
+            ),
+            retry_policy=retry_policy,
+            concurrency_limiter=concurrency_limiter,
+            idempotent=_is_idempotent_generation(payload),
+        )
+    return watsonx_model._handle_response(200, "agenerate", response)
+
+
+async def agenerate_stream(
+    watsonx_model: "ModelInference",
+    prompt: Optional[str],
+    params: Optional[Dict[str, Any]] = None,
+    client: Optional[httpx.AsyncClient] = None,
+    retry_policy: Optional[RetryPolicy] = None,
+    concurrency_limiter: Optional[AdaptiveConcurrencyLimiter] = None,
+    **kwargs: Any,
+) -> AsyncGenerator[Dict[str, Any], None]:
+    """Asynchronously stream the watsonx.ai text generation endpoint.
+
+    Args:
+        watsonx_model: Initialized ``ModelInference`` providing the credentials,
+            endpoint and default parameters.
+        prompt: The prompt to send.
+        params: Generation parameters overriding the model defaults.
+        client: HTTP client to send the request with. A new client is opened
+            and closed for the call if not given.
+        retry_policy: Policy for retrying failed requests. The stream is only
+            retried until the response starts. Not retried if not given.
+        concurrency_limiter: Limiter to hold a slot of while the stream is
+            open and to report throttling to.
+        **kwargs: Guardrails and validation options accepted by
+            ``ModelInference.generate_text_stream``.
+
+    Yields:
+        Raw server-sent events of the stream endpoint, parsed as dictionaries.
+        The stop sequences are also matched on the client, across events, and
+        the stream is closed at the first one found, in case the model
+        generates past it.
+    """
+    if client is None:
+        from ibm_watsonx_ai._wrappers.requests import (  # type: ignore
+            get_async_client,
+        )
+
+        async with get_async_client() as client:
+            async with aclosing(
+                agenerate_stream(
+                    watsonx_model,
+                    prompt,
+                    params=params,
+                    client=client,
+                    retry_policy=retry_policy,
+                    concurrency_limiter=concurrency_limiter,
+                    **kwargs,
+                )
+            ) as stream:
+                async for event in stream:
+                    yield event
+        return
+    from ibm_watsonx_ai.wml_client_error import WMLClientError  # type: ignore
+
+    http_client = client
+    url, payload = _prepare_generation_request(
+        watsonx_model, prompt, params=params, stream=True, **kwargs
+    )
+    stop_matcher = _stop_sequence_matcher(payload)
+    api_client = watsonx_model._client
+    async with _limited(concurrency_limiter):
+        response = await _asend_with_retry(
+            lambda: http_client.send(
+                http_client.build_request(
+                    "POST",
+                    url,
+                    json=payload,
+                    headers=api_client._get_headers(),
+                    params=api_client._params(skip_for_create=True, skip_userfs=True),
+                ),
+                stream=True,
+            ),
+            retry_policy=retry_policy,
+            concurrency_limiter=concurrency_limiter,
+            idempotent=_is_idempotent_generation(payload),
+        )
+        try:
+            if response.status_code != 200:
+                await response.aread()
+                raise WMLClientError(
+                    f"Request failed with: {response.text} ({response.status_code})"
+                )
+            async for line in response.aiter_lines():
+                chunk = _parse_stream_line(line)
+                if chunk is None:
+                    continue
+                if stop_matcher is not None:
+                    chunk = _match_stop_sequences(chunk, stop_matcher)
+                yield chunk
+                if stop_matcher is not None and stop_matcher.stopped:
+                    # close the stream rather than paying for discarded tokens
+                    return
+            rest = _stop_matcher_rest(stop_matcher)
+            if rest is not None:
+                yield rest
+        finally:
+            await response.aclose()
+
+
+def generate_stream(
+    watsonx_model: "ModelInference",
+    prompt: Optional[str],
+    params: Optional[Dict[str, Any]] = None,
+    retry_policy: Optional[RetryPolicy] = None,
+    concurrency_limiter: Optional[AdaptiveConcurrencyLimiter] = None,
+    **kwargs: Any,
+) -> Generator[Dict[str, Any], None, None]:
+    """Stream the watsonx.ai text generation endpoint.
+
+    Unlike ``ModelInference.generate_text_stream``, which opens a new session
+    for every call, the request is sent over the persistent session of the
+    model, so the connection is reused across streams.
+
+    Args:
+        watsonx_model: Initialized ``ModelInference`` providing the credentials,
+            endpoint and default parameters.
+        prompt: The prompt to send.
+        params: Generation parameters overriding the model defaults.
+        retry_policy: Policy for retrying failed requests. The stream is only
+            retried until the response starts. Not retried if not given.
+        concurrency_limiter: Limiter to hold a slot of while the stream is
+            open and to report throttling to.
+        **kwargs: Guardrails and validation options accepted by
+            ``ModelInference.generate_text_stream``.
+
+    Yields:
+        Raw server-sent events of the stream endpoint, parsed as dictionaries.
+        The stop sequences are also matched on the client, across events, and
+        the stream is closed at the first one found, in case the model
+        generates past it.
+    """
+    from ibm_watsonx_ai.wml_client_error import WMLClientError  # type: ignore
+
+    url, payload = _prepare_generation_request(
+        watsonx_model, prompt, params=params, stream=True, **kwargs
+    )
+    stop_matcher = _stop_sequence_matcher(payload)
+    api_client = watsonx_model._client
+    session = watsonx_model._inference._session
+    with _limited(concurrency_limiter):
+        response = _send_with_retry(
+            lambda: session.post(
+                url=url,
+                json=payload,
+                headers=api_client._get_headers(),
+                params=api_client._params(skip_for_create=True, skip_userfs=True),
+                stream=True,
+            ),
+            retry_policy=retry_policy,
+            concurrency_limiter=concurrency_limiter,
+            idempotent=_is_idempotent_generation(payload),
+        )
+        with response:
+            if response.status_code != 200:
+                raise WMLClientError(
+                    f"Request failed with: {response.text} ({response.status_code})"
+                )
+            for line in response.iter_lines(decode_unicode=False):
+                chunk = _parse_stream_line(line.decode("utf-8"))
+                if chunk is None:
+                    continue
+                if stop_matcher is not None:
+                    chunk = _match_stop_sequences(chunk, stop_matcher)
+                yield chunk
+                if stop_matcher is not None and stop_matcher.stopped:
+                    # close the stream rather than paying for discarded tokens
+                    return
+            rest = _stop_matcher_rest(stop_matcher)
+            if rest is not None:
+                yield rest
+
+
+def embed(
+    watsonx_embed: "Embeddings",
+    inputs: List[str],
+    params: Optional[Dict[str, Any]] = None,
+    retry_policy: Optional[RetryPolicy] = None,
+    concurrency_limiter: Optional[AdaptiveConcurrencyLimiter] = None,
+) -> Dict[str, Any]:
+    """Call the watsonx.ai embeddings endpoint.
+
+    The request is sent over the persistent session of the model and retried
+    according to ``retry_policy`` instead of the fixed retries of the SDK.
+
+    Args:
+        watsonx_embed: Initialized ``Embeddings`` providing the credentials,
+            endpoint and default parameters.
+        inputs: Texts to embed in a single request.
+        params: Embedding parameters overriding the model defaults.
+        retry_policy: Policy for retrying failed requests. Failed requests
+            are not retried if not given.
+        concurrency_limiter: Limiter to hold a slot of while the request is
+            in flight and to report throttling to.
+
+    Returns:
+        The raw response of the embeddings endpoint.
+    """
+    api_client = watsonx_embed._client
+    url = api_client.service_instance._href_definitions.get_fm_embeddings_href()
+    payload = watsonx_embed._prepare_payload(inputs, params)
+    session = watsonx_embed._session
+    with _limited(concurrency_limiter):
+        response = _send_with_retry(
+            lambda: session.post(
+                url=url,
+                json=payload,
+                headers=api_client._get_headers(),
+                params=api_client._params(skip_for_create=True, skip_userfs=True),
+            ),
+            retry_policy=retry_policy,
+            concurrency_limiter=concurrency_limiter,
+            idempotent=True,
+        )
+    return watsonx_embed._handle_response(200, "embed", response)
+
+
+async def aembed(
+    watsonx_embed: "Embeddings",
+    inputs: List[str],
+    params: Optional[Dict[str, Any]] = None,
+    client: Optional[httpx.AsyncClient] = None,
+    retry_policy: Optional[RetryPolicy] = None,
+    concurrency_limiter: Optional[AdaptiveConcurrencyLimiter] = None,
+) -> Dict[str, Any]:
+    """Asynchronously call the watsonx.ai embeddings endpoint.
+
+    Args:
+        watsonx_embed: Initialized ``Embeddings`` providing the credentials,
+            endpoint and default parameters.
+        inputs: Texts to embed in a single request.
+        params: Embedding parameters overriding the model defaults.
+        client: HTTP client to send the request with. A new client is opened
+            and closed for the call if not given.
+        retry_policy: Policy for retrying failed requests. Failed requests
+            are not retried if not given.
+        concurrency_limiter: Limiter to hold a slot of while the request is
+            in flight and to report throttling to.
+
+    Returns:
+        The raw response of the embeddings endpoint.
+    """
+    if client is None:
+        from ibm_watsonx_ai._wrappers.requests import (  # type: ignore
+            get_async_client,
+        )
+
+        async with get_async_client() as client:
+            return await aembed(
+                watsonx_embed,
+                inputs,
+                params=params,
+                client=client,
+                retry_policy=retry_policy,
+                concurrency_limiter=concurrency_limiter,
+            )
+    http_client = client
+    api_client = watsonx_embed._client
+    url = api_client.service_instance._href_definitions.get_fm_embeddings_href()
+    payload = watsonx_embed._prepare_payload(inputs, params)
+    async with _limited(concurrency_limiter):
+        response = await _asend_with_retry(
+            lambda: http_client.send(
+                http_client.build_request(
+                    "POST",
+                    url,
+                    json=payload,
+                    headers=api_client._get_headers(),
+                    params=api_client._params(skip_for_create=True, skip_userfs=True),
+                )
+            ),
+            retry_policy=retry_policy,
+            concurrency_limiter=concurrency_limiter,
+            idempotent=True,
+        )
+    return watsonx_embed._handle_response(200, "aembed", response)
@@ -0,0 +1,41 @@
+"""Micro-benchmark of the extraction of tool calls from generated text.
+
+Usage: python scripts/benchmark_tool_parsing.py [number of tool calls ...]
+"""
+
+import json
+import sys
+import timeit
+
+from langchain_ibm.chat_models import _convert_dict_to_message
+
+
+def _generated_text(tool_calls: int) -> str:
+    blocks = [
+        "```json\n"
+        + json.dumps(
+            {
+                "type": "function",
+                "function": {
+                    "name": f"tool_{i}",
+                    "arguments": {"query": "watsonx " * 50, "limit": i},
+                },
+            },
+            indent=4,
+        )
+        + "\n```"
+        for i in range(tool_calls)
+    ]
+    return "\n\n".join(blocks) + "\n</endoftext>"
+
+
+if __name__ == "__main__":
+    for tool_calls in [int(arg) for arg in sys.argv[1:]] or [1, 10, 100]:
+        response = {"generated_text": _generated_text(tool_calls)}
+        timer = timeit.Timer(lambda: _convert_dict_to_message(response, "call_id"))
+        number, _ = timer.autorange()
+        best = min(timer.repeat(repeat=5, number=number)) / number
+        print(
+            f"{tool_calls:>5} tool calls, {len(response['generated_text']):>8} "
+            f"characters: {best * 1e6:10.1f} us per message"
+        )
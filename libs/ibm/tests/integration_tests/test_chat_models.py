@@ -145,6 +145,32 @@ def test_05_generate_chat_with_stream_with_param_v2() -> None:
         assert isinstance(chunk.content, str)
 
 
+async def test_05b_ainvoke_chat() -> None:
+    chat = ChatWatsonx(model_id=MODEL_ID, url=URL, project_id=WX_PROJECT_ID)
+    response = await chat.ainvoke("What's the weather in san francisco")
+    assert isinstance(response, BaseMessage)
+    assert response.content
+
+
+async def test_05c_astream_chat() -> None:
+    chat = ChatWatsonx(model_id=MODEL_ID, url=URL, project_id=WX_PROJECT_ID)
+    full: Any = None
+    async for chunk in chat.astream("What's the weather in san francisco"):
+        assert isinstance(chunk, AIMessageChunk)
+        assert isinstance(chunk.content, str)
+        full = chunk if full is None else full + chunk
+    assert full is not None
+    assert full.content
+
+
+async def test_05d_ainvoke_chat_with_streaming() -> None:
+    chat = ChatWatsonx(
+        model_id=MODEL_ID, url=URL, project_id=WX_PROJECT_ID, streaming=True
+    )
+    response = await chat.ainvoke("What's the weather in san francisco")
+    assert isinstance(response.content, str)
+
+
 def test_06_chain_invoke() -> None:
     chat = ChatWatsonx(
         model_id=MODEL_ID,
@@ -52,6 +52,21 @@ def test_03_generate_embed_documents_with_param() -> None:
     assert all(isinstance(el, float) for el in generate_embedding[0])
 
 
+def test_04_generate_embed_documents_in_batches() -> None:
+    documents = DOCUMENTS * 5
+    watsonx_embedding = WatsonxEmbeddings(
+        model_id=MODEL_ID,
+        url=URL,
+        project_id=WX_PROJECT_ID,
+        batch_size=3,
+        max_concurrency=2,
+    )
+    generate_embedding = watsonx_embedding.embed_documents(texts=documents)
+    assert len(generate_embedding) == len(documents)
+    assert generate_embedding[0] == generate_embedding[2]
+    assert generate_embedding[1] == generate_embedding[-1]
+
+
 def test_10_generate_embed_query_with_client_initialization() -> None:
     watsonx_client = APIClient(
         credentials={
@@ -66,3 +81,66 @@ def test_10_generate_embed_query_with_client_initialization() -> None:
     assert isinstance(generate_embedding, list) and isinstance(
         generate_embedding[0], float
     )
+
+
+async def test_20_agenerate_embed_documents() -> None:
+    watsonx_embedding = WatsonxEmbeddings(
+        model_id=MODEL_ID, url=URL, project_id=WX_PROJECT_ID, max_concurrency=2
+    )
+    generate_embedding = await watsonx_embedding.aembed_documents(texts=DOCUMENTS)
+    assert len(generate_embedding) == len(DOCUMENTS)
+    assert all(isinstance(el, float) for el in generate_embedding[0])
+
+
+async def test_21_agenerate_embed_query() -> None:
+    watsonx_embedding = WatsonxEmbeddings(
+        model_id=MODEL_ID, url=URL, project_id=WX_PROJECT_ID
+    )
+    generate_embedding = await watsonx_embedding.aembed_query(text=DOCUMENTS[0])
+    assert isinstance(generate_embedding, list) and isinstance(
+        generate_embedding[0], float
+    )
+
+
+def test_30_generate_embed_documents_array() -> None:
+    watsonx_embedding = WatsonxEmbeddings(
+        model_id=MODEL_ID, url=URL, project_id=WX_PROJECT_ID
+    )
+    generate_embedding = watsonx_embedding.embed_documents_array(texts=DOCUMENTS)
+    assert generate_embedding.shape[0] == len(DOCUMENTS)
+    assert generate_embedding.dtype == "float32"
+
+
+async def test_31_agenerate_embed_documents_array() -> None:
+    watsonx_embedding = WatsonxEmbeddings(
+        model_id=MODEL_ID, url=URL, project_id=WX_PROJECT_ID
+    )
+    generate_embedding = await watsonx_embedding.aembed_documents_array(
+        texts=DOCUMENTS, dtype="float16"
+    )
+    assert generate_embedding.shape[0] == len(DOCUMENTS)
+    assert generate_embedding.dtype == "float16"
+
+
+def test_40_iter_embed_documents() -> None:
+    watsonx_embedding = WatsonxEmbeddings(
+        model_id=MODEL_ID, url=URL, project_id=WX_PROJECT_ID, batch_size=1
+    )
+    generate_embedding = list(
+        watsonx_embedding.iter_embed_documents(text for text in DOCUMENTS)
+    )
+    assert [index for index, _ in generate_embedding] == list(range(len(DOCUMENTS)))
+    assert all(isinstance(el, float) for el in generate_embedding[0][1])
+
+
+async def test_41_aiter_embed_documents() -> None:
+    watsonx_embedding = WatsonxEmbeddings(
+        model_id=MODEL_ID, url=URL, project_id=WX_PROJECT_ID, batch_size=1
+    )
+    generate_embedding = [
+        item
+        async for item in watsonx_embedding.aiter_embed_documents(
+            text for text in DOCUMENTS
+        )
+    ]
+    assert [index for index, _ in generate_embedding] == list(range(len(DOCUMENTS)))
@@ -4,6 +4,7 @@ You'll need to set WATSONX_APIKEY and WATSONX_PROJECT_ID environment variables.
 """
 
 import os
+from typing import Any, List, Set
 
 from ibm_watsonx_ai import APIClient, Credentials  # type: ignore
 from ibm_watsonx_ai.foundation_models import Model, ModelInference  # type: ignore
@@ -12,6 +13,7 @@ from ibm_watsonx_ai.foundation_models.utils.enums import (  # type: ignore
     ModelTypes,
 )
 from ibm_watsonx_ai.metanames import GenTextParamsMetaNames  # type: ignore
+from langchain_core.callbacks import BaseCallbackHandler
 from langchain_core.outputs import LLMResult
 
 from langchain_ibm import WatsonxLLM
@@ -21,6 +23,14 @@ WX_PROJECT_ID = os.environ.get("WATSONX_PROJECT_ID", "")
 MODEL_ID = "google/flan-ul2"
 
 
+class _PromptIndexHandler(BaseCallbackHandler):
+    def __init__(self) -> None:
+        self.prompt_indexes: Set[int] = set()
+
+    def on_llm_new_token(self, token: str, **kwargs: Any) -> None:
+        self.prompt_indexes.add(kwargs["prompt_index"])
+
+
 def test_watsonxllm_invoke() -> None:
     watsonxllm = WatsonxLLM(
         model_id=MODEL_ID,
@@ -198,6 +208,46 @@ def test_watsonxllm_generate_stream() -> None:
     assert len(response_text) > 0
 
 
+def test_watsonxllm_generate_stream_with_multiple_prompts() -> None:
+    watsonxllm = WatsonxLLM(
+        model_id=MODEL_ID,
+        url="https://us-south.ml.cloud.ibm.com",  # type: ignore[arg-type]
+        project_id=WX_PROJECT_ID,
+    )
+    handler = _PromptIndexHandler()
+    callbacks: List[BaseCallbackHandler] = [handler]
+    response = watsonxllm.generate(
+        ["What color sunflower is?", "What color turtle is?"],
+        stream=True,
+        callbacks=callbacks,
+    )
+    assert isinstance(response, LLMResult)
+    assert len(response.generations) == 2
+    for generation in response.generations:
+        assert len(generation[0].text) > 0
+    assert handler.prompt_indexes == {0, 1}
+
+
+async def test_watsonxllm_agenerate_stream_with_multiple_prompts() -> None:
+    watsonxllm = WatsonxLLM(
+        model_id=MODEL_ID,
+        url="https://us-south.ml.cloud.ibm.com",  # type: ignore[arg-type]
+        project_id=WX_PROJECT_ID,
+    )
+    handler = _PromptIndexHandler()
+    callbacks: List[BaseCallbackHandler] = [handler]
+    response = await watsonxllm.agenerate(
+        ["What color sunflower is?", "What color turtle is?"],
+        stream=True,
+        callbacks=callbacks,
+    )
+    assert isinstance(response, LLMResult)
+    assert len(response.generations) == 2
+    for generation in response.generations:
+        assert len(generation[0].text) > 0
+    assert handler.prompt_indexes == {0, 1}
+
+
 def test_watsonxllm_stream() -> None:
     watsonxllm = WatsonxLLM(
         model_id=MODEL_ID,
@@ -435,6 +485,30 @@ async def test_watsonx_agenerate() -> None:
     assert response.llm_output["token_usage"]["generated_token_count"] != 0  # type: ignore
 
 
+async def test_watsonx_astream() -> None:
+    watsonxllm = WatsonxLLM(
+        model_id=MODEL_ID,
+        url="https://us-south.ml.cloud.ibm.com",  # type: ignore[arg-type]
+        project_id=WX_PROJECT_ID,
+    )
+    linked_text_stream = ""
+    async for chunk in watsonxllm.astream("What color sunflower is?"):
+        assert isinstance(chunk, str)
+        linked_text_stream += chunk
+    assert len(linked_text_stream) > 0
+
+
+async def test_watsonx_ainvoke_with_streaming() -> None:
+    watsonxllm = WatsonxLLM(
+        model_id=MODEL_ID,
+        url="https://us-south.ml.cloud.ibm.com",  # type: ignore[arg-type]
+        project_id=WX_PROJECT_ID,
+        streaming=True,
+    )
+    response = await watsonxllm.ainvoke("What color sunflower is?")
+    assert isinstance(response, str)
+
+
 def test_get_num_tokens() -> None:
     watsonxllm = WatsonxLLM(
         model_id=MODEL_ID,
@@ -0,0 +1,150 @@
+"""Test caches for IBM watsonx.ai integrations."""
+
+from pathlib import Path
+from typing import List
+
+from langchain_core.embeddings import Embeddings
+from pytest_mock import MockerFixture
+
+from langchain_ibm.cache import (
+    LRUEmbeddingCache,
+    LRUGenerationCache,
+    SemanticGenerationCache,
+    SQLiteEmbeddingCache,
+    SQLiteGenerationCache,
+    embedding_cache_key,
+    embedding_cache_namespace,
+    generation_cache_key,
+    generation_cache_namespace,
+)
+
+
+def test_embedding_cache_key_depends_on_model_params_and_text() -> None:
+    namespace = embedding_cache_namespace("ibm/slate", {"truncate_input_tokens": 3})
+    assert namespace == embedding_cache_namespace(
+        "ibm/slate", {"truncate_input_tokens": 3}
+    )
+    assert namespace != embedding_cache_namespace("ibm/slate", None)
+    assert namespace != embedding_cache_namespace(
+        "ibm/other", {"truncate_input_tokens": 3}
+    )
+    assert embedding_cache_key(namespace, "a") != embedding_cache_key(namespace, "b")
+
+
+def test_lru_embedding_cache_evicts_least_recently_used() -> None:
+    cache = LRUEmbeddingCache(maxsize=2)
+    cache.mset([("a", [1.0]), ("b", [2.0])])
+    assert cache.mget(["a"]) == [[1.0]]
+    cache.mset([("c", [3.0])])
+    assert cache.mget(["a", "b", "c"]) == [[1.0], None, [3.0]]
+    cache.mdelete(["a"])
+    assert list(cache.yield_keys()) == ["c"]
+
+
+def test_sqlite_embedding_cache_persists(tmp_path: Path) -> None:
+    database = str(tmp_path / "embeddings.db")
+    vector = [0.1, -0.2, 1e-30]
+    cache = SQLiteEmbeddingCache(database)
+    cache.mset([("ns:a", vector), ("other:b", [1.0])])
+    cache.close()
+
+    cache = SQLiteEmbeddingCache(database)
+    assert cache.mget(["ns:a", "missing"]) == [vector, None]
+    assert list(cache.yield_keys(prefix="ns:")) == ["ns:a"]
+    cache.mdelete(["ns:a"])
+    assert cache.mget(["ns:a"]) == [None]
+    cache.close()
+
+
+def test_generation_cache_namespace_normalizes_params_and_skips_sampling() -> None:
+    namespace = generation_cache_namespace(
+        "ibm/granite", None, {"max_new_tokens": 10, "top_k": None}
+    )
+    assert namespace is not None
+    assert namespace == generation_cache_namespace(
+        "ibm/granite", "", {"MAX_NEW_TOKENS": 10, "decoding_method": None}
+    )
+    assert namespace != generation_cache_namespace("ibm/granite", None, None)
+    assert namespace != generation_cache_namespace(
+        "ibm/granite", None, {"max_new_tokens": 10}, guardrails=True
+    )
+    assert (
+        generation_cache_namespace("ibm/granite", None, {"decoding_method": "sample"})
+        is None
+    )
+    assert generation_cache_key(namespace, "a") != generation_cache_key(namespace, "b")
+
+
+def test_lru_generation_cache_expires_entries(mocker: MockerFixture) -> None:
+    monotonic = mocker.patch("langchain_ibm.cache.time.monotonic", return_value=0.0)
+    cache = LRUGenerationCache(maxsize=2, ttl=10)
+    cache.mset([("a", {"results": []}), ("b", {"results": []})])
+    cache.mget(["a"])
+    cache.mset([("c", {"results": []})])
+    assert list(cache.yield_keys()) == ["a", "c"]
+
+    monotonic.return_value = 11.0
+    assert cache.mget(["a", "c"]) == [None, None]
+
+
+def test_sqlite_generation_cache_persists(
+    tmp_path: Path, mocker: MockerFixture
+) -> None:
+    database = str(tmp_path / "generations.db")
+    response = {"results": [{"generated_text": "Hi", "generated_token_count": 1}]}
+    cache = SQLiteGenerationCache(database, ttl=60)
+    cache.mset([("a", response)])
+    cache.close()
+
+    cache = SQLiteGenerationCache(database, ttl=60)
+    assert cache.mget(["a", "missing"]) == [response, None]
+    mocker.patch("langchain_ibm.cache.time.time", return_value=2e10)
+    assert cache.mget(["a"]) == [None]
+    cache.purge_expired()
+    assert list(cache.yield_keys()) == []
+    cache.close()
+
+
+class _LetterEmbeddings(Embeddings):
+    """Embeds texts by their letter counts."""
+
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        return [self.embed_query(text) for text in texts]
+
+    def embed_query(self, text: str) -> List[float]:
+        vector = [0.0] * 26
+        for char in text.lower():
+            if "a" <= char <= "z":
+                vector[ord(char) - ord("a")] += 1
+        return vector
+
+
+def test_semantic_generation_cache_matches_similar_prompts() -> None:
+    cache = SemanticGenerationCache(
+        _LetterEmbeddings(), similarity_threshold=0.9, maxsize=2
+    )
+    assert cache.lookup("ns", "What are your opening hours?") is None
+    cache.update("ns", "What are your opening hours?", {"results": ["hours"]})
+    cache.update("ns", "Where is the shop?", {"results": ["shop"]})
+
+    assert cache.lookup("ns", "what are your opening hours") == {"results": ["hours"]}
+    assert cache.lookup("other", "what are your opening hours") is None
+    assert cache.lookup("ns", "zzz") is None
+
+    # the least recently used response is evicted
+    cache.update("ns", "zzz", {"results": ["z"]})
+    assert cache.lookup("ns", "Where is the shop?") is None
+    assert cache.lookup("ns", "What are your opening hours?") == {"results": ["hours"]}
+
+
+def test_semantic_generation_cache_evicts_namespaces() -> None:
+    cache = SemanticGenerationCache(_LetterEmbeddings(), max_namespaces=2)
+    cache.update("a", "hours", {"results": ["a"]})
+    cache.update("b", "hours", {"results": ["b"]})
+    assert cache.lookup("a", "hours") == {"results": ["a"]}
+
+    # the least recently used namespace is evicted
+    cache.update("c", "hours", {"results": ["c"]})
+    assert cache.lookup("b", "hours") is None
+    assert cache.lookup("a", "hours") == {"results": ["a"]}
+    assert cache.lookup("c", "hours") == {"results": ["c"]}
@@ -1,8 +1,19 @@
 """Test ChatWatsonx API wrapper."""
 
+import json
 import os
+from typing import Any, Dict, Iterator, List, cast
+
+from langchain_core.messages import (
+    AIMessage,
+    AIMessageChunk,
+    BaseMessage,
+    HumanMessage,
+)
+from pytest_mock import MockerFixture
 
 from langchain_ibm import ChatWatsonx
+from langchain_ibm.chat_models import _TOOLS_PROMPT_REMINDER, _convert_dict_to_message
 
 os.environ.pop("WATSONX_APIKEY", None)
 os.environ.pop("WATSONX_PROJECT_ID", None)
@@ -60,3 +71,199 @@ def test_initialize_chat_watsonx_cpd_bad_path_apikey_without_username() -> None:
         )
     except ValueError as e:
         assert "WATSONX_USERNAME" in e.__str__()
+
+
+def test_tools_prompt_is_rendered_once_per_bound_tool(mocker: MockerFixture) -> None:
+    chat = ChatWatsonx(
+        model_id=MODEL_ID, url="https://us-south.ml.cloud.ibm.com", apikey="test"
+    )
+    tool = {"type": "function", "function": {"name": "get_word_length"}}
+    dumps = mocker.spy(json, "dumps")
+
+    prompts = [
+        chat._prepare_chat_request([HumanMessage(content="Hi")], tools=[tool])[0]
+        for _ in range(3)
+    ]
+
+    assert dumps.call_count == 1
+    assert len(set(prompts)) == 1
+    assert '"name": "get_word_length"' in prompts[0]
+    assert prompts[0].endswith(
+        "(reminder to respond in a JSON blob no matter what and use tools only if "
+        "necessary)"
+    )
+
+
+def test_tools_prompt_of_mixtral() -> None:
+    chat = ChatWatsonx(
+        model_id=MODEL_ID, url="https://us-south.ml.cloud.ibm.com", apikey="test"
+    )
+    tool = {"type": "function", "function": {"name": "get_word_length"}}
+    messages: List[BaseMessage] = [HumanMessage(content="What is 2+2?")]
+
+    prompt, _, _ = chat._prepare_chat_request(messages, tools=[tool])
+    stream_prompt, _, _ = chat._prepare_chat_request(
+        messages, stream=True, tools=[tool]
+    )
+
+    preamble = chat._tools_prompt(tool)
+    assert prompt == f"{preamble}Human: What is 2+2?\nAI: {_TOOLS_PROMPT_REMINDER}"
+    assert stream_prompt == f"{preamble}Human: What is 2+2?{_TOOLS_PROMPT_REMINDER}"
+
+
+def test_stream_tool_calls(mocker: MockerFixture) -> None:
+    chat = ChatWatsonx(
+        model_id=MODEL_ID, url="https://us-south.ml.cloud.ibm.com", apikey="test"
+    )
+    tool = {"type": "function", "function": {"name": "get_word_length"}}
+    text = (
+        '```json\n{"type": "function", "function": {"name": "get_word_length", '
+        '"arguments": {"word": "think"}}}\n```\n\n'
+        '```json\n{"type": "function", "function": {"name": "get_word_length", '
+        '"arguments": {"word": "thought"}}}\n```\n</endoftext>'
+    )
+    events = [
+        {"results": [{"generated_text": text[i : i + 4], "stop_reason": stop_reason}]}
+        for i, stop_reason in zip(
+            range(0, len(text), 4),
+            ["not_finished"] * (len(text) // 4) + ["stop_sequence"],
+        )
+    ]
+    sent = []
+
+    def generate_stream(*args: Any, **kwargs: Any) -> Iterator[Dict[str, Any]]:
+        for event in events:
+            sent.append(event)
+            yield event
+
+    mocker.patch.object(ChatWatsonx, "_get_watsonx_model")
+    mocker.patch(
+        "langchain_ibm.chat_models.generate_stream", side_effect=generate_stream
+    )
+
+    chunks = [
+        cast(AIMessageChunk, chunk)
+        for chunk in chat.stream("How long is the word think?", tools=[tool])
+    ]
+
+    # the generation is read to its end, for the tool calls following the first
+    assert sent == events
+    name_chunk = next(i for i, chunk in enumerate(chunks) if chunk.tool_call_chunks)
+    assert name_chunk < len(text) // 8
+    message = chunks[0]
+    for chunk in chunks[1:]:
+        message = cast(AIMessageChunk, message + chunk)
+    assert message.content == ""
+    assert message.response_metadata["finish_reason"] == "stop_sequence"
+    assert message.response_metadata["stream_metrics"]["time_to_first_token"] > 0
+    # the same tool calls as without streaming
+    expected = cast(
+        AIMessage, _convert_dict_to_message({"generated_text": text}, "call_id")
+    )
+    assert [(call["name"], call["args"]) for call in message.tool_calls] == [
+        (call["name"], call["args"]) for call in expected.tool_calls
+    ]
+    assert [call["args"] for call in message.tool_calls] == [
+        {"word": "think"},
+        {"word": "thought"},
+    ]
+
+
+def test_stream_tool_calls_plain_json(mocker: MockerFixture) -> None:
+    chat = ChatWatsonx(
+        model_id=MODEL_ID, url="https://us-south.ml.cloud.ibm.com", apikey="test"
+    )
+    tool = {"type": "function", "function": {"name": "get_word_length"}}
+    text = '```json\n{"word": "think"}\n```\nThe word has 5 letters.'
+    events = [
+        {"results": [{"generated_text": text[i : i + 4], "stop_reason": stop_reason}]}
+        for i, stop_reason in zip(
+            range(0, len(text), 4),
+            ["not_finished"] * (len(text) // 4) + ["eos_token"],
+        )
+    ]
+    sent = []
+
+    def generate_stream(*args: Any, **kwargs: Any) -> Iterator[Dict[str, Any]]:
+        for event in events:
+            sent.append(event)
+            yield event
+
+    mocker.patch.object(ChatWatsonx, "_get_watsonx_model")
+    mocker.patch(
+        "langchain_ibm.chat_models.generate_stream", side_effect=generate_stream
+    )
+
+    chunks = [
+        cast(AIMessageChunk, chunk)
+        for chunk in chat.stream("How long is the word think?", tools=[tool])
+    ]
+
+    # JSON that is not a tool call does not end the stream
+    assert sent == events
+    message = chunks[0]
+    for chunk in chunks[1:]:
+        message = cast(AIMessageChunk, message + chunk)
+    assert message.content == text
+    assert message.tool_call_chunks == []
+    assert message.response_metadata["finish_reason"] == "eos_token"
+
+
+def test_convert_dict_to_message_tool_calls() -> None:
+    text = (
+        '```json\n{"type": "function", "function": {"name": "get_word_length", '
+        '"arguments": {"word": "think"}}}\n```\n\n'
+        '```json\n{"type": "function", "function": {"name": "search", '
+        '"arguments": {"query": }}}\n```\n</endoftext>'
+    )
+
+    message = _convert_dict_to_message({"generated_text": text}, "call_id")
+
+    assert message.content == ""
+    assert message.tool_calls == [  # type: ignore[attr-defined]
+        {
+            "name": "get_word_length",
+            "args": {"word": "think"},
+            "id": "call_id",
+            "type": "tool_call",
+        }
+    ]
+    [invalid_tool_call] = message.invalid_tool_calls  # type: ignore[attr-defined]
+    assert invalid_tool_call["args"].startswith('{"type": "function"')
+    assert invalid_tool_call["error"].startswith("Expecting value")
+
+
+def test_convert_dict_to_message_content() -> None:
+    final_answer = (
+        '```json\n{"type": "function", "function": {"name": "Final Answer", '
+        '"arguments": {"output": "It is 5."}}}\n```'
+    )
+    example = 'Use this:\n```json\n{"a": 1}\n```'
+
+    message = _convert_dict_to_message({"generated_text": final_answer}, "call_id")
+    assert message.content == "It is 5."
+    message = _convert_dict_to_message({"generated_text": example}, "call_id")
+    assert message.content == example
+    assert not message.invalid_tool_calls  # type: ignore[attr-defined]
+
+
+def test_convert_dict_to_message_lenient_tool_calls() -> None:
+    newline = (
+        '```json\n{"type": "function", "function": {"name": "echo", '
+        '"arguments": {"text": "a\nb"}}}\n```'
+    )
+    # cut off by max_new_tokens
+    truncated = (
+        '```json\n{"type": "function", "function": {"name": "echo", '
+        '"arguments": {"text": "a'
+    )
+
+    for text, args in [(newline, {"text": "a\nb"}), (truncated, {"text": "a"})]:
+        message = cast(
+            AIMessage, _convert_dict_to_message({"generated_text": text}, "call_id")
+        )
+        assert message.content == ""
+        assert not message.invalid_tool_calls
+        assert message.tool_calls == [
+            {"name": "echo", "args": args, "id": "call_id", "type": "tool_call"}
+        ]
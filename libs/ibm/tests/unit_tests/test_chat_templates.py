@@ -0,0 +1,99 @@
+"""Test chat prompt templates for IBM watsonx.ai."""
+
+from typing import Any, Dict, List
+
+import pytest
+from langchain_core.messages import BaseMessage, HumanMessage, SystemMessage
+
+from langchain_ibm.chat_models import _convert_message_to_dict
+from langchain_ibm.chat_templates import (
+    ChatTemplate,
+    IncrementalChatRenderer,
+    get_chat_template,
+    register_chat_template,
+)
+
+MESSAGES = [
+    {"role": "system", "content": "Be brief."},
+    {"role": "user", "content": "Hi"},
+    {"role": "assistant", "content": "Hello"},
+    {"role": "user", "content": "Bye"},
+]
+
+
+def test_granite_chat_template() -> None:
+    assert get_chat_template("ibm/granite-13b-chat-v2").render(MESSAGES) == (
+        "<|system|>\nBe brief.\n\n<|user|>:\nHi\n\n<|assistant|>\nHello\n\n"
+        "<|user|>:\nBye\n\n<|assistant|>\n"
+    )
+
+
+def test_llama_3_chat_template() -> None:
+    prompt = get_chat_template("meta-llama/llama-3-70b-instruct").render(MESSAGES)
+    assert prompt.startswith(
+        "<|begin_of_text|><|start_header_id|>system<|end_header_id|>\n\n"
+        "Be brief.<|eot_id|>"
+    )
+    assert prompt.endswith(
+        "Bye<|eot_id|><|start_header_id|>assistant<|end_header_id|>\n\n"
+    )
+
+
+def test_default_chat_template() -> None:
+    template = get_chat_template("google/flan-ul2")
+    assert template.render(MESSAGES) == (
+        "System: Be brief.\nHuman: Hi\nAI: Hello\nHuman: Bye\nAI: "
+    )
+    assert template.render([]) == "AI: "
+    with pytest.raises(ValueError):
+        template.render([{"role": "narrator", "content": "Once"}])
+
+
+def test_register_chat_template() -> None:
+    template = ChatTemplate(roles={}, default_role=("<", ">"))
+    register_chat_template(template, prefixes=["test-org/"])
+
+    assert get_chat_template("test-org/chat") is template
+    assert get_chat_template("test-org/chat").render(MESSAGES[1:2]) == "<Hi>"
+
+
+def test_incremental_chat_renderer_converts_only_new_messages() -> None:
+    converted: List[Dict[str, Any]] = []
+
+    def convert(message: Dict[str, Any]) -> Dict[str, Any]:
+        converted.append(message)
+        return message
+
+    renderer = IncrementalChatRenderer(convert)
+    template = get_chat_template("google/flan-ul2")
+    history = list(MESSAGES[:2])
+
+    assert renderer.render(template, history) == (
+        MESSAGES[:2],
+        template.render(MESSAGES[:2]),
+    )
+    history += MESSAGES[2:]
+    assert renderer.render(template, history) == (MESSAGES, template.render(MESSAGES))
+    assert converted == MESSAGES
+
+    # a shorter conversation reuses the rendered prefix as well
+    assert renderer.render(template, history[:3]) == (
+        MESSAGES[:3],
+        template.render(MESSAGES[:3]),
+    )
+    assert converted == MESSAGES
+
+
+def test_incremental_chat_renderer_renders_edited_messages() -> None:
+    renderer = IncrementalChatRenderer(_convert_message_to_dict)
+    template = get_chat_template("google/flan-ul2")
+    messages: List[BaseMessage] = [
+        SystemMessage(content="Be brief."),
+        HumanMessage(content="Hi"),
+    ]
+    renderer.render(template, messages)
+
+    messages[1].content = "Hello"
+    assert renderer.render(template, messages)[1] == (
+        "System: Be brief.\nHuman: Hello\nAI: "
+    )
@@ -1,6 +1,11 @@
 """Test WatsonxLLM API wrapper."""
 
+import asyncio
 import os
+import time
+from typing import Any, List
+
+from pytest_mock import MockerFixture
 
 from langchain_ibm import WatsonxEmbeddings
 
@@ -60,3 +65,106 @@ def test_initialize_watsonx_embeddings_cpd_bad_path_apikey_without_username() ->
         )
     except ValueError as e:
         assert "WATSONX_USERNAME" in e.__str__()
+
+
+def test_initialize_watsonx_embeddings_bad_batch_size() -> None:
+    try:
+        WatsonxEmbeddings(
+            model_id=MODEL_ID,
+            url="https://us-south.ml.cloud.ibm.com",
+            apikey="test_apikey",
+            batch_size=0,
+        )
+    except ValueError as e:
+        assert "batch_size" in e.__str__()
+
+
+def test_initialize_watsonx_embeddings_bad_max_concurrency() -> None:
+    try:
+        WatsonxEmbeddings(
+            model_id=MODEL_ID,
+            url="https://us-south.ml.cloud.ibm.com",
+            apikey="test_apikey",
+            max_concurrency=0,
+        )
+    except ValueError as e:
+        assert "max_concurrency" in e.__str__()
+
+
+def test_embed_documents_without_texts(mocker: MockerFixture) -> None:
+    embeddings = WatsonxEmbeddings(
+        model_id=MODEL_ID, url="https://us-south.ml.cloud.ibm.com", apikey="test"
+    )
+    mocker.patch.object(WatsonxEmbeddings, "_get_watsonx_embed")
+    embed = mocker.patch("langchain_ibm.embeddings.embed")
+
+    assert embeddings.embed_documents([]) == []
+    embed.assert_not_called()
+
+
+async def test_aembed_documents_without_texts(mocker: MockerFixture) -> None:
+    embeddings = WatsonxEmbeddings(
+        model_id=MODEL_ID, url="https://us-south.ml.cloud.ibm.com", apikey="test"
+    )
+    mocker.patch.object(WatsonxEmbeddings, "_get_watsonx_embed")
+    aembed = mocker.patch("langchain_ibm.embeddings.aembed")
+
+    assert await embeddings.aembed_documents([]) == []
+    aembed.assert_not_called()
+
+
+async def test_aiter_embed_documents_awaits_cancelled_batches(
+    mocker: MockerFixture,
+) -> None:
+    embeddings = WatsonxEmbeddings(
+        model_id=MODEL_ID,
+        url="https://us-south.ml.cloud.ibm.com",
+        apikey="test",
+        batch_size=1,
+        max_concurrency=3,
+    )
+    finished = []
+
+    async def aembed_documents(self: Any, texts: List[str]) -> List[List[float]]:
+        try:
+            if texts != ["a"]:
+                await asyncio.sleep(10)
+            return [[1.0]]
+        finally:
+            finished.append(texts[0])
+
+    mocker.patch.object(WatsonxEmbeddings, "aembed_documents", aembed_documents)
+
+    vectors = embeddings.aiter_embed_documents(["a", "b", "c"])
+    assert await vectors.__anext__() == (0, [1.0])
+    await vectors.aclose()
+
+    assert sorted(finished) == ["a", "b", "c"]
+
+
+def test_embed_documents_array_bounds_batches_in_flight(
+    mocker: MockerFixture,
+) -> None:
+    embeddings = WatsonxEmbeddings(
+        model_id=MODEL_ID,
+        url="https://us-south.ml.cloud.ibm.com",
+        apikey="test",
+        batch_size=1,
+        max_concurrency=2,
+    )
+    started: List[str] = []
+    started_before_first: List[str] = []
+
+    def embed_documents(self: Any, texts: List[str]) -> List[List[float]]:
+        started.append(texts[0])
+        if texts == ["a"]:
+            time.sleep(0.2)
+            started_before_first.extend(started)
+        return [[float(ord(texts[0]))]]
+
+    mocker.patch.object(WatsonxEmbeddings, "embed_documents", embed_documents)
+
+    array = embeddings.embed_documents_array(["a", "b", "c", "d", "e"])
+
+    assert sorted(started_before_first) == ["a", "b"]
+    assert array.tolist() == [[97.0], [98.0], [99.0], [100.0], [101.0]]
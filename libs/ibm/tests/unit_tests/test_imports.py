@@ -1,3 +1,6 @@
+import subprocess
+import sys
+
 from langchain_ibm import __all__
 
 EXPECTED_ALL = ["WatsonxLLM", "WatsonxEmbeddings", "ChatWatsonx"]
@@ -5,3 +8,46 @@ EXPECTED_ALL = ["WatsonxLLM", "WatsonxEmbeddings", "ChatWatsonx"]
 
 def test_all_imports() -> None:
     assert sorted(EXPECTED_ALL) == sorted(__all__)
+
+
+def _import_in_subprocess(statement: str, *modules: str) -> None:
+    """Run an import statement in a fresh interpreter, checking that none of
+    ``modules`` were imported by it."""
+    code = (
+        "import sys\n"
+        f"{statement}\n"
+        f"print(*[m for m in {list(modules)} if m in sys.modules])\n"
+    )
+    result = subprocess.run(
+        [sys.executable, "-c", code], capture_output=True, text=True, check=True
+    )
+    imported = result.stdout.strip()
+    assert not imported, f"`{statement}` imported {imported}"
+
+
+def test_import_does_not_load_sdk() -> None:
+    _import_in_subprocess(
+        "from langchain_ibm import ChatWatsonx, WatsonxEmbeddings, WatsonxLLM",
+        "ibm_watsonx_ai",
+        "pandas",
+    )
+
+
+def test_import_embeddings_does_not_load_chat_models() -> None:
+    _import_in_subprocess(
+        "from langchain_ibm import WatsonxEmbeddings",
+        "langchain_ibm.chat_models",
+        "langchain_ibm.llms",
+        "langchain_core.output_parsers.openai_tools",
+    )
+
+
+def test_import_package_does_not_load_sdk() -> None:
+    _import_in_subprocess("import langchain_ibm", "ibm_watsonx_ai")
+
+
+def test_import_textgen_valid_params() -> None:
+    from langchain_ibm.llms import textgen_valid_params
+
+    assert "max_new_tokens" in textgen_valid_params
+    _import_in_subprocess("import langchain_ibm.llms", "ibm_watsonx_ai")
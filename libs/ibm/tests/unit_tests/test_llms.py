@@ -1,8 +1,16 @@
 """Test WatsonxLLM API wrapper."""
 
+import json
 import os
+from typing import Any, AsyncIterator, Dict, Iterator, List
+
+import requests
+from ibm_watsonx_ai import Credentials  # type: ignore
+from ibm_watsonx_ai.foundation_models import ModelInference  # type: ignore
+from pytest_mock import MockerFixture
 
 from langchain_ibm import WatsonxLLM
+from langchain_ibm.utils import StreamMetrics
 
 os.environ.pop("WATSONX_APIKEY", None)
 os.environ.pop("WATSONX_PROJECT_ID", None)
@@ -58,3 +66,216 @@ def test_initialize_watsonxllm_cpd_bad_path_apikey_without_username() -> None:
         )
     except ValueError as e:
         assert "WATSONX_USERNAME" in e.__str__()
+
+
+def test_initialize_watsonxllm_creates_model_lazily(mocker: MockerFixture) -> None:
+    get_api_client = mocker.patch("langchain_ibm.llms.get_api_client")
+    model_init = mocker.patch.object(ModelInference, "__init__", return_value=None)
+    mocker.patch.object(ModelInference, "_inference", create=True)
+
+    watsonx_llm = WatsonxLLM(
+        model_id="google/flan-ul2",
+        url="https://us-south.ml.cloud.ibm.com",
+        apikey="test_apikey",
+        project_id="test_project_id",
+    )
+    assert watsonx_llm.watsonx_model is None
+    get_api_client.assert_not_called()
+
+    watsonx_llm.warmup()
+    watsonx_llm.warmup()
+    model_init.assert_called_once()
+    assert isinstance(watsonx_llm.watsonx_model, ModelInference)
+
+
+def test_initialize_watsonxllm_bad_max_concurrency() -> None:
+    try:
+        WatsonxLLM(
+            model_id="google/flan-ul2",
+            url="https://us-south.ml.cloud.ibm.com",
+            apikey="test_apikey",
+            max_concurrency=0,
+        )
+    except ValueError as e:
+        assert "max_concurrency" in e.__str__()
+
+
+def test_initialize_watsonxllm_with_rate_limits() -> None:
+    watsonx_llm = WatsonxLLM(
+        model_id="google/flan-ul2",
+        url="https://us-south.ml.cloud.ibm.com",
+        apikey="test_apikey",
+        project_id="test_project_id",
+        requests_per_second=5,
+        tokens_per_minute=60_000,
+    )
+    assert watsonx_llm.rate_limiter is not None
+    assert watsonx_llm.rate_limiter.requests_per_second == 5
+    assert watsonx_llm.rate_limiter.tokens_per_minute == 60_000
+
+
+def _watsonx_model(mocker: MockerFixture, sent: List[Dict[str, Any]]) -> Any:
+    """A ``ModelInference`` of the SDK whose requests are recorded and answered
+    with the prompt."""
+    url = "https://us-south.ml.cloud.ibm.com"
+    api_client = mocker.MagicMock(
+        credentials=Credentials(url=url, token="token"),
+        CLOUD_PLATFORM_SPACES=True,
+        _use_fm_ga_api=True,
+        default_project_id="project",
+        default_space_id=None,
+    )
+    api_client._get_headers.return_value = {"Authorization": "Bearer token"}
+    api_client._params.return_value = {"version": "2024-05-01"}
+    href_definitions = api_client.service_instance._href_definitions
+    href_definitions.get_fm_generation_href.return_value = (
+        f"{url}/ml/v1/text/generation"
+    )
+    watsonx_model = ModelInference(
+        model_id="google/flan-ul2", api_client=api_client, validate=False
+    )
+
+    def post(**kwargs: Any) -> requests.Response:
+        sent.append(kwargs["json"])
+        response = requests.Response()
+        response.status_code = 200
+        response.request = requests.Request("POST", kwargs["url"]).prepare()
+        response._content = json.dumps(
+            {
+                "results": [
+                    {
+                        "generated_text": kwargs["json"]["input"],
+                        "stop_reason": "eos_token",
+                    }
+                ]
+            }
+        ).encode()
+        return response
+
+    mocker.patch.object(watsonx_model._inference._session, "post", side_effect=post)
+    return watsonx_model
+
+
+def test_watsonxllm_generate_with_sdk_options(mocker: MockerFixture) -> None:
+    sent: List[Dict[str, Any]] = []
+    watsonx_llm = WatsonxLLM(
+        model_id="google/flan-ul2",
+        url="https://us-south.ml.cloud.ibm.com",
+        apikey="test_apikey",
+        project_id="test_project_id",
+    )
+    mocker.patch.object(
+        WatsonxLLM, "_get_watsonx_model", return_value=_watsonx_model(mocker, sent)
+    )
+
+    result = watsonx_llm.generate(
+        ["a", "b"], validate_prompt_variables=False, async_mode=True
+    )
+
+    assert [generation[0].text for generation in result.generations] == ["a", "b"]
+    assert sorted(payload["input"] for payload in sent) == ["a", "b"]
+
+
+def test_watsonxllm_invoke_with_sdk_options(mocker: MockerFixture) -> None:
+    sent: List[Dict[str, Any]] = []
+    watsonx_llm = WatsonxLLM(
+        model_id="google/flan-ul2",
+        url="https://us-south.ml.cloud.ibm.com",
+        apikey="test_apikey",
+        project_id="test_project_id",
+    )
+    mocker.patch.object(
+        WatsonxLLM, "_get_watsonx_model", return_value=_watsonx_model(mocker, sent)
+    )
+
+    response = watsonx_llm.invoke(
+        "hi", validate_prompt_variables=False, async_mode=True, concurrency_limit=2
+    )
+
+    assert response == "hi"
+    assert [payload["input"] for payload in sent] == ["hi"]
+
+
+def _stream_events(closed: list) -> Iterator[Dict[str, Any]]:
+    try:
+        for text in ["a", "b", "c"]:
+            yield {"results": [{"generated_text": text, "stop_reason": "not_finished"}]}
+    finally:
+        closed.append(True)
+
+
+def test_watsonxllm_stream_closes_abandoned_stream(mocker: MockerFixture) -> None:
+    watsonx_llm = WatsonxLLM(
+        model_id="google/flan-ul2",
+        url="https://us-south.ml.cloud.ibm.com",
+        apikey="test_apikey",
+        project_id="test_project_id",
+    )
+    closed: list = []
+    mocker.patch.object(WatsonxLLM, "_get_watsonx_model")
+    mocker.patch(
+        "langchain_ibm.llms.generate_stream",
+        side_effect=lambda *args, **kwargs: _stream_events(closed),
+    )
+
+    stream = watsonx_llm.stream("What is a molecule")
+    assert next(stream) == "a"
+    stream.close()  # type: ignore[attr-defined]
+
+    assert closed == [True]
+
+
+def test_watsonxllm_stream_metrics(mocker: MockerFixture) -> None:
+    reported: List[StreamMetrics] = []
+    watsonx_llm = WatsonxLLM(
+        model_id="google/flan-ul2",
+        url="https://us-south.ml.cloud.ibm.com",
+        apikey="test_apikey",
+        project_id="test_project_id",
+        stream_metrics_callback=reported.append,
+    )
+    events: List[Dict[str, Any]] = [
+        {"results": [{"generated_text": text, "stop_reason": stop_reason}]}
+        for text, stop_reason in [("a", "not_finished"), ("b", "eos_token")]
+    ]
+    events[-1]["results"][0]["generated_token_count"] = 2
+    mocker.patch.object(WatsonxLLM, "_get_watsonx_model")
+    mocker.patch(
+        "langchain_ibm.llms.generate_stream",
+        side_effect=lambda *args, **kwargs: (event for event in events),
+    )
+
+    result = watsonx_llm.generate(["What is a molecule"], stream=True)
+
+    [metrics] = reported
+    assert metrics.model_id == "google/flan-ul2"
+    assert metrics.generated_token_count == 2
+    assert metrics.time_to_first_token is not None
+    generation_info = result.generations[0][0].generation_info or {}
+    assert generation_info["stream_metrics"] == metrics.to_dict()
+
+
+async def test_watsonxllm_astream_closes_abandoned_stream(
+    mocker: MockerFixture,
+) -> None:
+    watsonx_llm = WatsonxLLM(
+        model_id="google/flan-ul2",
+        url="https://us-south.ml.cloud.ibm.com",
+        apikey="test_apikey",
+        project_id="test_project_id",
+    )
+    closed: list = []
+
+    async def agenerate_stream(*args: Any, **kwargs: Any) -> AsyncIterator[Any]:
+        for event in _stream_events(closed):
+            yield event
+
+    mocker.patch.object(WatsonxLLM, "_get_watsonx_model")
+    mocker.patch.object(WatsonxLLM, "_get_async_client")
+    mocker.patch("langchain_ibm.llms.agenerate_stream", side_effect=agenerate_stream)
+
+    stream = watsonx_llm.astream("What is a molecule")
+    assert await stream.__anext__() == "a"
+    await stream.aclose()  # type: ignore[attr-defined]
+
+    assert closed == [True]
@@ -0,0 +1,89 @@
+"""Test parsing of generated tool calls."""
+
+from typing import cast
+
+from langchain_core.messages import AIMessageChunk
+
+from langchain_ibm.tool_parsing import ToolCallStreamParser
+
+
+def _parse(text: str, size: int) -> AIMessageChunk:
+    parser = ToolCallStreamParser()
+    message = AIMessageChunk(content="")
+    for i in range(0, len(text), size):
+        content, tool_call_chunks = parser.feed(text[i : i + size])
+        message = cast(
+            AIMessageChunk,
+            message
+            + AIMessageChunk(content=content, tool_call_chunks=tool_call_chunks),
+        )
+    content, tool_call_chunks = parser.flush()
+    return cast(
+        AIMessageChunk,
+        message + AIMessageChunk(content=content, tool_call_chunks=tool_call_chunks),
+    )
+
+
+def test_tool_call_stream_parser() -> None:
+    text = (
+        '```json\n{\n  "type": "function",\n  "function": {\n'
+        '    "name": "search",\n    "arguments": {"query": "a \\"b\\"", '
+        '"limit": 3, "filters": [true, null]}\n  }\n}\n```\n\n'
+        '```json\n{"function": {"arguments": {}, "name": "now"}}\n```</endoftext>'
+    )
+    for size in (1, 3, len(text)):
+        message = _parse(text, size)
+        assert message.content == ""
+        assert [(call["name"], call["args"]) for call in message.tool_calls] == [
+            ("search", {"query": 'a "b"', "limit": 3, "filters": [True, None]}),
+            ("now", {}),
+        ]
+
+
+def test_tool_call_stream_parser_emits_name_first() -> None:
+    parser = ToolCallStreamParser()
+
+    _, chunks = parser.feed('```json\n{"function": {"name": "search", "argu')
+    assert [(chunk["name"], chunk["args"]) for chunk in chunks] == [("search", "")]
+    _, chunks = parser.feed('ments": {"query": "wat')
+    assert [(chunk["name"], chunk["args"]) for chunk in chunks] == [
+        (None, '{"query": "wat')
+    ]
+
+
+def test_tool_call_stream_parser_content() -> None:
+    final_answer = (
+        '```json\n{"type": "function", "function": {"name": "Final Answer", '
+        '"arguments": {"output": "It is 5."}}}\n```'
+    )
+    assert _parse(final_answer, 2).content == "It is 5."
+    assert _parse("Plain `text`, no tools", 2).content == "Plain `text`, no tools"
+    assert _parse('```json\n{"oops": ', 2).content == '```json\n{"oops": '
+
+
+def test_tool_call_stream_parser_json_content() -> None:
+    texts = [
+        '{"a": "b"} trailing',
+        '```json\n{"a": 1}\n```\nSome prose {"b": 2}',
+        "Hello {x} world and more",
+    ]
+    for text in texts:
+        for size in (1, 3, len(text)):
+            assert _parse(text, size).content == text
+
+    parser = ToolCallStreamParser()
+    assert parser.feed("Hello ") == ("Hello ", [])
+    assert parser.feed("{x} world and more") == ("{x} world and more", [])
+    assert not parser.done
+
+
+def test_tool_call_stream_parser_raw_newline() -> None:
+    text = (
+        '```json\n{"type": "function", "function": {"name": "echo", '
+        '"arguments": {"text": "a\nb"}}}\n```'
+    )
+    for size in (1, 3, len(text)):
+        message = _parse(text, size)
+        assert [(call["name"], call["args"]) for call in message.tool_calls] == [
+            ("echo", {"text": "a\nb"})
+        ]
@@ -0,0 +1,454 @@
+"""Test shared helpers for IBM watsonx.ai integrations."""
+
+import gc
+import json
+import time
+import weakref
+from datetime import datetime, timedelta, timezone
+from email.utils import format_datetime
+from typing import Any, List
+
+import httpx
+import pytest
+import requests
+from ibm_watsonx_ai import Credentials  # type: ignore
+from ibm_watsonx_ai.foundation_models import ModelInference  # type: ignore
+from ibm_watsonx_ai.foundation_models.embeddings import Embeddings  # type: ignore
+from ibm_watsonx_ai.wml_client_error import WMLClientError  # type: ignore
+from pytest_mock import MockerFixture
+
+from langchain_ibm.utils import (
+    AdaptiveConcurrencyLimiter,
+    RateLimiter,
+    RetryPolicy,
+    StopSequenceMatcher,
+    StreamMetrics,
+    _token_refresher,
+    aclose_async_http_clients,
+    aembed,
+    agenerate,
+    agenerate_stream,
+    clear_api_clients,
+    configure_http_session,
+    get_api_client,
+    get_async_http_client,
+)
+
+URL = "https://us-south.ml.cloud.ibm.com"
+
+
+@pytest.fixture
+def api_client(mocker: MockerFixture) -> Any:
+    """An API client of the SDK that makes no requests on its own."""
+    api_client = mocker.MagicMock(
+        credentials=Credentials(url=URL, token="token"),
+        CLOUD_PLATFORM_SPACES=True,
+        _use_fm_ga_api=True,
+        default_project_id="project",
+        default_space_id=None,
+    )
+    api_client._get_headers.return_value = {"Authorization": "Bearer token"}
+    api_client._params.return_value = {"version": "2024-05-01"}
+    href_definitions = api_client.service_instance._href_definitions
+    href_definitions.get_fm_generation_href.side_effect = (
+        lambda item: f"{URL}/ml/v1/text/{'generation' if item == 'text' else item}"
+    )
+    href_definitions.get_fm_generation_stream_href.return_value = (
+        f"{URL}/ml/v1/text/generation_stream"
+    )
+    href_definitions.get_fm_embeddings_href.return_value = (
+        f"{URL}/ml/v1/text/embeddings"
+    )
+    return api_client
+
+
+def _mock_client(
+    requests_sent: List[httpx.Request], response: httpx.Response
+) -> httpx.AsyncClient:
+    def handler(request: httpx.Request) -> httpx.Response:
+        requests_sent.append(request)
+        return response
+
+    return httpx.AsyncClient(transport=httpx.MockTransport(handler))
+
+
+def test_get_api_client_shares_client_per_credentials_and_scope(
+    mocker: MockerFixture,
+) -> None:
+    mocker.patch("ibm_watsonx_ai.APIClient", side_effect=lambda _: mocker.MagicMock())
+    clear_api_clients()
+
+    client = get_api_client(Credentials(url=URL, api_key="a"), project_id="p")
+    assert client is get_api_client(Credentials(url=URL, api_key="a"), project_id="p")
+    assert client is not get_api_client(
+        Credentials(url=URL, api_key="b"), project_id="p"
+    )
+    assert client is not get_api_client(
+        Credentials(url=URL, api_key="a"), project_id="q"
+    )
+    assert client is not get_api_client(
+        Credentials(url=URL, api_key="a", verify=False), project_id="p"
+    )
+
+    clear_api_clients()
+    assert client is not get_api_client(
+        Credentials(url=URL, api_key="a"), project_id="p"
+    )
+
+
+def test_get_api_client_releases_unused_clients(mocker: MockerFixture) -> None:
+    mocker.patch("ibm_watsonx_ai.APIClient", side_effect=lambda _: mocker.MagicMock())
+    clear_api_clients()
+
+    client = weakref.ref(get_api_client(Credentials(url=URL, api_key="a"), "p"))
+    gc.collect()
+
+    assert client() is None
+
+
+def test_get_api_client_without_project_or_space() -> None:
+    try:
+        get_api_client(Credentials(url=URL, api_key="a"))
+    except Exception as e:
+        assert "project_id" in e.__str__()
+
+
+def test_get_api_client_refreshes_token_in_background(mocker: MockerFixture) -> None:
+    mocker.patch("langchain_ibm.utils._TOKEN_REFRESH_MARGIN", 0.0)
+    mocker.patch("langchain_ibm.utils._TOKEN_REFRESH_RETRY", 0.05)
+    api_client = mocker.MagicMock(proceed=False, ICP_PLATFORM_SPACES=False)
+    api_client._is_IAM.return_value = True
+    service_instance = api_client.service_instance
+    service_instance._min_expiration_time = timedelta(0)
+    service_instance._get_expiration_datetime.return_value = datetime.now()
+    service_instance._get_IAM_token.return_value = "renewed"
+    mocker.patch("ibm_watsonx_ai.APIClient", return_value=api_client)
+    clear_api_clients()
+
+    get_api_client(Credentials(url=URL, api_key="a"), project_id="p")
+    for _ in range(100):
+        if api_client.token == "renewed":
+            break
+        time.sleep(0.05)
+    clear_api_clients()
+
+    assert api_client.token == "renewed"
+    api_client.repository._refresh_repo_client.assert_called()
+
+
+def test_get_api_client_stops_refreshing_released_clients(
+    mocker: MockerFixture,
+) -> None:
+    def api_client(_: Any) -> Any:
+        client = mocker.MagicMock(proceed=False, ICP_PLATFORM_SPACES=False)
+        client._is_IAM.return_value = True
+        client.service_instance._min_expiration_time = timedelta(0)
+        client.service_instance._get_expiration_datetime.return_value = (
+            datetime.now() + timedelta(hours=1)
+        )
+        return client
+
+    mocker.patch("ibm_watsonx_ai.APIClient", side_effect=api_client)
+    clear_api_clients()
+
+    client = get_api_client(Credentials(url=URL, api_key="a"), project_id="p")
+    assert len(_token_refresher._due) == 1
+    del client
+    gc.collect()
+
+    assert not _token_refresher._due
+
+
+def test_configure_http_session() -> None:
+    session = requests.Session()
+    configure_http_session(session, max_connections=32, timeout=15)
+
+    adapter = session.get_adapter(URL)
+    assert adapter._pool_maxsize == 32  # type: ignore[attr-defined]
+    assert adapter.timeout == 15  # type: ignore[attr-defined]
+
+
+async def test_get_async_http_client_shares_client_per_settings() -> None:
+    client = get_async_http_client(max_connections=32, timeout=15)
+    assert client is get_async_http_client(max_connections=32, timeout=15)
+    assert client is not get_async_http_client(max_connections=16, timeout=15)
+    assert client.timeout.read == 15
+
+    await client.aclose()
+    assert client is not get_async_http_client(max_connections=32, timeout=15)
+    await aclose_async_http_clients()
+
+
+async def test_aclose_async_http_clients() -> None:
+    clients = [
+        get_async_http_client(max_connections=max_connections)
+        for max_connections in (8, 16)
+    ]
+
+    await aclose_async_http_clients()
+
+    assert all(client.is_closed for client in clients)
+    new_client = get_async_http_client(max_connections=8)
+    assert not new_client.is_closed
+    await aclose_async_http_clients()
+
+
+def test_rate_limiter_requests_per_second(mocker: MockerFixture) -> None:
+    sleep = mocker.patch("langchain_ibm.utils.time.sleep")
+    rate_limiter = RateLimiter(requests_per_second=2)
+
+    for _ in range(4):
+        rate_limiter.acquire()
+
+    # a burst of two requests, then one every half a second
+    delays = [call.args[0] for call in sleep.call_args_list]
+    assert len(delays) == 2
+    assert delays[0] == pytest.approx(0.5, abs=0.05)
+    assert delays[1] == pytest.approx(1.0, abs=0.05)
+
+
+def test_rate_limiter_tokens_per_minute(mocker: MockerFixture) -> None:
+    sleep = mocker.patch("langchain_ibm.utils.time.sleep")
+    rate_limiter = RateLimiter(tokens_per_minute=600)
+
+    rate_limiter.acquire(500)
+    rate_limiter.adjust(100)
+    rate_limiter.acquire(5)
+
+    sleep.assert_called_once()
+    assert sleep.call_args.args[0] == pytest.approx(0.5, abs=0.05)
+
+
+def test_retry_policy_delay() -> None:
+    retry_policy = RetryPolicy(initial_delay=1, max_delay=10)
+
+    assert 0 <= retry_policy.delay(0) <= 1
+    assert 0 <= retry_policy.delay(2) <= 4
+    assert 0 <= retry_policy.delay(10) <= 10
+    assert retry_policy.delay(0, retry_after="3") == 3
+    assert retry_policy.delay(0, retry_after="120") == 10
+    retry_at = datetime.now(timezone.utc) + timedelta(seconds=5)
+    assert retry_policy.delay(0, retry_after=format_datetime(retry_at)) == (
+        pytest.approx(5, abs=1.5)
+    )
+
+
+def test_retry_policy_retries_only_safe_errors() -> None:
+    retry_policy = RetryPolicy(max_retries=2)
+
+    assert retry_policy.should_retry_status(1, 429)
+    assert not retry_policy.should_retry_status(2, 429)
+    assert not retry_policy.should_retry_status(0, 400)
+    assert retry_policy.should_retry_error(0, httpx.ConnectError("refused"), False)
+    assert retry_policy.should_retry_error(0, httpx.ReadTimeout("slow"), True)
+    assert not retry_policy.should_retry_error(0, httpx.ReadTimeout("slow"), False)
+    assert not retry_policy.should_retry_error(0, ValueError(), True)
+
+
+def test_adaptive_concurrency_limiter() -> None:
+    limiter = AdaptiveConcurrencyLimiter(max_concurrency=8, cooldown=0)
+
+    limiter.record(429)
+    assert limiter.limit == 4
+    limiter.record(503)
+    limiter.record(429)
+    limiter.record(429)
+    assert limiter.limit == 1
+
+    for _ in range(10):
+        limiter.record(200)
+    assert 1 < limiter.limit < 8
+    for _ in range(100):
+        limiter.record(200)
+    assert limiter.limit == 8
+
+
+def test_stop_sequence_matcher_across_chunks() -> None:
+    matcher = StopSequenceMatcher(["</endoftext>", "\n\nHuman:"])
+
+    assert matcher.feed("Hello <") == "Hello "
+    assert matcher.feed("/end") == ""
+    assert matcher.feed("ofte") == ""
+    assert matcher.feed("xt> and more") == "</endoftext>"
+    assert matcher.stopped
+    assert matcher.feed("ignored") == ""
+
+    matcher = StopSequenceMatcher(["STOP"], include_stop_sequence=False)
+    assert matcher.feed("a S") == "a "
+    assert matcher.feed("TAR") == "STAR"
+    assert matcher.feed("t ST") == "t "
+    assert matcher.feed("OP") == ""
+    assert matcher.stopped
+
+    matcher = StopSequenceMatcher(["STOP"])
+    assert matcher.feed("a ST") == "a "
+    assert matcher.feed("", final=True) == "ST"
+    assert not matcher.stopped
+
+
+def test_stream_metrics(mocker: MockerFixture) -> None:
+    clock = mocker.patch("langchain_ibm.utils.time.perf_counter")
+    clock.return_value = 10.0
+    metrics = StreamMetrics("google/flan-ul2")
+
+    for now, text, tokens in [(10.5, "", None), (11.0, "a", 1), (11.1, "b", 2)]:
+        clock.return_value = now
+        metrics.record(
+            {"results": [{"generated_text": text, "generated_token_count": tokens}]}
+        )
+    clock.return_value = 11.4
+    metrics.record(
+        {
+            "results": [
+                {
+                    "generated_text": "c",
+                    "generated_token_count": 4,
+                    "input_token_count": 7,
+                }
+            ]
+        }
+    )
+    clock.return_value = 12.0
+    metrics.finish()
+
+    assert metrics.to_dict() == {
+        "time_to_first_token": pytest.approx(1.0),
+        "mean_inter_token_latency": pytest.approx(0.2),
+        "max_inter_token_latency": pytest.approx(0.3),
+        "tokens_per_second": pytest.approx(2.0),
+        "duration": pytest.approx(2.0),
+        "generated_token_count": 4,
+        "input_token_count": 7,
+    }
+
+
+async def test_agenerate_sends_request_of_sdk(api_client: Any) -> None:
+    watsonx_model = ModelInference(
+        model_id="ibm/granite-13b-instruct-v2",
+        api_client=api_client,
+        params={"max_new_tokens": 20},
+        validate=False,
+    )
+    requests_sent: List[httpx.Request] = []
+    response = {"results": [{"generated_text": "Paris", "stop_reason": "eos_token"}]}
+    client = _mock_client(requests_sent, httpx.Response(200, json=response))
+
+    assert (
+        await agenerate(
+            watsonx_model,
+            "Capital of France?",
+            params={"temperature": 0.5},
+            client=client,
+        )
+        == response
+    )
+    [request] = requests_sent
+    assert request.method == "POST"
+    assert str(request.url) == f"{URL}/ml/v1/text/generation?version=2024-05-01"
+    assert request.headers["Authorization"] == "Bearer token"
+    assert json.loads(request.content) == {
+        "model_id": "ibm/granite-13b-instruct-v2",
+        "input": "Capital of France?",
+        "parameters": {"temperature": 0.5},
+        "project_id": "project",
+    }
+
+
+async def test_agenerate_raises_error_of_sdk(api_client: Any) -> None:
+    watsonx_model = ModelInference(
+        model_id="ibm/granite-13b-instruct-v2", api_client=api_client, validate=False
+    )
+    client = _mock_client([], httpx.Response(400, json={"errors": ["bad request"]}))
+
+    with pytest.raises(WMLClientError, match="bad request"):
+        await agenerate(watsonx_model, "Capital of France?", client=client)
+
+
+async def test_agenerate_validates_prompt_variables_of_deployment(
+    api_client: Any, mocker: MockerFixture
+) -> None:
+    api_client.deployments.get_details.return_value = {
+        "entity": {"prompt_template": {"id": "template"}}
+    }
+    href_definitions = api_client.service_instance._href_definitions
+    href_definitions.get_fm_deployment_generation_href.side_effect = (
+        lambda deployment_id, item: f"{URL}/ml/v1/deployments/{deployment_id}/{item}"
+    )
+    load_prompt = mocker.patch(
+        "ibm_watsonx_ai.foundation_models.prompts.PromptTemplateManager.load_prompt"
+    )
+    load_prompt.return_value.input_variables = {"city": {}}
+    watsonx_model = ModelInference(deployment_id="deployment", api_client=api_client)
+    requests_sent: List[httpx.Request] = []
+    response = {"results": [{"generated_text": "Paris", "stop_reason": "eos_token"}]}
+    client = _mock_client(requests_sent, httpx.Response(200, json=response))
+
+    with pytest.raises(Exception, match="prompt_variables"):
+        await agenerate(watsonx_model, None, client=client)
+    assert not requests_sent
+
+    await agenerate(
+        watsonx_model,
+        None,
+        params={"prompt_variables": {"city": "Paris"}},
+        client=client,
+    )
+    await agenerate(watsonx_model, None, client=client, validate_prompt_variables=False)
+    assert len(requests_sent) == 2
+    assert load_prompt.call_count == 2
+
+
+async def test_agenerate_stream_parses_events(api_client: Any) -> None:
+    watsonx_model = ModelInference(
+        model_id="ibm/granite-13b-instruct-v2", api_client=api_client, validate=False
+    )
+    events = [
+        {"results": [{"generated_text": "Par", "stop_reason": "not_finished"}]},
+        {"results": [{"generated_text": "is", "stop_reason": "eos_token"}]},
+    ]
+    body = "".join(
+        f"id: {i}\nevent: message\ndata: {json.dumps(event)}\n\n"
+        for i, event in enumerate(events)
+    )
+    requests_sent: List[httpx.Request] = []
+    client = _mock_client(requests_sent, httpx.Response(200, text=body))
+
+    streamed = [
+        event
+        async for event in agenerate_stream(
+            watsonx_model, "Capital of France?", client=client
+        )
+    ]
+
+    assert streamed == events
+    [request] = requests_sent
+    assert request.url.path == "/ml/v1/text/generation_stream"
+    assert json.loads(request.content)["input"] == "Capital of France?"
+
+    client = _mock_client([], httpx.Response(500, text="unavailable"))
+    with pytest.raises(WMLClientError, match="unavailable"):
+        async for _ in agenerate_stream(watsonx_model, "Capital?", client=client):
+            pass
+
+
+async def test_aembed_sends_request_of_sdk(api_client: Any) -> None:
+    watsonx_embed = Embeddings(
+        model_id="ibm/slate-30m-english-rtrvr", api_client=api_client
+    )
+    requests_sent: List[httpx.Request] = []
+    response = {"results": [{"embedding": [0.1, 0.2]}]}
+    client = _mock_client(requests_sent, httpx.Response(200, json=response))
+
+    assert await aembed(watsonx_embed, ["hello"], client=client) == response
+    [request] = requests_sent
+    assert request.url.path == "/ml/v1/text/embeddings"
+    assert request.headers["Authorization"] == "Bearer token"
+    assert json.loads(request.content) == {
+        "model_id": "ibm/slate-30m-english-rtrvr",
+        "inputs": ["hello"],
+        "project_id": "project",
+    }
+
+    client = _mock_client([], httpx.Response(401, json={"errors": ["expired"]}))
+    with pytest.raises(WMLClientError, match="expired"):
+        await aembed(watsonx_embed, ["hello"], client=client)